@@ -1,3 +1,4 @@
+import os
 import time
 import psutil
 import win32api
@@ -7,8 +8,12 @@ import winreg
 import subprocess
 import threading
 import math
+import operator
+import heapq
+import itertools
 import weakref
-from collections import defaultdict, deque
+from collections import defaultdict, deque, OrderedDict
+from array import array
 import ctypes
 import logging
 import platform
@@ -20,8 +25,17 @@ CACHE_CLEANUP_SIZE = 5000
 WMIC_COMMAND_PATH = 'wmic'
 PROCESS_QUERY_INFORMATION = 0x0400
 WAIT_OBJECT_0 = 0x0
+SYNCHRONIZE = 0x00100000
 TH32CS_SNAPPROCESS = 0x00000002
 MAX_PROCESS_SNAPSHOT_ITERATIONS = 10000
+PROCESS_TRACE_QUERY = "SELECT * FROM Win32_ProcessTrace"
+PROCESSOR_GROUP_SIZE = 64
+CORESET_CACHE_SIZE = 512
+MIGRATION_BASE_COST = 0.15
+MIGRATION_L3_REFILL_COST = 0.6
+MIGRATION_TLB_REFILL_COST = 0.1
+MIGRATION_WARMUP_SECONDS = 20.0
+MIGRATION_PING_PONG_PENALTY = 0.5
 
 ntdll = ctypes.WinDLL('ntdll')
 kernel32 = ctypes.WinDLL('kernel32')
@@ -112,6 +126,641 @@ class CircularBuffer:
         self._head = 0
         self._count = 0
         self._buffer = [None] * self._size
+class FloatRingBuffer:
+    __slots__ = ('_values', '_times', '_size', '_head', '_count')
+    
+    def __init__(self, maxlen):
+        self._values = array('f', bytes(4 * maxlen))
+        self._times = array('d', bytes(8 * maxlen))
+        self._size = maxlen
+        self._head = 0
+        self._count = 0
+    
+    def append(self, value, timestamp):
+        self._values[self._head] = value
+        self._times[self._head] = timestamp
+        self._head = (self._head + 1) % self._size
+        if self._count < self._size:
+            self._count += 1
+    
+    def __len__(self):
+        return self._count
+    
+    def last(self):
+        if not self._count:
+            return None
+        return self._values[self._head - 1]
+    
+    def last_time(self):
+        if not self._count:
+            return None
+        return self._times[self._head - 1]
+    
+    def values(self, count=None):
+        if self._count < self._size:
+            ordered = self._values[:self._count]
+        else:
+            ordered = self._values[self._head:] + self._values[:self._head]
+        return ordered[-count:] if count else ordered
+    
+    def times(self, count=None):
+        if self._count < self._size:
+            ordered = self._times[:self._count]
+        else:
+            ordered = self._times[self._head:] + self._times[:self._head]
+        return ordered[-count:] if count else ordered
+    
+    def clear(self):
+        self._head = 0
+        self._count = 0
+class TimeSeriesStore:
+    
+    def __init__(self, capacity=64, pid_idle_ttl_seconds=60.0):
+        self.lock = threading.RLock()
+        self.capacity = capacity
+        self.pid_idle_ttl = pid_idle_ttl_seconds
+        self.series = {}
+        self._ewma_weights = {}
+        self.stats = {
+            'appends': 0,
+            'queries': 0,
+            'series_created': 0,
+            'series_dropped': 0
+        }
+    
+    def _key(self, metric, core, pid):
+        if pid is not None:
+            return (metric, 'pid', pid)
+        if core is not None:
+            return (metric, 'core', core)
+        return (metric, 'system', None)
+    
+    def _get(self, metric, core=None, pid=None, create=False):
+        key = self._key(metric, core, pid)
+        ring = self.series.get(key)
+        if ring is None and create:
+            ring = FloatRingBuffer(self.capacity)
+            self.series[key] = ring
+            self.stats['series_created'] += 1
+        return ring
+    
+    def record(self, metric, value, core=None, pid=None, timestamp=None):
+        with self.lock:
+            self._get(metric, core, pid, create=True).append(value, timestamp or time.time())
+            self.stats['appends'] += 1
+    
+    def record_cores(self, metric, values, timestamp=None):
+        timestamp = timestamp or time.time()
+        with self.lock:
+            for core, value in enumerate(values):
+                self._get(metric, core, create=True).append(value, timestamp)
+            self.stats['appends'] += len(values)
+    
+    def latest(self, metric, core=None, pid=None, default=None):
+        with self.lock:
+            ring = self._get(metric, core, pid)
+            if ring is None or not len(ring):
+                return default
+            return ring.last()
+    
+    def latest_cores(self, metric, core_count, default=0.0):
+        with self.lock:
+            result = []
+            for core in range(core_count):
+                ring = self._get(metric, core)
+                result.append(ring.last() if ring is not None and len(ring) else default)
+            return result
+    
+    def last_time(self, metric, core=None, pid=None):
+        with self.lock:
+            ring = self._get(metric, core, pid)
+            return ring.last_time() if ring is not None else None
+    
+    def values(self, metric, core=None, pid=None, count=None):
+        with self.lock:
+            self.stats['queries'] += 1
+            ring = self._get(metric, core, pid)
+            return ring.values(count) if ring is not None else array('f')
+    
+    def mean(self, metric, core=None, pid=None, count=None, default=0.0):
+        values = self.values(metric, core, pid, count)
+        return math.fsum(values) / len(values) if values else default
+    
+    def _weights(self, alpha, length):
+        key = (alpha, length)
+        weights = self._ewma_weights.get(key)
+        if weights is None:
+            decay = 1.0 - alpha
+            weights = array('d', [alpha * decay ** (length - 1 - i) for i in range(length)])
+            weights[0] = decay ** (length - 1)
+            if len(self._ewma_weights) > 256:
+                self._ewma_weights.clear()
+            self._ewma_weights[key] = weights
+        return weights
+    
+    def _ewma_ring(self, ring, alpha, default):
+        if ring is None or not len(ring):
+            return default
+        values = ring.values()
+        return sum(map(operator.mul, values, self._weights(alpha, len(values))))
+    
+    def ewma(self, metric, core=None, pid=None, alpha=0.3, default=0.0):
+        with self.lock:
+            self.stats['queries'] += 1
+            return self._ewma_ring(self._get(metric, core, pid), alpha, default)
+    
+    def ewma_cores(self, metric, core_count, alpha=0.3, default=0.0):
+        with self.lock:
+            self.stats['queries'] += 1
+            return [self._ewma_ring(self._get(metric, core), alpha, default) for core in range(core_count)]
+    
+    def percentile(self, metric, percentile, core=None, pid=None, count=None, default=0.0):
+        values = sorted(self.values(metric, core, pid, count))
+        if not values:
+            return default
+        position = (len(values) - 1) * min(max(percentile, 0.0), 100.0) / 100.0
+        lower = int(position)
+        upper = min(lower + 1, len(values) - 1)
+        return values[lower] + (values[upper] - values[lower]) * (position - lower)
+    
+    def slope(self, metric, core=None, pid=None, count=None, default=0.0):
+        with self.lock:
+            ring = self._get(metric, core, pid)
+            if ring is None or len(ring) < 2:
+                return default
+            values = ring.values(count)
+            times = ring.times(count)
+        
+        n = len(values)
+        mean_t = math.fsum(times) / n
+        mean_v = math.fsum(values) / n
+        variance = math.fsum((t - mean_t) ** 2 for t in times)
+        if variance <= 0:
+            return default
+        return math.fsum((t - mean_t) * (v - mean_v) for t, v in zip(times, values)) / variance
+    
+    def drop_pid(self, pid):
+        with self.lock:
+            for key in [key for key in self.series if key[1] == 'pid' and key[2] == pid]:
+                del self.series[key]
+                self.stats['series_dropped'] += 1
+    
+    def cleanup_idle(self, now=None):
+        now = now or time.time()
+        with self.lock:
+            idle = [
+                key for key, ring in self.series.items()
+                if key[1] == 'pid' and (not len(ring) or now - ring.last_time() > self.pid_idle_ttl)
+            ]
+            for key in idle:
+                del self.series[key]
+            self.stats['series_dropped'] += len(idle)
+            return len(idle)
+    
+    def get_stats(self):
+        with self.lock:
+            stats = self.stats.copy()
+            stats['series'] = len(self.series)
+            stats['bytes'] = sum(len(ring._values) * 12 for ring in self.series.values())
+            return stats
+class LatencyHistogram:
+    __slots__ = ('_counts', '_sub_bucket_bits', '_half_count', '_max_value', 'total_count', 'min_value', 'max_value', 'total')
+    
+    def __init__(self, max_value_us=60000000, significant_bits=7):
+        self._sub_bucket_bits = significant_bits
+        self._half_count = 1 << (significant_bits - 1)
+        self._max_value = max_value_us
+        self._counts = [0] * (self._bucket_index(max_value_us) + 1)
+        self.total_count = 0
+        self.min_value = None
+        self.max_value = 0
+        self.total = 0
+    
+    def _bucket_index(self, value):
+        if value < (self._half_count << 1):
+            return value
+        exponent = value.bit_length() - self._sub_bucket_bits
+        return exponent * self._half_count + (value >> exponent)
+    
+    def _highest_equivalent_value(self, index):
+        if index < (self._half_count << 1):
+            return index
+        exponent = index // self._half_count - 1
+        mantissa = index - exponent * self._half_count
+        return (mantissa << exponent) + (1 << exponent) - 1
+    
+    def record(self, value_us):
+        value = min(max(int(value_us), 0), self._max_value)
+        self._counts[self._bucket_index(value)] += 1
+        self.total_count += 1
+        self.total += value
+        if self.min_value is None or value < self.min_value:
+            self.min_value = value
+        if value > self.max_value:
+            self.max_value = value
+    
+    def percentile(self, percent):
+        if not self.total_count:
+            return 0
+        target = max(1, int(math.ceil(self.total_count * percent / 100.0)))
+        running = 0
+        for index, count in enumerate(self._counts):
+            if count:
+                running += count
+                if running >= target:
+                    return min(self._highest_equivalent_value(index), self.max_value)
+        return self.max_value
+    
+    def mean(self):
+        return self.total / self.total_count if self.total_count else 0.0
+    
+    def reset(self):
+        self._counts = [0] * len(self._counts)
+        self.total_count = 0
+        self.min_value = None
+        self.max_value = 0
+        self.total = 0
+    
+    def summary(self):
+        return {
+            'count': self.total_count,
+            'min_us': self.min_value or 0,
+            'mean_us': self.mean(),
+            'p50_us': self.percentile(50),
+            'p99_us': self.percentile(99),
+            'p999_us': self.percentile(99.9),
+            'max_us': self.max_value
+        }
+class ProcessorGroupLayout:
+    __slots__ = ('group_bits', 'group_offsets', 'cpu_locations', 'total')
+    
+    def __init__(self, group_active_masks):
+        self.group_bits = {}
+        self.group_offsets = {}
+        self.cpu_locations = []
+        
+        offset = 0
+        for group, active_mask in enumerate(group_active_masks):
+            bits = CoreSet.from_mask(active_mask).to_list()
+            self.group_bits[group] = bits
+            self.group_offsets[group] = offset
+            for bit in bits:
+                self.cpu_locations.append((group, bit))
+            offset += len(bits)
+        self.total = offset
+    
+    @classmethod
+    def uniform(cls, cpu_count, group_size=PROCESSOR_GROUP_SIZE):
+        masks = []
+        remaining = cpu_count
+        while remaining > 0:
+            count = min(group_size, remaining)
+            masks.append((1 << count) - 1)
+            remaining -= count
+        return cls(masks or [1])
+    
+    @classmethod
+    def from_group_sizes(cls, group_sizes):
+        return cls([(1 << count) - 1 for count in group_sizes])
+    
+    @property
+    def group_count(self):
+        return len(self.group_bits)
+    
+    def location(self, cpu):
+        return self.cpu_locations[cpu]
+    
+    def group_of(self, cpu):
+        return self.cpu_locations[cpu][0]
+    
+    def group_masks(self, core_set):
+        masks = {}
+        for cpu in core_set:
+            if cpu >= self.total:
+                continue
+            group, bit = self.cpu_locations[cpu]
+            masks[group] = masks.get(group, 0) | (1 << bit)
+        return masks
+    
+    def core_set_from_group_mask(self, group, mask):
+        offset = self.group_offsets.get(group)
+        if offset is None:
+            return CoreSet()
+        cores = []
+        for rank, bit in enumerate(self.group_bits[group]):
+            if mask >> bit & 1:
+                cores.append(offset + rank)
+        return CoreSet(cores)
+
+class CoreSet:
+    __slots__ = ('_mask', '_hash')
+    
+    _cache = {}
+    _layout = None
+    
+    def __init__(self, cores=()):
+        if isinstance(cores, CoreSet):
+            mask = cores._mask
+        else:
+            mask = 0
+            for core in cores:
+                if core < 0:
+                    raise ValueError(f"Invalid core index: {core}")
+                mask |= 1 << core
+        object.__setattr__(self, '_mask', mask)
+        object.__setattr__(self, '_hash', hash(mask))
+    
+    def __setattr__(self, name, value):
+        raise AttributeError("CoreSet is immutable")
+    
+    @classmethod
+    def from_mask(cls, mask):
+        core_set = cls.__new__(cls)
+        object.__setattr__(core_set, '_mask', int(mask))
+        object.__setattr__(core_set, '_hash', hash(int(mask)))
+        return core_set
+    
+    @classmethod
+    def set_group_layout(cls, layout):
+        cls._layout = layout
+    
+    @classmethod
+    def get_group_layout(cls):
+        return cls._layout
+    
+    @classmethod
+    def from_group_mask(cls, group, mask):
+        if cls._layout is not None:
+            return cls._layout.core_set_from_group_mask(group, int(mask))
+        return cls.from_mask(int(mask) << (group * PROCESSOR_GROUP_SIZE))
+    
+    @classmethod
+    def from_cores(cls, cores):
+        if isinstance(cores, CoreSet):
+            return cores
+        key = tuple(cores)
+        core_set = cls._cache.get(key)
+        if core_set is None:
+            core_set = cls(key)
+            if len(cls._cache) >= CORESET_CACHE_SIZE:
+                cls._cache.clear()
+            cls._cache[key] = core_set
+        return core_set
+    
+    @classmethod
+    def range(cls, count, start=0):
+        return cls.from_mask(((1 << count) - 1) << start)
+    
+    @property
+    def mask(self):
+        return self._mask
+    
+    def __int__(self):
+        return self._mask
+    
+    def __hash__(self):
+        return self._hash
+    
+    def __eq__(self, other):
+        if isinstance(other, CoreSet):
+            return self._mask == other._mask
+        return NotImplemented
+    
+    def __bool__(self):
+        return self._mask != 0
+    
+    def __len__(self):
+        return bin(self._mask).count('1')
+    
+    def __iter__(self):
+        mask = self._mask
+        while mask:
+            lowest = mask & -mask
+            yield lowest.bit_length() - 1
+            mask ^= lowest
+    
+    def __contains__(self, core):
+        return core >= 0 and bool(self._mask >> core & 1)
+    
+    def __and__(self, other):
+        return CoreSet.from_mask(self._mask & CoreSet.from_cores(other)._mask)
+    
+    def __or__(self, other):
+        return CoreSet.from_mask(self._mask | CoreSet.from_cores(other)._mask)
+    
+    def __sub__(self, other):
+        return CoreSet.from_mask(self._mask & ~CoreSet.from_cores(other)._mask)
+    
+    def __xor__(self, other):
+        return CoreSet.from_mask(self._mask ^ CoreSet.from_cores(other)._mask)
+    
+    intersection = __and__
+    union = __or__
+    difference = __sub__
+    
+    def isdisjoint(self, other):
+        return not (self._mask & CoreSet.from_cores(other)._mask)
+    
+    def issubset(self, other):
+        return not (self._mask & ~CoreSet.from_cores(other)._mask)
+    
+    def min(self):
+        if not self._mask:
+            raise ValueError("CoreSet is empty")
+        return (self._mask & -self._mask).bit_length() - 1
+    
+    def max(self):
+        if not self._mask:
+            raise ValueError("CoreSet is empty")
+        return self._mask.bit_length() - 1
+    
+    def to_list(self):
+        return list(self)
+    
+    def groups(self):
+        if CoreSet._layout is not None:
+            return CoreSet._layout.group_masks(self)
+        result = {}
+        mask = self._mask
+        group = 0
+        group_bits = (1 << PROCESSOR_GROUP_SIZE) - 1
+        while mask:
+            group_mask = mask & group_bits
+            if group_mask:
+                result[group] = group_mask
+            mask >>= PROCESSOR_GROUP_SIZE
+            group += 1
+        return result
+    
+    def group_mask(self, group):
+        if CoreSet._layout is not None:
+            return CoreSet._layout.group_masks(self).get(group, 0)
+        return (self._mask >> (group * PROCESSOR_GROUP_SIZE)) & ((1 << PROCESSOR_GROUP_SIZE) - 1)
+    
+    def is_single_group(self):
+        return len(self.groups()) <= 1
+    
+    def primary_group(self):
+        groups = self.groups()
+        if not groups:
+            return 0
+        return max(groups, key=lambda g: (bin(groups[g]).count('1'), -g))
+    
+    def affinity_mask(self, group=None):
+        if group is None:
+            group = self.primary_group()
+        return self.group_mask(group)
+    
+    def __repr__(self):
+        return f"CoreSet({self.to_list()})"
+class MigrationGovernor:
+    
+    def __init__(self, l3_groups=None, l3_size_mb=32.0, per_pid_interval_seconds=30.0,
+                 max_migrations_per_minute=12, ping_pong_window_seconds=300.0):
+        self.lock = threading.RLock()
+        self.l3_size_mb = l3_size_mb
+        self.per_pid_interval = per_pid_interval_seconds
+        self.max_migrations_per_minute = max_migrations_per_minute
+        self.ping_pong_window = ping_pong_window_seconds
+        self.l3_of = {}
+        self.placements = {}
+        self.history = defaultdict(lambda: deque(maxlen=8))
+        self.ping_pong_counts = defaultdict(int)
+        self.recent_migrations = deque()
+        self.stats = {
+            'evaluations': 0,
+            'approved': 0,
+            'migrations': 0,
+            'noop': 0,
+            'rejected_cost': 0,
+            'rejected_pid_rate': 0,
+            'rejected_global_rate': 0,
+            'ping_pongs': 0,
+            'benefit_approved': 0.0,
+            'cost_approved': 0.0
+        }
+        self.set_cache_groups(l3_groups or [])
+    
+    def set_cache_groups(self, l3_groups):
+        with self.lock:
+            self.l3_of = {}
+            for index, cores in enumerate(l3_groups):
+                for core in cores:
+                    self.l3_of.setdefault(core, index)
+    
+    def _expire(self, now):
+        while self.recent_migrations and now - self.recent_migrations[0] > 60.0:
+            self.recent_migrations.popleft()
+    
+    def _recent_ping_pongs(self, pid, now):
+        return sum(1 for moved_at, _, _, ping_pong in self.history.get(pid, ())
+                   if ping_pong and now - moved_at <= self.ping_pong_window)
+    
+    def _is_ping_pong(self, pid, target, now):
+        return any(source == target and now - moved_at <= self.ping_pong_window
+                   for moved_at, source, _, _ in self.history.get(pid, ()))
+    
+    def migration_cost(self, pid, target_cores, source_cores=None, working_set_mb=None, now=None):
+        with self.lock:
+            now = now or time.time()
+            placement = self.placements.get(pid)
+            if source_cores is None and placement is not None:
+                source_cores = placement['cores']
+            
+            residence = now - placement['since'] if placement is not None else MIGRATION_WARMUP_SECONDS
+            warmth = min(1.0, residence / MIGRATION_WARMUP_SECONDS)
+            
+            if working_set_mb is None:
+                cache_fraction = 0.5
+            else:
+                cache_fraction = min(1.0, working_set_mb / max(self.l3_size_mb, 1.0))
+            
+            shared_l3 = 0.0
+            if source_cores is not None:
+                source_l3 = {self.l3_of.get(core, -1) for core in source_cores}
+                target_l3 = {self.l3_of.get(core, -1) for core in target_cores}
+                if target_l3:
+                    shared_l3 = len(source_l3 & target_l3) / len(target_l3)
+            
+            cost = MIGRATION_BASE_COST + warmth * (
+                cache_fraction * MIGRATION_L3_REFILL_COST * (1.0 - shared_l3) + MIGRATION_TLB_REFILL_COST
+            )
+            return cost + MIGRATION_PING_PONG_PENALTY * self._recent_ping_pongs(pid, now)
+    
+    def evaluate(self, pid, target_cores, benefit, source_cores=None, working_set_mb=None):
+        with self.lock:
+            now = time.time()
+            self.stats['evaluations'] += 1
+            target = CoreSet.from_cores(target_cores)
+            placement = self.placements.get(pid)
+            
+            if placement is not None:
+                if placement['cores'] == target:
+                    self.stats['noop'] += 1
+                    return False
+                if now - placement['moved_at'] < self.per_pid_interval:
+                    self.stats['rejected_pid_rate'] += 1
+                    return False
+            
+            self._expire(now)
+            if len(self.recent_migrations) >= self.max_migrations_per_minute:
+                self.stats['rejected_global_rate'] += 1
+                return False
+            
+            cost = self.migration_cost(pid, target, source_cores, working_set_mb, now)
+            if benefit <= cost:
+                self.stats['rejected_cost'] += 1
+                return False
+            
+            self.stats['approved'] += 1
+            self.stats['benefit_approved'] += benefit
+            self.stats['cost_approved'] += cost
+            return True
+    
+    def observe(self, pid, cores):
+        with self.lock:
+            now = time.time()
+            self.placements[pid] = {'cores': CoreSet.from_cores(cores), 'since': now, 'moved_at': 0.0}
+    
+    def record(self, pid, target_cores, source_cores=None):
+        with self.lock:
+            now = time.time()
+            target = CoreSet.from_cores(target_cores)
+            placement = self.placements.get(pid)
+            if source_cores is not None:
+                source = CoreSet.from_cores(source_cores)
+            else:
+                source = placement['cores'] if placement is not None else None
+            
+            ping_pong = source is not None and self._is_ping_pong(pid, target, now)
+            if ping_pong:
+                self.ping_pong_counts[pid] += 1
+                self.stats['ping_pongs'] += 1
+            
+            self.history[pid].append((now, source, target, ping_pong))
+            self.placements[pid] = {'cores': target, 'since': now, 'moved_at': now}
+            self.recent_migrations.append(now)
+            self.stats['migrations'] += 1
+    
+    def get_cores(self, pid):
+        with self.lock:
+            placement = self.placements.get(pid)
+            return placement['cores'] if placement is not None else None
+    
+    def forget(self, pid):
+        with self.lock:
+            self.placements.pop(pid, None)
+            self.history.pop(pid, None)
+            self.ping_pong_counts.pop(pid, None)
+    
+    def get_stats(self):
+        with self.lock:
+            self._expire(time.time())
+            stats = self.stats.copy()
+            stats['migrations_last_minute'] = len(self.recent_migrations)
+            stats['tracked_pids'] = len(self.placements)
+            stats['top_ping_pong'] = sorted(self.ping_pong_counts.items(), key=lambda item: -item[1])[:5]
+            return stats
 class CTypesStructurePool:
     __slots__ = ('_pools', 'lock', 'max_pool_size')
     
@@ -141,26 +790,84 @@ class CTypesStructurePool:
             pool = self._pools[type_name]
             if len(pool) < self.max_pool_size:
                 pool.append(type(structure)())
-class SimpleBloomFilter:
-    __slots__ = ('_bit_array', '_size', '_hash_count')
-    
-    def __init__(self, expected_elements=100, false_positive_rate=0.01):
-        self._size = int(-(expected_elements * math.log(false_positive_rate)) / (math.log(2) ** 2))
-        self._hash_count = int((self._size / expected_elements) * math.log(2))
-        self._bit_array = [False] * self._size
-    
-    def _hashes(self, item):
-        h1 = hash(item)
-        h2 = (h1 >> 16) ^ (h1 << 16)
-        for i in range(self._hash_count):
-            yield (h1 + i * h2) % self._size
-    
-    def add(self, item):
-        for h in self._hashes(item):
-            self._bit_array[h] = True
-    
-    def contains(self, item):
-        return all(self._bit_array[h] for h in self._hashes(item))
+class MultiPatternMatcher:
+    __slots__ = ('patterns', '_goto', '_fail', '_output', '_use_automaton')
+    
+    LINEAR_SCAN_LIMIT = 32
+    
+    def __init__(self, patterns=()):
+        self.patterns = tuple(sorted({p for p in patterns if p}))
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [False]
+        self._use_automaton = len(self.patterns) > self.LINEAR_SCAN_LIMIT
+        if self._use_automaton:
+            self._build_automaton()
+    
+    def _build_automaton(self):
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        
+        for pattern in self.patterns:
+            state = 0
+            for ch in pattern:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto.append({})
+                    fail.append(0)
+                    output.append(False)
+                    goto[state][ch] = nxt
+                state = nxt
+            output[state] = True
+        
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0)
+                output[nxt] = output[nxt] or output[fail[nxt]]
+    
+    def search(self, text):
+        if not text or not self.patterns:
+            return False
+        
+        if not self._use_automaton:
+            for pattern in self.patterns:
+                if pattern in text:
+                    return True
+            return False
+        
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if output[state]:
+                return True
+        return False
+    
+    def __len__(self):
+        return len(self.patterns)
+class CompiledRuleMatcher:
+    __slots__ = ('exact_names', 'substrings')
+    
+    def __init__(self, exact_names=(), substrings=()):
+        self.exact_names = frozenset(n for n in exact_names if n)
+        self.substrings = MultiPatternMatcher(substrings)
+    
+    def matches(self, name, exe):
+        if name and name in self.exact_names:
+            return True
+        return self.substrings.search(exe)
 class RegistryWriteBuffer:
     __slots__ = ('buffer', 'lock', 'flush_interval', 'last_flush', 'max_buffer_size')
     
@@ -398,6 +1105,504 @@ class OptimizationDecisionCache:
                     del self.cache[key]
                 except KeyError:
                     pass
+class ProcessClassificationCache:
+    __slots__ = ('entries', 'generation', 'max_entries', 'lock', 'stats')
+    
+    def __init__(self, max_entries=4096):
+        self.entries = {}
+        self.generation = 0
+        self.max_entries = max_entries
+        self.lock = threading.RLock()
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'stale_pid_reuse': 0,
+            'invalidations': 0,
+            'evictions': 0
+        }
+    
+    def get(self, pid, create_time):
+        with self.lock:
+            entry = self.entries.get(pid)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            
+            if entry['create_time'] != create_time or entry['generation'] != self.generation:
+                if entry['create_time'] != create_time:
+                    self.stats['stale_pid_reuse'] += 1
+                del self.entries[pid]
+                self.stats['misses'] += 1
+                return None
+            
+            self.stats['hits'] += 1
+            return entry
+    
+    def set(self, pid, create_time, info):
+        with self.lock:
+            if not isinstance(pid, int) or pid <= 0:
+                return None
+            
+            entry = dict(info)
+            entry['create_time'] = create_time
+            entry['generation'] = self.generation
+            self.entries[pid] = entry
+            
+            if len(self.entries) > self.max_entries:
+                for old_pid in list(self.entries.keys())[:self.max_entries // 2]:
+                    del self.entries[old_pid]
+                    self.stats['evictions'] += 1
+            
+            return entry
+    
+    def remove(self, pid):
+        with self.lock:
+            self.entries.pop(pid, None)
+    
+    def invalidate_all(self):
+        with self.lock:
+            self.generation += 1
+            self.entries.clear()
+            self.stats['invalidations'] += 1
+    
+    def get_stats(self):
+        with self.lock:
+            stats = self.stats.copy()
+            lookups = stats['hits'] + stats['misses']
+            stats['hit_rate'] = stats['hits'] / lookups if lookups > 0 else 0.0
+            stats['entries'] = len(self.entries)
+            return stats
+class ProcessView:
+    __slots__ = ('pid', 'process', '_values', 'fetches', 'reuses')
+    
+    def __init__(self, pid, attrs=None):
+        self.pid = pid
+        self.process = psutil.Process(pid)
+        self._values = {}
+        self.fetches = 0
+        self.reuses = 0
+        if attrs:
+            self.prefetch(attrs)
+    
+    def prefetch(self, attrs):
+        missing = [attr for attr in attrs if attr not in self._values]
+        if not missing:
+            return
+        
+        self._values.update(self.process.as_dict(attrs=missing, ad_value=None))
+        self.fetches += len(missing)
+    
+    def get(self, attr):
+        if attr in self._values:
+            self.reuses += 1
+            return self._values[attr]
+        
+        value = getattr(self.process, attr)()
+        self._values[attr] = value
+        self.fetches += 1
+        return value
+    
+    def name(self):
+        return self.get('name')
+    
+    def exe(self):
+        return self.get('exe')
+    
+    def num_threads(self):
+        return self.get('num_threads')
+    
+    def memory_info(self):
+        return self.get('memory_info')
+    
+    def cpu_times(self):
+        return self.get('cpu_times')
+    
+    def create_time(self):
+        return self.get('create_time')
+    
+    def io_counters(self):
+        return self.get('io_counters')
+    
+    def memory_mb(self):
+        info = self.memory_info()
+        return info.rss / (1024 * 1024) if info else 0.0
+class BorrowedProcessHandle:
+    __slots__ = ('cache', 'pid', 'access', 'entry', 'handle')
+    
+    def __init__(self, cache, pid, access):
+        self.cache = cache
+        self.pid = pid
+        self.access = access
+        self.entry = None
+        self.handle = None
+    
+    def __enter__(self):
+        self.entry = self.cache._acquire(self.pid, self.access)
+        self.handle = self.entry['handle'] if self.entry is not None else None
+        return self.handle
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.entry is not None:
+            self.cache._release(self.entry)
+            self.entry = None
+        return False
+
+class ProcessHandleCache:
+    
+    def __init__(self, max_cache_size=256, handle_ttl_seconds=30.0):
+        self.lock = threading.RLock()
+        self.max_cache_size = max_cache_size
+        self.handle_ttl = handle_ttl_seconds
+        self.cache = OrderedDict()
+        self.retired = []
+        self.started_at = time.time()
+        self.stats = {
+            'requests': 0,
+            'opens': 0,
+            'hits': 0,
+            'misses': 0,
+            'escalations': 0,
+            'evictions': 0,
+            'expired': 0,
+            'exited': 0,
+            'open_failures': 0,
+            'borrows': 0
+        }
+    
+    def _open(self, pid, access):
+        try:
+            handle = win32api.OpenProcess(access | SYNCHRONIZE, False, pid)
+        except Exception as e:
+            logger.debug(f"OpenProcess failed for pid {pid}: {e}")
+            handle = None
+        
+        if not handle:
+            self.stats['open_failures'] += 1
+            return None
+        self.stats['opens'] += 1
+        return handle
+    
+    def _close(self, entry):
+        try:
+            win32api.CloseHandle(entry['handle'])
+        except Exception:
+            pass
+    
+    def _is_process_alive(self, handle):
+        try:
+            return kernel32.WaitForSingleObject(int(handle), 0) != WAIT_OBJECT_0
+        except Exception:
+            return True
+    
+    def _retire(self, pid):
+        entry = self.cache.pop(pid, None)
+        if entry is None:
+            return
+        if entry['borrowers'] > 0:
+            entry['retired'] = True
+            self.retired.append(entry)
+        else:
+            self._close(entry)
+    
+    def _store(self, pid, handle, access, now):
+        while len(self.cache) >= self.max_cache_size:
+            oldest_pid = next(iter(self.cache))
+            self._retire(oldest_pid)
+            self.stats['evictions'] += 1
+        
+        entry = {'handle': handle, 'access': access, 'opened_at': now, 'borrowers': 0, 'retired': False}
+        self.cache[pid] = entry
+        return entry
+    
+    def _lookup(self, pid, access):
+        self.stats['requests'] += 1
+        now = time.time()
+        entry = self.cache.get(pid)
+        
+        if entry is not None:
+            if now - entry['opened_at'] > self.handle_ttl:
+                self.stats['expired'] += 1
+                self._retire(pid)
+                entry = None
+            elif not self._is_process_alive(entry['handle']):
+                self.stats['exited'] += 1
+                self._retire(pid)
+                return None
+        
+        if entry is not None:
+            if (entry['access'] & access) == access:
+                self.stats['hits'] += 1
+                self.cache.move_to_end(pid)
+                return entry
+            
+            combined_access = entry['access'] | access
+            handle = self._open(pid, combined_access)
+            if not handle:
+                return None
+            self.stats['escalations'] += 1
+            self._retire(pid)
+            return self._store(pid, handle, combined_access, now)
+        
+        self.stats['misses'] += 1
+        handle = self._open(pid, access)
+        if not handle:
+            return None
+        return self._store(pid, handle, access, now)
+    
+    def borrow(self, pid, access):
+        return BorrowedProcessHandle(self, pid, access)
+    
+    def _acquire(self, pid, access):
+        with self.lock:
+            entry = self._lookup(pid, access)
+            if entry is not None:
+                entry['borrowers'] += 1
+                self.stats['borrows'] += 1
+            return entry
+    
+    def _release(self, entry):
+        with self.lock:
+            entry['borrowers'] -= 1
+            if entry['retired'] and entry['borrowers'] <= 0:
+                self._close(entry)
+                if entry in self.retired:
+                    self.retired.remove(entry)
+    
+    def invalidate(self, pid):
+        with self.lock:
+            self._retire(pid)
+    
+    def cleanup_stale_handles(self):
+        with self.lock:
+            now = time.time()
+            removed = 0
+            for pid, entry in list(self.cache.items()):
+                if now - entry['opened_at'] > self.handle_ttl:
+                    self.stats['expired'] += 1
+                elif not self._is_process_alive(entry['handle']):
+                    self.stats['exited'] += 1
+                else:
+                    continue
+                self._retire(pid)
+                removed += 1
+            return removed
+    
+    def close_all(self):
+        with self.lock:
+            for pid in list(self.cache.keys()):
+                self._retire(pid)
+            for entry in self.retired:
+                self._close(entry)
+            self.retired = []
+    
+    def get_open_rate_report(self):
+        with self.lock:
+            elapsed = max(time.time() - self.started_at, 1e-6)
+            requests = self.stats['requests']
+            opens = self.stats['opens']
+            return {
+                'elapsed_seconds': elapsed,
+                'uncached_opens_per_second': requests / elapsed,
+                'cached_opens_per_second': opens / elapsed,
+                'opens_avoided': max(requests - opens, 0),
+                'open_reduction': 1.0 - (opens / requests) if requests else 0.0
+            }
+    
+    def get_stats(self):
+        with self.lock:
+            stats = self.stats.copy()
+            stats['cached_handles'] = len(self.cache)
+            stats['borrowed_retired_handles'] = len(self.retired)
+            stats.update(self.get_open_rate_report())
+            return stats
+
+class BorrowedThreadHandle:
+    __slots__ = ('cache', 'tid', 'access', 'pid', 'entry', 'handle')
+    
+    def __init__(self, cache, tid, access, pid=None):
+        self.cache = cache
+        self.tid = tid
+        self.access = access
+        self.pid = pid
+        self.entry = None
+        self.handle = None
+    
+    def __enter__(self):
+        self.entry = self.cache._acquire(self.tid, self.access, self.pid)
+        self.handle = self.entry['handle'] if self.entry is not None else None
+        return self.handle
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.entry is not None:
+            self.cache._release(self.entry)
+            self.entry = None
+        return False
+
+class ThreadHandleCache:
+    
+    def __init__(self, max_cache_size=1024, handle_ttl_seconds=30.0):
+        self.lock = threading.RLock()
+        self.max_cache_size = max_cache_size
+        self.handle_ttl = handle_ttl_seconds
+        self.cache = OrderedDict()
+        self.retired = []
+        self.tids_by_pid = defaultdict(set)
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'upgrades': 0,
+            'evictions': 0,
+            'expired': 0,
+            'exited': 0,
+            'open_failures': 0,
+            'borrows': 0
+        }
+    
+    def _open(self, tid, access):
+        handle = kernel32.OpenThread(access | SYNCHRONIZE, False, tid)
+        if not handle:
+            self.stats['open_failures'] += 1
+            return None
+        return handle
+    
+    def _is_thread_alive(self, handle):
+        return kernel32.WaitForSingleObject(handle, 0) != WAIT_OBJECT_0
+    
+    def _close(self, entry):
+        try:
+            kernel32.CloseHandle(entry['handle'])
+        except Exception:
+            pass
+    
+    def _remove(self, tid):
+        entry = self.cache.pop(tid, None)
+        if entry is None:
+            return
+        pid_tids = self.tids_by_pid.get(entry['pid'])
+        if pid_tids is not None:
+            pid_tids.discard(tid)
+            if not pid_tids:
+                del self.tids_by_pid[entry['pid']]
+        if entry['borrowers'] > 0:
+            entry['retired'] = True
+            self.retired.append(entry)
+        else:
+            self._close(entry)
+    
+    def _lookup(self, tid, access, pid):
+        now = time.time()
+        entry = self.cache.get(tid)
+        
+        if entry is not None:
+            if now - entry['opened_at'] > self.handle_ttl:
+                self.stats['expired'] += 1
+                self._remove(tid)
+                entry = None
+            elif not self._is_thread_alive(entry['handle']):
+                self.stats['exited'] += 1
+                self._remove(tid)
+                return None
+        
+        if entry is not None:
+            if (entry['access'] & access) == access:
+                self.stats['hits'] += 1
+                self.cache.move_to_end(tid)
+                return entry
+            
+            combined_access = entry['access'] | access
+            handle = self._open(tid, combined_access)
+            if not handle:
+                return None
+            self.stats['upgrades'] += 1
+            owner = entry['pid'] if pid is None else pid
+            self._remove(tid)
+            return self._store(tid, handle, combined_access, owner, now)
+        
+        self.stats['misses'] += 1
+        handle = self._open(tid, access)
+        if not handle:
+            return None
+        return self._store(tid, handle, access, pid, now)
+    
+    def borrow(self, tid, access, pid=None):
+        return BorrowedThreadHandle(self, tid, access, pid)
+    
+    def _acquire(self, tid, access, pid=None):
+        with self.lock:
+            entry = self._lookup(tid, access, pid)
+            if entry is not None:
+                entry['borrowers'] += 1
+                self.stats['borrows'] += 1
+            return entry
+    
+    def _release(self, entry):
+        with self.lock:
+            entry['borrowers'] -= 1
+            if entry['retired'] and entry['borrowers'] <= 0:
+                self._close(entry)
+                if entry in self.retired:
+                    self.retired.remove(entry)
+    
+    def _store(self, tid, handle, access, pid, now):
+        while len(self.cache) >= self.max_cache_size:
+            oldest_tid = next(iter(self.cache))
+            self._remove(oldest_tid)
+            self.stats['evictions'] += 1
+        
+        entry = {'handle': handle, 'access': access, 'pid': pid, 'opened_at': now, 'borrowers': 0, 'retired': False}
+        self.cache[tid] = entry
+        self.tids_by_pid[pid].add(tid)
+        return entry
+    
+    def invalidate_thread(self, tid):
+        with self.lock:
+            self._remove(tid)
+    
+    def invalidate_pid(self, pid):
+        with self.lock:
+            for tid in list(self.tids_by_pid.get(pid, ())):
+                self._remove(tid)
+    
+    def retain_threads(self, pid, live_tids):
+        with self.lock:
+            live = set(live_tids)
+            for tid in list(self.tids_by_pid.get(pid, ())):
+                if tid not in live:
+                    self._remove(tid)
+                    self.stats['exited'] += 1
+    
+    def cleanup_stale_handles(self):
+        with self.lock:
+            now = time.time()
+            removed = 0
+            for tid, entry in list(self.cache.items()):
+                if now - entry['opened_at'] > self.handle_ttl:
+                    self.stats['expired'] += 1
+                elif not self._is_thread_alive(entry['handle']):
+                    self.stats['exited'] += 1
+                else:
+                    continue
+                self._remove(tid)
+                removed += 1
+            return removed
+    
+    def close_all(self):
+        with self.lock:
+            for tid in list(self.cache.keys()):
+                self._remove(tid)
+            for entry in self.retired:
+                self._close(entry)
+            self.retired = []
+    
+    def get_stats(self):
+        with self.lock:
+            stats = self.stats.copy()
+            stats['cached_handles'] = len(self.cache)
+            stats['borrowed_retired_handles'] = len(self.retired)
+            total = stats['hits'] + stats['misses']
+            stats['hit_rate'] = stats['hits'] / total if total else 0.0
+            return stats
+
 class IntegrityValidator:
     __slots__ = ('handle_cache', 'lock', 'validation_history', 'batch_queue')
     
@@ -410,37 +1615,37 @@ class IntegrityValidator:
     def validate_priority(self, pid, expected_priority):
         with self.lock:
             try:
-                handle = self.handle_cache.get_handle(pid, PROCESS_QUERY_INFORMATION)
-                if handle:
-                    actual_priority = win32process.GetPriorityClass(handle)
-                    result = actual_priority == expected_priority
-                    self.validation_history[pid].append({
-                        'type': 'priority',
-                        'expected': expected_priority,
-                        'actual': actual_priority,
-                        'success': result,
-                        'timestamp': time.time()
-                    })
-                    return result
+                with self.handle_cache.borrow(pid, PROCESS_QUERY_INFORMATION) as handle:
+                    if handle:
+                        actual_priority = win32process.GetPriorityClass(handle)
+                        result = actual_priority == expected_priority
+                        self.validation_history[pid].append({
+                            'type': 'priority',
+                            'expected': expected_priority,
+                            'actual': actual_priority,
+                            'success': result,
+                            'timestamp': time.time()
+                        })
+                        return result
             except Exception:
                 return False
     
     def validate_affinity(self, pid, expected_cores):
         with self.lock:
             try:
-                handle = self.handle_cache.get_handle(pid, PROCESS_QUERY_INFORMATION)
-                if handle:
-                    actual_cores = get_process_affinity_direct(handle)
-                    if actual_cores:
-                        result = set(actual_cores) == set(expected_cores)
-                        self.validation_history[pid].append({
-                            'type': 'affinity',
-                            'expected': expected_cores,
-                            'actual': actual_cores,
-                            'success': result,
-                            'timestamp': time.time()
-                        })
-                        return result
+                with self.handle_cache.borrow(pid, PROCESS_QUERY_INFORMATION) as handle:
+                    if handle:
+                        actual_cores = get_process_affinity_direct(handle)
+                        if actual_cores:
+                            result = set(actual_cores) == set(expected_cores)
+                            self.validation_history[pid].append({
+                                'type': 'affinity',
+                                'expected': expected_cores,
+                                'actual': actual_cores,
+                                'success': result,
+                                'timestamp': time.time()
+                            })
+                            return result
             except Exception:
                 return False
     
@@ -475,3 +1680,489 @@ class IntegrityValidator:
             
             self.batch_queue.clear()
             return results
+class ProcessLifecycleEventSource:
+    
+    def __init__(self, reconcile_interval_ms=5000, notification_timeout_ms=500):
+        self.lock = threading.RLock()
+        self.reconcile_interval = reconcile_interval_ms / 1000.0
+        self.notification_timeout_ms = notification_timeout_ms
+        self.known_pids = {}
+        self.pending_created = set()
+        self.pending_exited = set()
+        self.retry_pids = {}
+        self.last_fork_count = None
+        self.last_reconcile = 0
+        self.primed = False
+        self.active = True
+        self.notification_thread = None
+        self.stats = {
+            'created_events': 0,
+            'exited_events': 0,
+            'notifications_received': 0,
+            'reconcile_scans': 0,
+            'reconcile_skipped': 0,
+            'missed_by_notifications': 0,
+            'pid_reuse_detected': 0,
+            'retries_scheduled': 0,
+            'retries_abandoned': 0
+        }
+        self.backend = self._select_backend()
+        if self.backend == 'wmi':
+            self._start_notification_thread()
+    
+    def _select_backend(self):
+        if platform.system() == 'Windows':
+            return 'wmi'
+        if os.path.isdir('/proc'):
+            return 'proc'
+        return 'poll'
+    
+    def _start_notification_thread(self):
+        try:
+            self.notification_thread = threading.Thread(
+                target=self._notification_worker, daemon=True, name="ProcessLifecycleThread"
+            )
+            self.notification_thread.start()
+        except Exception as e:
+            logger.debug(f"Could not start process notification thread, falling back to polling: {e}")
+            self.backend = 'poll'
+    
+    def _notification_worker(self):
+        try:
+            import pythoncom
+            import win32com.client
+            
+            pythoncom.CoInitialize()
+            wmi = win32com.client.GetObject("winmgmts:{impersonationLevel=impersonate}!\\\\.\\root\\cimv2")
+            watcher = wmi.ExecNotificationQuery(PROCESS_TRACE_QUERY)
+        except Exception as e:
+            logger.debug(f"Process trace notifications unavailable, falling back to polling: {e}")
+            with self.lock:
+                self.backend = 'poll'
+            return
+        
+        while self.active:
+            try:
+                event = watcher.NextEvent(self.notification_timeout_ms)
+            except Exception:
+                continue
+            
+            try:
+                pid = int(event.ProcessID)
+                event_class = event.Path_.Class
+            except Exception:
+                continue
+            
+            create_time = None
+            if event_class == 'Win32_ProcessStartTrace':
+                try:
+                    create_time = int(event.TIME_CREATED) / 10000000.0 - 11644473600.0
+                except Exception:
+                    create_time = self._create_time(pid)
+            
+            with self.lock:
+                self.stats['notifications_received'] += 1
+                if event_class == 'Win32_ProcessStartTrace':
+                    self._record_created(pid, create_time)
+                elif event_class == 'Win32_ProcessStopTrace':
+                    self._record_exited(pid)
+    
+    def _create_time(self, pid):
+        try:
+            return psutil.Process(pid).create_time()
+        except Exception:
+            return None
+    
+    def _record_created(self, pid, create_time=None):
+        if pid <= 0:
+            return
+        if pid in self.known_pids:
+            known_time = self.known_pids[pid]
+            if known_time is None or create_time is None or abs(known_time - create_time) < 0.01:
+                if known_time is None:
+                    self.known_pids[pid] = create_time
+                return
+            self.stats['pid_reuse_detected'] += 1
+            self._record_exited(pid)
+        self.known_pids[pid] = create_time
+        self.pending_created.add(pid)
+    
+    def _record_exited(self, pid):
+        self.pending_created.discard(pid)
+        self.retry_pids.pop(pid, None)
+        if pid in self.known_pids:
+            del self.known_pids[pid]
+            self.pending_exited.add(pid)
+    
+    def retry_later(self, pid, max_attempts=5):
+        with self.lock:
+            if pid not in self.known_pids:
+                return False
+            _, attempts = self.retry_pids.get(pid, (0, 0))
+            if attempts >= max_attempts:
+                self.retry_pids.pop(pid, None)
+                self.stats['retries_abandoned'] += 1
+                return False
+            self.retry_pids[pid] = (time.time() + 2 ** attempts, attempts + 1)
+            self.stats['retries_scheduled'] += 1
+            return True
+    
+    def _due_retries(self, now):
+        for pid, (due_at, attempts) in list(self.retry_pids.items()):
+            if due_at <= now:
+                self.retry_pids[pid] = (float('inf'), attempts)
+                self.pending_created.add(pid)
+    
+    def _read_fork_count(self):
+        try:
+            with open('/proc/stat', 'r') as f:
+                for line in f:
+                    if line.startswith('processes '):
+                        return int(line.split()[1])
+        except (OSError, ValueError):
+            pass
+        return None
+    
+    def _enumerate_pids(self):
+        if self.backend == 'proc':
+            try:
+                return {int(entry) for entry in os.listdir('/proc') if entry.isdigit()}
+            except OSError as e:
+                logger.debug(f"Could not list /proc, falling back to psutil: {e}")
+        return set(psutil.pids())
+    
+    def _reconcile(self):
+        current_pids = self._enumerate_pids()
+        current_pids.discard(0)
+        
+        known = set(self.known_pids)
+        created = current_pids - known
+        exited = known - current_pids
+        
+        if self.primed and self.backend == 'wmi':
+            self.stats['missed_by_notifications'] += len(created) + len(exited)
+        
+        for pid in exited:
+            self._record_exited(pid)
+        for pid in created:
+            self._record_created(pid, self._create_time(pid) if self.primed else None)
+        
+        self.last_reconcile = time.time()
+        self.stats['reconcile_scans'] += 1
+    
+    def poll(self):
+        with self.lock:
+            try:
+                current_time = time.time()
+                
+                reconcile_due = current_time - self.last_reconcile >= self.reconcile_interval
+                if not self.primed:
+                    self.last_fork_count = self._read_fork_count() if self.backend == 'proc' else None
+                    self._reconcile()
+                    self.primed = True
+                elif self.backend == 'proc':
+                    fork_count = self._read_fork_count()
+                    if fork_count is None or fork_count != self.last_fork_count or reconcile_due:
+                        self.last_fork_count = fork_count
+                        self._reconcile()
+                    else:
+                        self.stats['reconcile_skipped'] += 1
+                elif self.backend != 'wmi' or reconcile_due:
+                    self._reconcile()
+            except Exception as e:
+                logger.debug(f"Process lifecycle reconcile failed: {e}")
+            
+            self._due_retries(current_time)
+            
+            created = list(self.pending_created)
+            exited = list(self.pending_exited)
+            self.pending_created.clear()
+            self.pending_exited.clear()
+            
+            self.stats['created_events'] += len(created)
+            self.stats['exited_events'] += len(exited)
+            
+            return created, exited
+    
+    def is_known(self, pid):
+        with self.lock:
+            return pid in self.known_pids
+    
+    def stop(self):
+        self.active = False
+    
+    def get_stats(self):
+        with self.lock:
+            stats = self.stats.copy()
+            stats['backend'] = self.backend
+            stats['tracked_pids'] = len(self.known_pids)
+            stats['pending_retries'] = sum(1 for due_at, _ in self.retry_pids.values() if due_at != float('inf'))
+            return stats
+class ProcessApplyExecutor:
+    
+    FOREGROUND_PRIORITY = 0
+    BACKGROUND_PRIORITY = 1
+    
+    def __init__(self, apply_fn, max_workers=4, max_pending=1024, name="ProcessApplyWorker", thread_priority=None):
+        self.apply_fn = apply_fn
+        self.thread_priority = thread_priority
+        self.max_workers = max(1, max_workers)
+        self.max_pending = max_pending
+        self.condition = threading.Condition(threading.RLock())
+        self.queue = []
+        self.pending = {}
+        self.in_flight = set()
+        self.sequence = itertools.count()
+        self.latency_samples = deque(maxlen=1024)
+        self.execution_samples = deque(maxlen=1024)
+        self.active = True
+        self.stats = {
+            'submitted': 0,
+            'coalesced': 0,
+            'promoted_to_foreground': 0,
+            'dropped': 0,
+            'applied': 0,
+            'failed': 0,
+            'max_queue_depth': 0
+        }
+        
+        self.workers = []
+        for i in range(self.max_workers):
+            worker = threading.Thread(target=self._worker_loop, daemon=True, name=f"{name}-{i}")
+            worker.start()
+            self.workers.append(worker)
+    
+    def _enqueue(self, pid, request):
+        priority = self.FOREGROUND_PRIORITY if request['is_foreground'] else self.BACKGROUND_PRIORITY
+        heapq.heappush(self.queue, (priority, request['seq'], pid))
+    
+    def submit(self, pid, is_foreground):
+        with self.condition:
+            if not self.active:
+                return False
+            
+            self.stats['submitted'] += 1
+            existing = self.pending.get(pid)
+            
+            if existing is not None:
+                self.stats['coalesced'] += 1
+                if existing['is_foreground'] == is_foreground:
+                    return True
+                
+                if is_foreground:
+                    self.stats['promoted_to_foreground'] += 1
+                existing['is_foreground'] = is_foreground
+                existing['seq'] = next(self.sequence)
+                if pid not in self.in_flight:
+                    self._enqueue(pid, existing)
+                    self.condition.notify()
+                return True
+            
+            if len(self.pending) >= self.max_pending and not is_foreground:
+                self.stats['dropped'] += 1
+                return False
+            
+            request = {
+                'is_foreground': is_foreground,
+                'enqueued_at': time.perf_counter(),
+                'seq': next(self.sequence)
+            }
+            self.pending[pid] = request
+            
+            if pid not in self.in_flight:
+                self._enqueue(pid, request)
+                self.condition.notify()
+            
+            self.stats['max_queue_depth'] = max(self.stats['max_queue_depth'], len(self.pending))
+            return True
+    
+    def _next_request(self):
+        while self.queue:
+            priority, seq, pid = heapq.heappop(self.queue)
+            request = self.pending.get(pid)
+            if request is None or request['seq'] != seq or pid in self.in_flight:
+                continue
+            
+            del self.pending[pid]
+            self.in_flight.add(pid)
+            return pid, request
+        return None, None
+    
+    def _worker_loop(self):
+        if self.thread_priority is not None:
+            try:
+                win32api.SetThreadPriority(win32api.GetCurrentThread(), self.thread_priority)
+            except Exception as e:
+                logger.debug(f"Could not set worker thread priority: {e}")
+        
+        while True:
+            with self.condition:
+                pid, request = self._next_request()
+                while pid is None:
+                    if not self.active:
+                        return
+                    self.condition.wait(timeout=1.0)
+                    pid, request = self._next_request()
+            
+            start_time = time.perf_counter()
+            success = True
+            try:
+                self.apply_fn(pid, request['is_foreground'])
+            except Exception as e:
+                success = False
+                logger.debug(f"Deferred apply failed for pid {pid}: {e}")
+            end_time = time.perf_counter()
+            
+            with self.condition:
+                self.in_flight.discard(pid)
+                self.latency_samples.append((end_time - request['enqueued_at']) * 1000)
+                self.execution_samples.append((end_time - start_time) * 1000)
+                self.stats['applied' if success else 'failed'] += 1
+                
+                follow_up = self.pending.get(pid)
+                if follow_up is not None:
+                    self._enqueue(pid, follow_up)
+                    self.condition.notify()
+    
+    def cancel(self, pid):
+        with self.condition:
+            return self.pending.pop(pid, None) is not None
+    
+    def stop(self):
+        with self.condition:
+            self.active = False
+            self.pending.clear()
+            self.queue.clear()
+            self.condition.notify_all()
+    
+    def _percentile(self, samples, percent):
+        if not samples:
+            return 0.0
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, int(len(ordered) * percent / 100.0))
+        return ordered[index]
+    
+    def get_stats(self):
+        with self.condition:
+            stats = self.stats.copy()
+            stats['queue_depth'] = len(self.pending)
+            stats['in_flight'] = len(self.in_flight)
+            stats['apply_latency_p50_ms'] = self._percentile(self.latency_samples, 50)
+            stats['apply_latency_p99_ms'] = self._percentile(self.latency_samples, 99)
+            stats['execution_p50_ms'] = self._percentile(self.execution_samples, 50)
+            stats['execution_p99_ms'] = self._percentile(self.execution_samples, 99)
+            return stats
+class ForegroundSwitchSpan:
+    __slots__ = ('pid', 'started', 'last_mark', 'deadline', 'stages', 'skipped')
+    
+    def __init__(self, pid, started, budget_s):
+        self.pid = pid
+        self.started = started
+        self.last_mark = started
+        self.deadline = started + budget_s
+        self.stages = {}
+        self.skipped = []
+
+class ForegroundLatencyTracker:
+    
+    STAGES = ('debounce', 'queue', 'group_expansion', 'job_assign', 'per_pid_apply', 'end_to_end')
+    
+    def __init__(self, budget_ms=50, span_timeout_seconds=10.0):
+        self.lock = threading.RLock()
+        self.budget_s = budget_ms / 1000.0
+        self.span_timeout = span_timeout_seconds
+        self.active_spans = {}
+        self.histograms = {stage: LatencyHistogram() for stage in self.STAGES}
+        self.stats = {
+            'switches_started': 0,
+            'switches_completed': 0,
+            'switches_abandoned': 0,
+            'over_budget': 0,
+            'optional_stages_skipped': 0
+        }
+    
+    def set_budget_ms(self, budget_ms):
+        try:
+            budget_ms = float(budget_ms)
+        except (TypeError, ValueError):
+            return False
+        if budget_ms <= 0:
+            return False
+        with self.lock:
+            self.budget_s = budget_ms / 1000.0
+        return True
+    
+    def begin(self, pid):
+        now = time.perf_counter()
+        with self.lock:
+            if pid in self.active_spans:
+                self.stats['switches_abandoned'] += 1
+            
+            expired = [p for p, span in self.active_spans.items() if now - span.started > self.span_timeout]
+            for p in expired:
+                del self.active_spans[p]
+                self.stats['switches_abandoned'] += 1
+            
+            span = ForegroundSwitchSpan(pid, now, self.budget_s)
+            self.active_spans[pid] = span
+            self.stats['switches_started'] += 1
+            return span
+    
+    def start_budget(self, pid):
+        return ForegroundSwitchSpan(pid, time.perf_counter(), self.budget_s)
+    
+    def arm_deadline(self, span):
+        if span is None:
+            return
+        with self.lock:
+            span.deadline = time.perf_counter() + self.budget_s
+    
+    def get_span(self, pid):
+        with self.lock:
+            return self.active_spans.get(pid)
+    
+    def mark(self, span, stage):
+        if span is None:
+            return
+        now = time.perf_counter()
+        elapsed = now - span.last_mark
+        span.last_mark = now
+        span.stages[stage] = span.stages.get(stage, 0.0) + elapsed
+        with self.lock:
+            self.histograms[stage].record(elapsed * 1000000)
+    
+    def is_over_budget(self, span):
+        return span is not None and time.perf_counter() > span.deadline
+    
+    def should_run_optional(self, span, stage):
+        if not self.is_over_budget(span):
+            return True
+        span.skipped.append(stage)
+        with self.lock:
+            self.stats['optional_stages_skipped'] += 1
+        return False
+    
+    def finish(self, span):
+        if span is None:
+            return
+        now = time.perf_counter()
+        with self.lock:
+            if self.active_spans.get(span.pid) is span:
+                del self.active_spans[span.pid]
+            self.histograms['end_to_end'].record((now - span.started) * 1000000)
+            self.stats['switches_completed'] += 1
+            if now > span.deadline:
+                self.stats['over_budget'] += 1
+    
+    def discard(self, pid):
+        with self.lock:
+            if self.active_spans.pop(pid, None) is not None:
+                self.stats['switches_abandoned'] += 1
+    
+    def get_stats(self):
+        with self.lock:
+            stats = self.stats.copy()
+            stats['budget_ms'] = self.budget_s * 1000
+            stats['active_spans'] = len(self.active_spans)
+            stats['stages'] = {stage: hist.summary() for stage, hist in self.histograms.items()}
+            return stats
@@ -18,6 +18,7 @@ IOCTL_STORAGE_QUERY_PROPERTY = 0x002D1400
 PROCESS_SET_INFORMATION = 0x0200
 PROCESS_QUERY_INFORMATION = 0x0400
 PROCESS_SET_QUOTA = 0x0100
+THREAD_SET_INFORMATION = 0x0020
 PROCESS_POWER_THROTTLING_EXECUTION_SPEED = 0x1
 ProcessPowerThrottling = 77
 ntdll = ctypes.WinDLL('ntdll')
@@ -346,10 +347,10 @@ class IOPriorityInheritance:
     def inherit_io_priority(self, pid, priority):
         with self.lock:
             try:
-                handle = self.handle_cache.get_handle(pid, PROCESS_SET_INFORMATION)
-                if handle:
-                    self.io_priorities[pid] = priority
-                    return True
+                with self.handle_cache.borrow(pid, PROCESS_SET_INFORMATION) as handle:
+                    if handle:
+                        self.io_priorities[pid] = priority
+                        return True
             except Exception as e:
                 logger.error(f"Failed to inherit I/O priority for pid {pid}: {e}")
             return False
@@ -357,22 +358,23 @@ class IOPriorityInheritance:
     def throttle_background_io(self, pid):
         with self.lock:
             try:
-                handle = self.handle_cache.get_handle(pid, PROCESS_SET_INFORMATION)
-                if handle:
-                    throttle = PROCESS_POWER_THROTTLING_STATE()
-                    throttle.Version = 1
-                    throttle.ControlMask = PROCESS_POWER_THROTTLING_EXECUTION_SPEED
-                    throttle.StateMask = PROCESS_POWER_THROTTLING_EXECUTION_SPEED
-                    ntdll.NtSetInformationProcess(handle, ProcessPowerThrottling, ctypes.byref(throttle), ctypes.sizeof(throttle))
-                    return True
+                with self.handle_cache.borrow(pid, PROCESS_SET_INFORMATION) as handle:
+                    if handle:
+                        throttle = PROCESS_POWER_THROTTLING_STATE()
+                        throttle.Version = 1
+                        throttle.ControlMask = PROCESS_POWER_THROTTLING_EXECUTION_SPEED
+                        throttle.StateMask = PROCESS_POWER_THROTTLING_EXECUTION_SPEED
+                        ntdll.NtSetInformationProcess(handle, ProcessPowerThrottling, ctypes.byref(throttle), ctypes.sizeof(throttle))
+                        return True
             except Exception as e:
                 logger.error(f"Failed to throttle background I/O for pid {pid}: {e}")
             return False
 class AdaptiveIOScheduler:
     
-    def __init__(self, handle_cache):
+    def __init__(self, handle_cache, thread_handle_cache=None):
         self.lock = threading.RLock()
         self.handle_cache = handle_cache
+        self.thread_handle_cache = thread_handle_cache
         self.process_io_patterns = defaultdict(lambda: {
             'sequential_reads': 0,
             'random_reads': 0,
@@ -485,6 +487,14 @@ class AdaptiveIOScheduler:
                 logger.debug(f"NVMe queue depth adjustment error: {e}")
             return False
     
+    def _set_thread_io_priority(self, thread_handle, io_priority):
+        ntdll.NtSetInformationThread(
+            thread_handle,
+            43,
+            ctypes.byref(ctypes.c_ulong(io_priority)),
+            ctypes.sizeof(ctypes.c_ulong)
+        )
+    
     def prioritize_io(self, pid, is_interactive=False, is_foreground=False):
         with self.lock:
             try:
@@ -497,32 +507,33 @@ class AdaptiveIOScheduler:
                     io_priority = 0  
                 
                 
-                handle = self.handle_cache.get_handle(pid, PROCESS_SET_INFORMATION)
-                if handle:
-                    
-                    try:
-                        proc = psutil.Process(pid)
-                        for thread in proc.threads():
-                            thread_handle = kernel32.OpenThread(
-                                THREAD_SET_INFORMATION,
-                                False,
-                                thread.id
-                            )
-                            if thread_handle:
-                                
-                                ntdll.NtSetInformationThread(
-                                    thread_handle,
-                                    43,
-                                    ctypes.byref(ctypes.c_ulong(io_priority)),
-                                    ctypes.sizeof(ctypes.c_ulong)
-                                )
-                                kernel32.CloseHandle(thread_handle)
+                with self.handle_cache.borrow(pid, PROCESS_SET_INFORMATION) as handle:
+                    if handle:
                         
-                        self.io_priorities[pid] = io_priority
-                        logger.debug(f"I/O priority for pid {pid} set to {io_priority}")
-                        return True
-                    except Exception as e:
-                        logger.debug(f"Failed to set I/O priority for threads of pid {pid}: {e}")
+                        try:
+                            proc = psutil.Process(pid)
+                            for thread in proc.threads():
+                                if self.thread_handle_cache is not None:
+                                    with self.thread_handle_cache.borrow(thread.id, THREAD_SET_INFORMATION, pid) as thread_handle:
+                                        if thread_handle:
+                                            self._set_thread_io_priority(thread_handle, io_priority)
+                                else:
+                                    thread_handle = kernel32.OpenThread(
+                                        THREAD_SET_INFORMATION,
+                                        False,
+                                        thread.id
+                                    )
+                                    if thread_handle:
+                                        try:
+                                            self._set_thread_io_priority(thread_handle, io_priority)
+                                        finally:
+                                            kernel32.CloseHandle(thread_handle)
+                            
+                            self.io_priorities[pid] = io_priority
+                            logger.debug(f"I/O priority for pid {pid} set to {io_priority}")
+                            return True
+                        except Exception as e:
+                            logger.debug(f"Failed to set I/O priority for threads of pid {pid}: {e}")
             except Exception as e:
                 logger.debug(f"I/O prioritization error for pid {pid}: {e}")
             return False
@@ -46,8 +46,8 @@ from gpu import (
 from ram import (
     WorkingSetOptimizer, LargePageManager, AdvancedWorkingSetTrimmer, 
     MemoryPriorityManager, AWEManager, NUMAAwareMemoryAllocator, 
-    DynamicHugePagesManager, MemoryDeduplicationManager, 
-    AdvancedMemoryPagePriorityManager
+    DynamicHugePagesManager, MemoryDeduplicationManager, MemoryReclaimPlanner, 
+    StandbyPurgeController, SystemMemorySampler, AdvancedMemoryPagePriorityManager
 )
 from kernel import (
     KernelOptimizer, AdvancedTimerCoalescer, AdaptiveTimerResolutionManager, 
@@ -58,7 +58,8 @@ from cpu import (
     CPUParkingController, HeterogeneousThreadScheduler, SMTScheduler, 
     CPUFrequencyScaler, L3CacheOptimizer, EnhancedCacheTopologyOptimizer, 
     AVXInstructionOptimizer, EnhancedSMTOptimizer, CPUPipelineOptimizer, 
-    TLBOptimizer, CPUPinningEngine
+    TLBOptimizer, CPUPinningEngine, CpuLoadSampler, ThreadSnapshotIndex, CpuSetPlacement,
+    TopologyProvider
 )
 from prioridades import (
     DynamicPriorityAlgorithm, RealtimePriorityManager, SystemResponsivenessController
@@ -82,12 +83,15 @@ from perfiles import (
     AutomaticProfileManager, DynamicMultiLayerProfileSystem
 )
 from ajustes_varios import (
-    CircularBuffer, CTypesStructurePool, SimpleBloomFilter, RegistryWriteBuffer, 
+    CircularBuffer, CTypesStructurePool, RegistryWriteBuffer, 
+    MultiPatternMatcher, CompiledRuleMatcher, 
     HardwareDetector, OptimizationDecisionCache, IntegrityValidator, 
+    ProcessClassificationCache, ProcessView, 
     ProcessSuspensionManager, ProcessHandleCache, ProcessSnapshotEngine, 
     BatchedSettingsApplicator, ForegroundDebouncer, ProcessTreeCache, 
-    RealtimeTelemetryCollector, ProcessDependencyAnalyzer, 
-    EnhancedSystemResponsivenessOptimizer
+    RealtimeTelemetryCollector, 
+    EnhancedSystemResponsivenessOptimizer, ProcessLifecycleEventSource, ProcessApplyExecutor, 
+    ForegroundLatencyTracker, ThreadHandleCache, CoreSet, MigrationGovernor, TimeSeriesStore
 )
 
 
@@ -277,11 +281,15 @@ def set_process_affinity_direct(handle, core_list):
         if not handle or not core_list:
             return False
         
+        if any(core < 0 for core in core_list):
+            return False
+        
+        core_set = CoreSet.from_cores(core_list)
         max_cores = psutil.cpu_count(logical=True)
-        if any(core < 0 or core >= max_cores for core in core_list):
+        if not core_set or core_set.max() >= max_cores:
             return False
         
-        affinity_mask = sum(1 << core for core in core_list)
+        affinity_mask = core_set.affinity_mask()
         result = kernel32.SetProcessAffinityMask(handle, ULONG_PTR(affinity_mask))
         
         if result != 0:
@@ -301,16 +309,8 @@ def get_process_affinity_direct(handle):
         system_mask = ULONG_PTR()
         
         if kernel32.GetProcessAffinityMask(handle, ctypes.byref(process_mask), ctypes.byref(system_mask)):
-            cores = []
-            mask = process_mask.value
-            core_idx = 0
             max_cores = psutil.cpu_count(logical=True)
-            
-            while mask and core_idx < max_cores:
-                if mask & 1:
-                    cores.append(core_idx)
-                mask >>= 1
-                core_idx += 1
+            cores = (CoreSet.from_mask(process_mask.value) & CoreSet.range(max_cores)).to_list()
             
             return cores if cores else None
         
@@ -425,24 +425,26 @@ class UnifiedProcessManager:
 
     def __init__(self):
         self.lock = threading.RLock()
+        self.job_lock = threading.RLock()
         
         self.cpu_count = psutil.cpu_count(logical=True)
+        self.topology_provider = TopologyProvider(cpu_count=self.cpu_count)
+        TopologyProvider.set_default(self.topology_provider)
         self.topology = self._query_cpu_topology()
         self.pe_core_sets = self._classify_pe_cores()
         self.core_config = self._build_core_config()
         
-        self.affinity_mask_cache = {}
-        for key, cores in self.core_config.items():
-            mask = sum(1 << c for c in cores)
-            self.affinity_mask_cache[tuple(sorted(cores))] = mask
-        
         self.process_states = {}
         self.applied_states = {}
         self.minimized_processes = {}
         self.pid_to_job = {}
         self.jobs = {}
         self.foreground_pid = None
+        self.foreground_group = set()
+        self.group_apply_locks = [threading.RLock() for _ in range(64)]
+        self.group_apply_stats = {'background_skipped_foreground_member': 0}
         self.whitelist = set()
+        self.whitelist_matcher = CompiledRuleMatcher()
         self.config_last_modified = 0
         
         self.interned_process_names = {}
@@ -458,20 +460,42 @@ class UnifiedProcessManager:
         self._register_coalesced_tasks()
         
         self.handle_cache = ProcessHandleCache(max_cache_size=256, handle_ttl_seconds=30.0)
+        self.thread_handle_cache = ThreadHandleCache(max_cache_size=4096, handle_ttl_seconds=30.0)
         
         self.process_snapshot = ProcessSnapshotEngine(cache_ttl_ms=500)
         
+        self.process_events = ProcessLifecycleEventSource(reconcile_interval_ms=5000)
+        
         self.settings_applicator = BatchedSettingsApplicator(self.handle_cache)
         
-        self.workingset_optimizer = WorkingSetOptimizer(self.handle_cache)
+        self.memory_sampler = SystemMemorySampler(max_age_seconds=2.0)
+        
+        self.workingset_optimizer = WorkingSetOptimizer(self.handle_cache, memory_sampler=self.memory_sampler)
         
         self.foreground_debouncer = ForegroundDebouncer(debounce_time_ms=300, hysteresis_time_ms=150)
+        self.foreground_latency = ForegroundLatencyTracker(budget_ms=50)
         
         self.process_tree = ProcessTreeCache(rebuild_interval_ms=2000)
         
-        self.cpu_pinning = CPUPinningEngine(self.handle_cache, self.cpu_count, self.topology)
+        self.timeseries = TimeSeriesStore(capacity=64, pid_idle_ttl_seconds=60.0)
+        self.cpu_load_sampler = CpuLoadSampler(sample_interval_ms=500, history_size=64, timeseries=self.timeseries)
+        self.cpu_load_sampler.start()
         
-        self.large_page_manager = LargePageManager(self.handle_cache)
+        self.thread_index = ThreadSnapshotIndex(max_age_ms=1000, min_refresh_interval_ms=100)
+        self.migration_governor = MigrationGovernor(
+            l3_groups=self.topology_provider.get_cache_groups(3),
+            l3_size_mb=self.topology_provider.get_cache_size_mb(3) or 32.0
+        )
+        self.cpu_placement = CpuSetPlacement(self.topology['layout'], self.cpu_count)
+        
+        self.cpu_pinning = CPUPinningEngine(
+            self.handle_cache, self.cpu_count, self.topology,
+            cpu_sampler=self.cpu_load_sampler, thread_index=self.thread_index,
+            thread_handle_cache=self.thread_handle_cache, placement=self.cpu_placement,
+            topology_provider=self.topology_provider
+        )
+        
+        self.large_page_manager = LargePageManager(self.handle_cache, memory_sampler=self.memory_sampler)
         
         self.advanced_ws_trimmer = AdvancedWorkingSetTrimmer(self.handle_cache)
         
@@ -479,19 +503,22 @@ class UnifiedProcessManager:
         
         self.memory_priority_manager = MemoryPriorityManager(self.handle_cache)
         
-        self.process_service_manager = ProcessServiceManager()
+        self.process_service_manager = ProcessServiceManager(cpu_sampler=self.cpu_load_sampler)
         
         self.cpu_parking_controller = CPUParkingController()
         
         self.heterogeneous_scheduler = HeterogeneousThreadScheduler(
             self.handle_cache, 
             self.pe_core_sets.get('p_cores', []),
-            self.pe_core_sets.get('e_cores', [])
+            self.pe_core_sets.get('e_cores', []),
+            thread_index=self.thread_index,
+            thread_handle_cache=self.thread_handle_cache,
+            placement=self.cpu_placement
         )
         
         self.context_switch_reducer = ContextSwitchReducer()
         
-        self.smt_scheduler = SMTScheduler(self.cpu_count)
+        self.smt_scheduler = SMTScheduler(self.cpu_count, handle_cache=self.handle_cache, topology_provider=self.topology_provider)
         
         self.cpu_frequency_scaler = CPUFrequencyScaler()
         
@@ -503,7 +530,7 @@ class UnifiedProcessManager:
         
         self.dpc_latency_controller = DPCLatencyController()
         
-        self.temp_monitor = CPUTemperatureMonitor()
+        self.temp_monitor = CPUTemperatureMonitor(cpu_sampler=self.cpu_load_sampler)
         
         self.c_states_optimizer = CStatesOptimizer()
         self.storage_optimizer = StorageOptimizer()
@@ -511,12 +538,19 @@ class UnifiedProcessManager:
         self.power_optimizer = PowerManagementOptimizer()
         self.kernel_optimizer = KernelOptimizer()
         
-        self.dynamic_priority_algo = DynamicPriorityAlgorithm(self.handle_cache)
+        self.dynamic_priority_algo = DynamicPriorityAlgorithm(self.handle_cache, cpu_sampler=self.cpu_load_sampler)
         self.telemetry_collector = RealtimeTelemetryCollector()
         self.profile_manager = AutomaticProfileManager()
         self.numa_allocator = NUMAAwareMemoryAllocator()
-        self.huge_pages_manager = DynamicHugePagesManager(self.handle_cache)
+        self.huge_pages_manager = DynamicHugePagesManager(self.handle_cache, memory_sampler=self.memory_sampler)
         self.memory_dedup_manager = MemoryDeduplicationManager()
+        self.reclaim_planner = MemoryReclaimPlanner(
+            workingset_optimizer=self.workingset_optimizer,
+            trimmer=self.advanced_ws_trimmer,
+            priority_manager=self.memory_priority_manager,
+            dedup_manager=self.memory_dedup_manager,
+            memory_sampler=self.memory_sampler
+        )
         self.realtime_priority_mgr = RealtimePriorityManager(self.handle_cache)
         
         self.readahead_manager = AdaptiveReadAheadManager()
@@ -531,7 +565,11 @@ class UnifiedProcessManager:
         
         self.multilevel_timer_coalescer = MultiLevelTimerCoalescer()
         self.syscall_batcher = SystemCallBatcher()
-        self.dvfs_scaler = DynamicVoltageFrequencyScaler()
+        self.dvfs_scaler = DynamicVoltageFrequencyScaler(
+            core_domains={core: 1 for core in self.pe_core_sets.get('p_cores', [])} if self.pe_core_sets.get('hybrid') else None,
+            timeseries=self.timeseries,
+            cpu_count=self.cpu_count
+        )
         
         self._l3_cache_optimizer = None
         self._avx_instruction_optimizer = None
@@ -571,19 +609,35 @@ class UnifiedProcessManager:
         self._enhanced_system_responsiveness = None
         
         self._thermal_aware_scheduler = None
-        self._process_dependency_analyzer = None
         
         self.hardware_detector = HardwareDetector()
         self.decision_cache = OptimizationDecisionCache(ttl_seconds=300)
+        self.process_view_stats = {
+            'passes': 0,
+            'attribute_fetches': 0,
+            'syscalls_saved': 0
+        }
+        self.classification_cache = ProcessClassificationCache(max_entries=4096)
         self.integrity_validator = IntegrityValidator(self.handle_cache)
         self.suspension_manager = ProcessSuspensionManager()
         self.responsiveness_controller = SystemResponsivenessController()
         
+        self.apply_executor = ProcessApplyExecutor(
+            self.apply_settings_to_process_group, max_workers=4, max_pending=1024
+        )
+        
+        self.foreground_generation = 0
+        self.deferred_foreground_work = {}
+        self.deferred_stats = {'scheduled': 0, 'executed': 0, 'cancelled': 0, 'failed': 0}
+        self.deferred_executor = ProcessApplyExecutor(
+            self._run_deferred_foreground_work, max_workers=1, max_pending=256,
+            name="DeferredOptimizationWorker", thread_priority=win32con.THREAD_PRIORITY_BELOW_NORMAL
+        )
+        
         self.load_whitelist()
         
         self.ram_monitor_active = True
-        self.last_ram_cleanup = 0
-        self.ram_cleanup_cooldown = 3600
+        self.standby_purge_controller = StandbyPurgeController(executor=self.clear_ram_cache)
         self.start_ram_monitor()
         
         self.win_event_hook = None
@@ -597,10 +651,7 @@ class UnifiedProcessManager:
             'taskmgr.exe', 'taskhosw.exe', 'runtimebroker.exe'
         }
         self.blacklist_contains = ['\\windows\\', 'defender', 'msmpeng.exe', 'wuauclt.exe', 'tiworker.exe']
-        
-        self.blacklist_bloom = SimpleBloomFilter(expected_elements=len(self.blacklist_names) * 2)
-        for name in self.blacklist_names:
-            self.blacklist_bloom.add(name)
+        self.blacklist_contains_matcher = MultiPatternMatcher(self.blacklist_contains)
         
         self.modules_enabled = {
             'almacenamiento': True,
@@ -627,7 +678,7 @@ class UnifiedProcessManager:
     @property
     def l3_cache_optimizer(self):
         if self._l3_cache_optimizer is None:
-            self._l3_cache_optimizer = L3CacheOptimizer(self.topology)
+            self._l3_cache_optimizer = L3CacheOptimizer(self.topology, topology_provider=self.topology_provider)
         return self._l3_cache_optimizer
     
     @property
@@ -675,7 +726,7 @@ class UnifiedProcessManager:
     @property
     def dynamic_multilayer_profiles(self):
         if self._adaptive_io_scheduler is None:
-            self._adaptive_io_scheduler = AdaptiveIOScheduler(self.handle_cache)
+            self._adaptive_io_scheduler = AdaptiveIOScheduler(self.handle_cache, thread_handle_cache=self.thread_handle_cache)
         return self._adaptive_io_scheduler
     
     @property
@@ -692,9 +743,46 @@ class UnifiedProcessManager:
     
     @property
     def thermal_aware_scheduler(self):
-        if self._process_dependency_analyzer is None:
-            self._process_dependency_analyzer = ProcessDependencyAnalyzer(self.handle_cache)
-        return self._process_dependency_analyzer
+        if self._thermal_aware_scheduler is None:
+            self._thermal_aware_scheduler = ThermalAwareScheduler(
+                self.cpu_count, self.temp_monitor, cpu_sampler=self.cpu_load_sampler,
+                migration_governor=self.migration_governor, timeseries=self.timeseries
+            )
+        return self._thermal_aware_scheduler
+    
+    @property
+    def enhanced_cache_topology(self):
+        if self._enhanced_cache_topology is None:
+            self._enhanced_cache_topology = EnhancedCacheTopologyOptimizer(
+                self.topology, topology_provider=self.topology_provider,
+                migration_governor=self.migration_governor
+            )
+        return self._enhanced_cache_topology
+    
+    def _query_cpu_topology(self):
+        topology = self.topology_provider.get_topology()
+        if not self.topology_provider.get_stats()['fallback'] and topology['logical_count'] != self.cpu_count:
+            logger.debug(f"Topology reports {topology['logical_count']} logical CPUs, psutil reports {self.cpu_count}")
+        
+        CoreSet.set_group_layout(topology['layout'])
+        
+        if topology['group_count'] > 1:
+            logger.info(f"Detected {topology['group_count']} processor groups: {topology['group_sizes']}")
+        
+        return topology
+    
+    def _classify_pe_cores(self):
+        pe_core_sets = self.topology_provider.get_pe_core_sets()
+        if pe_core_sets['hybrid']:
+            logger.info(f"Hybrid CPU detected: {len(pe_core_sets['p_cores'])} P-core threads, {len(pe_core_sets['e_cores'])} E-core threads")
+        return pe_core_sets
+    
+    def _build_core_config(self):
+        all_cores = list(range(self.cpu_count))
+        return {
+            'foreground': self.pe_core_sets.get('p_cores') or all_cores,
+            'background': self.pe_core_sets.get('e_cores') or all_cores
+        }
     
     def _intern_process_name(self, name):
         if name in self.interned_process_names:
@@ -707,94 +795,136 @@ class UnifiedProcessManager:
         self.interned_process_names[name] = interned
         return interned
     
-    def is_whitelisted(self, pid: int) -> bool:
+    def load_whitelist(self):
         try:
+            script_dir = os.path.dirname(os.path.abspath(__file__))
+            config_path = os.path.join(script_dir, 'config.json')
+            modified = os.path.getmtime(config_path) if os.path.exists(config_path) else 0
             
-            if not isinstance(pid, int) or pid <= 0:
+            if modified == self.config_last_modified:
                 return False
             
+            config = load_config()
+            self.whitelist = {
+                self._intern_process_name(str(w).lower())
+                for w in config.get('whitelist', []) if w
+            }
+            self.whitelist_matcher = CompiledRuleMatcher(self.whitelist, self.whitelist)
+            self.foreground_latency.set_budget_ms(config.get('foreground_latency_budget_ms', 50))
+            self.config_last_modified = modified
+            self.classification_cache.invalidate_all()
+            return True
+        except Exception as e:
+            logger.error(f"Failed to load whitelist: {e}")
+            return False
+    
+    def _classify_process(self, pid: int) -> Optional[Dict]:
+        try:
             process = psutil.Process(pid)
-            if not process.is_running():
+            create_time = process.create_time()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return None
+        
+        cached = self.classification_cache.get(pid, create_time)
+        if cached is not None:
+            return cached
+        
+        info = {
+            'name': '',
+            'exe': '',
+            'username': None,
+            'username_denied': False,
+            'session_id': None
+        }
+        
+        try:
+            with process.oneshot():
+                info['name'] = self._intern_process_name(process.name().lower())
+                
+                try:
+                    info['exe'] = process.exe().lower()
+                except (psutil.AccessDenied, psutil.NoSuchProcess):
+                    pass
+                
+                try:
+                    info['username'] = process.username()
+                except (psutil.AccessDenied, psutil.NoSuchProcess):
+                    info['username_denied'] = True
+                
+                try:
+                    if hasattr(process, 'session_id'):
+                        info['session_id'] = process.session_id() if callable(process.session_id) else None
+                except (psutil.AccessDenied, psutil.NoSuchProcess, AttributeError):
+                    logger.debug(f"Could not check session_id for pid {pid}")
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return None
+        
+        info['whitelisted'] = self._evaluate_whitelist(info)
+        info['blacklisted'] = self._evaluate_blacklist(info)
+        
+        return self.classification_cache.set(pid, create_time, info)
+    
+    def _evaluate_whitelist(self, info: Dict) -> bool:
+        return self.whitelist_matcher.matches(info['name'], info['exe'])
+    
+    def _evaluate_blacklist(self, info: Dict) -> bool:
+        name = info['name']
+        
+        if name in self.blacklist_names:
+            return True
+        
+        if not name.endswith('.exe'):
+            return True
+        
+        if info['username_denied']:
+            return True
+        
+        username = info['username']
+        if username and username.lower().startswith(('nt authority\\', 'local service', 'network service')):
+            return True
+        
+        if info['session_id'] is not None and info['session_id'] == 0:
+            return True
+        
+        if self.blacklist_contains_matcher.search(info['exe']):
+            return True
+        
+        return False
+    
+    def is_whitelisted(self, pid: int) -> bool:
+        try:
+            if not isinstance(pid, int) or pid <= 0:
                 return False
             
-            name = self._intern_process_name(process.name().lower())
-            exe = ''
-            try:
-                exe = process.exe().lower()
-            except (psutil.AccessDenied, psutil.NoSuchProcess):
-                pass
-            
-            
-            if name in self.whitelist:
-                return True
-            
-            
-            for w in self.whitelist:
-                if w and exe and w in exe:
-                    return True
-            
-            return False
-        except (psutil.NoSuchProcess, psutil.AccessDenied):
-            return False
+            info = self._classify_process(pid)
+            return info['whitelisted'] if info else False
         except Exception as e:
             logger.debug(f"Error checking whitelist for pid {pid}: {e}")
             return False
     
     def is_blacklisted(self, pid: int) -> bool:
         try:
-            
             if not isinstance(pid, int) or pid <= 0:
                 return True
             
-            p = psutil.Process(pid)
-            if not p.is_running():
-                return True
-            
-            name = self._intern_process_name(p.name().lower())
-            
-            
-            
-            if self.blacklist_bloom.contains(name):
-                
-                if name in self.blacklist_names:
-                    return True
-            
-            
-            if not name.endswith('.exe'):
+            info = self._classify_process(pid)
+            return info['blacklisted'] if info else True
+        except Exception as e:
+            logger.debug(f"Error checking blacklist for pid {pid}: {e}")
+            return True
+    
+    def _is_excluded(self, pid: int) -> bool:
+        try:
+            if not isinstance(pid, int) or pid <= 0:
                 return True
             
-            try:
-                username = p.username()
-                if username and username.lower().startswith(('nt authority\\', 'local service', 'network service')):
-                    return True
-            except (psutil.AccessDenied, psutil.NoSuchProcess):
-                
+            info = self._classify_process(pid)
+            if not info:
                 return True
-            
-            
-            
-            try:
-                if hasattr(p, 'session_id'):
-                    session_id = p.session_id() if callable(p.session_id) else None
-                    if session_id is not None and session_id == 0:
-                        return True
-            except (psutil.AccessDenied, psutil.NoSuchProcess, AttributeError):
-                logger.debug(f"Could not check session_id for pid {pid}")
-            
-            try:
-                exe = p.exe().lower()
-                if any(token in exe for token in self.blacklist_contains):
-                    return True
-            except (psutil.AccessDenied, psutil.NoSuchProcess):
-                pass
-                
-        except (psutil.NoSuchProcess, psutil.AccessDenied):
-            return True
+            return info['whitelisted'] or info['blacklisted']
         except Exception as e:
-            logger.debug(f"Error checking blacklist for pid {pid}: {e}")
+            logger.debug(f"Error classifying pid {pid}: {e}")
             return True
-        
-        return False
     
     def _start_foreground_hook_thread(self):
         def hook_thread():
@@ -832,8 +962,10 @@ class UnifiedProcessManager:
             if not new_pid or not isinstance(new_pid, int) or new_pid <= 0:
                 return
             
+            self.foreground_latency.begin(new_pid)
             
             if not psutil.pid_exists(new_pid):
+                self.foreground_latency.discard(new_pid)
                 return
             
             is_known = self.is_whitelisted(new_pid)
@@ -850,25 +982,26 @@ class UnifiedProcessManager:
         with self.lock:
             try:
                 
+                span = self.foreground_latency.get_span(new_pid)
+                self.foreground_latency.mark(span, 'debounce')
+                self.foreground_latency.arm_deadline(span)
+                
                 if not new_pid or new_pid == self.foreground_pid:
+                    self.foreground_latency.discard(new_pid)
                     return
                 
                 old_pid = self.foreground_pid
                 self.foreground_pid = new_pid
-                
-                
-                if old_pid and old_pid > 0 and psutil.pid_exists(old_pid):
-                    try:
-                        self.apply_settings_to_process_group(old_pid, False)
-                    except Exception as e:
-                        logger.error(f"Error applying background settings to old pid {old_pid}: {e}")
+                self.foreground_group = {new_pid}
+                self.foreground_generation += 1
+                self._cancel_stale_deferred_work()
                 
                 
                 if new_pid and new_pid > 0 and psutil.pid_exists(new_pid):
-                    try:
-                        self.apply_settings_to_process_group(new_pid, True)
-                    except Exception as e:
-                        logger.error(f"Error applying foreground settings to new pid {new_pid}: {e}")
+                    self.apply_executor.submit(new_pid, True)
+                
+                if old_pid and old_pid > 0 and psutil.pid_exists(old_pid):
+                    self.apply_executor.submit(old_pid, False)
                         
             except Exception as e:
                 logger.error(f"Critical error in applying foreground change: {e}")
@@ -888,7 +1021,7 @@ class UnifiedProcessManager:
         page_priority = 5
         if not is_foreground:
             if pid and pid in self.minimized_processes:
-                time_minimized = time.time() - self.minimized_processes[pid]
+                time_minimized = self._minimized_time(pid)
                 if time_minimized > 1800:
                     page_priority = 1
                 else:
@@ -903,14 +1036,21 @@ class UnifiedProcessManager:
         return cores, priority, io_priority, thread_io_priority, page_priority, disable_boost, trim_working_set, use_eco_qos
     
     def _get_applied_state(self, pid: int) -> Dict:
-        return self.applied_states.get(pid, {})
+        with self.lock:
+            return self.applied_states.get(pid, {})
     
     def _set_applied_state(self, pid: int, state: Dict) -> None:
-        self.applied_states[pid] = state
+        with self.lock:
+            self.applied_states[pid] = state
+    
+    def _minimized_time(self, pid: int) -> float:
+        with self.lock:
+            minimized_at = self.minimized_processes.get(pid)
+        return time.time() - minimized_at if minimized_at is not None else 0
     
     def apply_all_settings(self, pid: int, is_foreground: bool):
         
-        if self.is_whitelisted(pid) or self.is_blacklisted(pid):
+        if self._is_excluded(pid):
             return
         
         cached_decision = self.decision_cache.get(pid, 'settings')
@@ -918,27 +1058,31 @@ class UnifiedProcessManager:
             return
         
         
-        gc_was_enabled = gc.isenabled()
-        if gc_was_enabled:
-            gc.disable()
+        view = None
         
         try:
-            if is_foreground:
-                if pid in self.minimized_processes:
-                    del self.minimized_processes[pid]
-                if self.suspension_manager.suspended_processes.get(pid):
-                    self.suspension_manager.resume_process(pid)
-            elif not is_foreground and pid not in self.minimized_processes:
-                self.minimized_processes[pid] = time.time()
+            with self.lock:
+                if is_foreground:
+                    self.minimized_processes.pop(pid, None)
+                elif pid not in self.minimized_processes:
+                    self.minimized_processes[pid] = time.time()
+            
+            if is_foreground and self.suspension_manager.suspended_processes.get(pid):
+                self.suspension_manager.resume_process(pid)
             
             try:
-                process = psutil.Process(pid)
-                process_name = process.name()
+                view = ProcessView(pid, ('name', 'memory_info'))
+            except (psutil.NoSuchProcess, psutil.AccessDenied) as e:
+                logger.debug(f"Could not build process view for pid {pid}: {e}")
+                return
+            
+            try:
+                process_name = view.name()
                 
                 self.profile_manager.detect_profile(process_name)
                 profile_settings = self.profile_manager.get_profile_settings()
             except Exception as e:
-                logger.debug(f"Could not get profile for {process_name}, using Balanced. Error: {e}")
+                logger.debug(f"Could not get profile for pid {pid}, using Balanced. Error: {e}")
                 profile_settings = self.profile_manager.get_profile_settings('Balanced')
             
             cores, desired_prio, desired_io, desired_thread_io, desired_page, desired_disable_boost, trim_ws, use_eco_qos = \
@@ -971,17 +1115,16 @@ class UnifiedProcessManager:
             
             if trim_ws and not is_foreground:
                 try:
-                    process = psutil.Process(pid)
-                    memory_mb = process.memory_info().rss / (1024 * 1024)
+                    memory_mb = view.memory_mb()
+                    minimized_time = self._minimized_time(pid)
                     
                     self.workingset_optimizer.mark_process_foreground(pid, is_foreground)
-                    
-                    if self.workingset_optimizer.should_trim_working_set(pid, memory_mb):
-                        settings_to_apply['trim_working_set'] = True
+                    self.reclaim_planner.observe_process(pid, view.name(), memory_mb, minimized_time)
                 except Exception as e:
                     logger.debug(f"Error checking working set for pid {pid}: {e}")
             else:
                 self.workingset_optimizer.mark_process_foreground(pid, is_foreground)
+                self.reclaim_planner.mark_foreground(pid)
             
             if settings_to_apply:
                 result = self.settings_applicator.apply_batched_settings(pid, settings_to_apply)
@@ -1010,154 +1153,22 @@ class UnifiedProcessManager:
                 self.telemetry_collector.collect_metrics()
                 
                 if not self.telemetry_collector.should_throttle():
-                    self.dynamic_priority_algo.adjust_priority(pid, is_foreground)
+                    self.dynamic_priority_algo.adjust_priority(pid, is_foreground, process_view=view)
             except Exception as e:
                 logger.debug(f"Error in telemetry or dynamic priority for pid {pid}: {e}")
             
             if is_foreground:
-                try:
-                    process = psutil.Process(pid)
-                    process_name = process.name()
-                    num_threads = process.num_threads()
-                    
-                    if num_threads <= 2:
-                        workload = 'single_thread'
-                        is_latency_sensitive = True
-                    elif num_threads <= 8:
-                        workload = 'latency_sensitive'
-                        is_latency_sensitive = True
-                    else:
-                        workload = 'throughput'
-                        is_latency_sensitive = False
-                    
-                    self.cpu_pinning.apply_intelligent_pinning(pid, cores, workload)
-                    
-                    self.heterogeneous_scheduler.classify_and_schedule_threads(pid, is_latency_sensitive)
-                    
-                    if is_latency_sensitive:
-                        self.smt_scheduler.assign_to_physical_cores(pid)
-                    
-                    self.cpu_frequency_scaler.set_turbo_mode(enable=True)
-                    
-                    if self.large_page_manager.should_enable_large_pages(pid, is_foreground):
-                        self.large_page_manager.enable_large_pages_for_process(pid)
-                    
-                    if self.awe_manager.is_32bit_process(pid):
-                        try:
-                            process_mem_mb = process.memory_info().rss / (1024 * 1024)
-                            if process_mem_mb > 1024:
-                                self.awe_manager.enable_awe_for_process(pid)
-                        except Exception as e:
-                            logger.debug(f"Error enabling AWE for pid {pid}: {e}")
-                    
-                    minimized_time = 0
-                    if pid in self.minimized_processes:
-                        minimized_time = time.time() - self.minimized_processes[pid]
-                    
-                    self.memory_priority_manager.set_memory_priority(pid, 5, is_foreground, minimized_time)
-                    
-                    try:
-                        exe_path = process.exe()
-                        self.prefetch_optimizer.optimize_prefetch_for_process(pid, exe_path)
-                    except Exception as e:
-                        logger.debug(f"Error optimizing prefetch for pid {pid}: {e}")
-                    
-                    try:
-                        self.numa_allocator.optimize_process_numa(pid, cores)
-                    except Exception as e:
-                        logger.debug(f"Error optimizing NUMA for pid {pid}: {e}")
-                    
-                    try:
-                        self.huge_pages_manager.monitor_process(pid)
-                    except Exception as e:
-                        logger.debug(f"Error monitoring huge pages for pid {pid}: {e}")
-                    
-                    try:
-                        self.realtime_priority_mgr.monitor_realtime_process(pid, process_name)
-                    except Exception as e:
-                        logger.debug(f"Error monitoring realtime process for pid {pid}: {e}")
-                    
-                    try:
-                        self.network_flow_prioritizer.prioritize_foreground_traffic(pid)
-                    except Exception as e:
-                        logger.debug(f"Error prioritizing network flow for pid {pid}: {e}")
-                    
-                    try:
-                        process = psutil.Process(pid)
-                        process_name = process.name()
-                        
-                        if self.l3_cache_optimizer.cache_groups:
-                            self.l3_cache_optimizer.optimize_process_cache_locality(pid, is_critical=True, handle_cache=self.handle_cache)
-                    except Exception as e:
-                        logger.debug(f"Error optimizing L3 cache for pid {pid}: {e}")
-                    
-                    try:
-                        process = psutil.Process(pid)
-                        process_name = process.name()
-                        
-                        if self.avx_instruction_optimizer.detect_avx_usage(pid, process_name):
-                            self.avx_instruction_optimizer.optimize_avx_process(pid)
-                    except Exception as e:
-                        logger.debug(f"Error optimizing AVX for pid {pid}: {e}")
-                    
-                    try:
-                        if num_threads <= 4:
-                            self.enhanced_smt_optimizer.optimize_for_latency(pid, self.handle_cache)
-                        else:
-                            self.enhanced_smt_optimizer.optimize_for_throughput(pid, self.handle_cache)
-                    except Exception as e:
-                        logger.debug(f"Error optimizing SMT for pid {pid}: {e}")
-                    
-                    try:
-                        self.cpu_pipeline_optimizer.optimize_instruction_ordering(pid, is_critical=True)
-                    except Exception as e:
-                        logger.debug(f"Error optimizing CPU pipeline for pid {pid}: {e}")
-                    
-                    try:
-                        self.tlb_optimizer.optimize_memory_layout(pid)
-                    except Exception as e:
-                        logger.debug(f"Error optimizing TLB for pid {pid}: {e}")
-                    
-                    try:
-                        if len(self.advanced_numa_optimizer.numa_nodes) > 1:
-                            self.advanced_numa_optimizer.optimize_numa_placement(pid)
-                    except Exception as e:
-                        logger.debug(f"Error optimizing advanced NUMA for pid {pid}: {e}")
-                    
-                    try:
-                        self.cache_coherency_optimizer.optimize_thread_placement(pid, self.handle_cache)
-                    except Exception as e:
-                        logger.debug(f"Error optimizing cache coherency for pid {pid}: {e}")
-                    
-                    try:
-                        self.memory_bandwidth_manager.prioritize_foreground_memory_access(pid)
-                    except Exception as e:
-                        logger.debug(f"Error prioritizing memory bandwidth for pid {pid}: {e}")
-                    
-                    try:
-                        self.io_priority_inheritance.inherit_io_priority(pid, desired_io)
-                    except Exception as e:
-                        logger.debug(f"Error inheriting I/O priority for pid {pid}: {e}")
-                    
-                except Exception as e:
-                    logger.error(f"Unhandled error in foreground optimization for pid {pid}: {e}")
+                self._schedule_deferred_foreground_work(pid, cores, desired_io)
             else:
+                self._cancel_deferred_foreground_work(pid)
+                self.cpu_pinning.release_process(pid)
                 try:
-                    minimized_time = 0
-                    if pid in self.minimized_processes:
-                        minimized_time = time.time() - self.minimized_processes[pid]
+                    minimized_time = self._minimized_time(pid)
                     
                     self.memory_priority_manager.set_memory_priority(pid, 2, is_foreground, minimized_time)
                     
-                    self.advanced_ws_trimmer.trim_private_pages(pid)
-                    
                     self.heterogeneous_scheduler.classify_and_schedule_threads(pid, is_latency_sensitive=False)
                     
-                    try:
-                        self.memory_dedup_manager.enable_memory_compression(pid)
-                    except Exception as e:
-                        logger.debug(f"Error enabling memory deduplication for pid {pid}: {e}")
-                    
                     try:
                         self.memory_bandwidth_manager.limit_background_bandwidth(pid)
                     except Exception as e:
@@ -1170,9 +1181,246 @@ class UnifiedProcessManager:
                 except Exception as e:
                     logger.error(f"Unhandled error in background optimization for pid {pid}: {e}")
         finally:
+            if view is not None:
+                with self.lock:
+                    self.process_view_stats['passes'] += 1
+                    self.process_view_stats['attribute_fetches'] += view.fetches
+                    self.process_view_stats['syscalls_saved'] += view.reuses
+    
+    def _schedule_deferred_foreground_work(self, pid, cores, desired_io):
+        with self.lock:
+            self.deferred_foreground_work[pid] = {
+                'generation': self.foreground_generation,
+                'cores': cores,
+                'desired_io': desired_io,
+                'scheduled_at': time.time()
+            }
+            self.deferred_stats['scheduled'] += 1
+        
+        if not self.deferred_executor.submit(pid, True):
+            with self.lock:
+                self.deferred_foreground_work.pop(pid, None)
+                self.deferred_stats['cancelled'] += 1
+    
+    def _cancel_deferred_foreground_work(self, pid):
+        with self.lock:
+            if self.deferred_foreground_work.pop(pid, None) is not None:
+                self.deferred_executor.cancel(pid)
+                self.deferred_stats['cancelled'] += 1
+    
+    def _cancel_stale_deferred_work(self):
+        with self.lock:
+            stale = [p for p, work in self.deferred_foreground_work.items()
+                     if work['generation'] != self.foreground_generation]
+            for p in stale:
+                self._cancel_deferred_foreground_work(p)
+    
+    def _run_deferred_foreground_work(self, pid, is_foreground):
+        with self.lock:
+            work = self.deferred_foreground_work.pop(pid, None)
+            if work is None:
+                return
+            if work['generation'] != self.foreground_generation:
+                self.deferred_stats['cancelled'] += 1
+                return
+        
+        try:
+            view = ProcessView(pid, ('name', 'exe', 'num_threads', 'memory_info', 'cpu_times'))
+        except (psutil.NoSuchProcess, psutil.AccessDenied) as e:
+            logger.debug(f"Could not build process view for deferred work on pid {pid}: {e}")
+            with self.lock:
+                self.deferred_stats['failed'] += 1
+            return
+        
+        try:
+            latency_span = self.foreground_latency.start_budget(pid)
+            self._apply_foreground_deep_optimizations(pid, view, work['cores'], work['desired_io'], latency_span)
+            with self.lock:
+                self.deferred_stats['executed'] += 1
+        finally:
+            with self.lock:
+                self.process_view_stats['passes'] += 1
+                self.process_view_stats['attribute_fetches'] += view.fetches
+                self.process_view_stats['syscalls_saved'] += view.reuses
+    
+    def _apply_foreground_deep_optimizations(self, pid, view, cores, desired_io, latency_span=None):
+        try:
+            process_name = view.name()
+            num_threads = view.num_threads()
+            
+            if num_threads <= 2:
+                workload = 'single_thread'
+                is_latency_sensitive = True
+            elif num_threads <= 8:
+                workload = 'latency_sensitive'
+                is_latency_sensitive = True
+            else:
+                workload = 'throughput'
+                is_latency_sensitive = False
+            
+            placement = self.cpu_pinning.apply_intelligent_pinning(pid, cores, workload, process_view=view)
+            solver_placed = bool(placement and placement.get('success'))
             
-            if gc_was_enabled:
-                gc.enable()
+            self.heterogeneous_scheduler.classify_and_schedule_threads(pid, is_latency_sensitive, set_affinity=not solver_placed)
+            
+            if is_latency_sensitive and not solver_placed:
+                self.smt_scheduler.assign_to_physical_cores(pid)
+            
+            self.cpu_frequency_scaler.set_turbo_mode(enable=True)
+            
+            if self.large_page_manager.should_enable_large_pages(pid, True, process_view=view):
+                self.large_page_manager.enable_large_pages_for_process(pid, process_view=view)
+            
+            if self.awe_manager.is_32bit_process(pid):
+                try:
+                    process_mem_mb = view.memory_mb()
+                    if process_mem_mb > 1024:
+                        self.awe_manager.enable_awe_for_process(pid)
+                except Exception as e:
+                    logger.debug(f"Error enabling AWE for pid {pid}: {e}")
+            
+            minimized_time = self._minimized_time(pid)
+            
+            self.memory_priority_manager.set_memory_priority(pid, 5, True, minimized_time)
+            
+            try:
+                exe_path = view.exe()
+                self.prefetch_optimizer.optimize_prefetch_for_process(pid, exe_path)
+            except Exception as e:
+                logger.debug(f"Error optimizing prefetch for pid {pid}: {e}")
+            
+            if not solver_placed:
+                try:
+                    self.numa_allocator.optimize_process_numa(pid, cores)
+                except Exception as e:
+                    logger.debug(f"Error optimizing NUMA for pid {pid}: {e}")
+            
+            try:
+                self.huge_pages_manager.monitor_process(pid, process_view=view)
+            except Exception as e:
+                logger.debug(f"Error monitoring huge pages for pid {pid}: {e}")
+            
+            try:
+                self.realtime_priority_mgr.monitor_realtime_process(pid, process_name, process_view=view)
+            except Exception as e:
+                logger.debug(f"Error monitoring realtime process for pid {pid}: {e}")
+            
+            try:
+                self.network_flow_prioritizer.prioritize_foreground_traffic(pid)
+            except Exception as e:
+                logger.debug(f"Error prioritizing network flow for pid {pid}: {e}")
+            
+            try:
+                if not solver_placed and self.l3_cache_optimizer.cache_groups:
+                    self.l3_cache_optimizer.optimize_process_cache_locality(pid, is_critical=True, handle_cache=self.handle_cache)
+            except Exception as e:
+                logger.debug(f"Error optimizing L3 cache for pid {pid}: {e}")
+            
+            if not solver_placed and self.foreground_latency.should_run_optional(latency_span, 'avx'):
+                try:
+                    if self.avx_instruction_optimizer.detect_avx_usage(pid, process_name):
+                        self.avx_instruction_optimizer.optimize_avx_process(pid)
+                except Exception as e:
+                    logger.debug(f"Error optimizing AVX for pid {pid}: {e}")
+            
+            if not solver_placed and self.foreground_latency.should_run_optional(latency_span, 'smt_tuning'):
+                try:
+                    if num_threads <= 4:
+                        self.enhanced_smt_optimizer.optimize_for_latency(pid, self.handle_cache)
+                    else:
+                        self.enhanced_smt_optimizer.optimize_for_throughput(pid, self.handle_cache)
+                except Exception as e:
+                    logger.debug(f"Error optimizing SMT for pid {pid}: {e}")
+            
+            if self.foreground_latency.should_run_optional(latency_span, 'cpu_pipeline'):
+                try:
+                    self.cpu_pipeline_optimizer.optimize_instruction_ordering(pid, is_critical=True)
+                except Exception as e:
+                    logger.debug(f"Error optimizing CPU pipeline for pid {pid}: {e}")
+            
+            if self.foreground_latency.should_run_optional(latency_span, 'tlb'):
+                try:
+                    self.tlb_optimizer.optimize_memory_layout(pid, process_view=view)
+                except Exception as e:
+                    logger.debug(f"Error optimizing TLB for pid {pid}: {e}")
+            
+            try:
+                if len(self.advanced_numa_optimizer.numa_nodes) > 1:
+                    self.advanced_numa_optimizer.optimize_numa_placement(pid)
+            except Exception as e:
+                logger.debug(f"Error optimizing advanced NUMA for pid {pid}: {e}")
+            
+            if self.foreground_latency.should_run_optional(latency_span, 'cache_coherency'):
+                try:
+                    self.cache_coherency_optimizer.optimize_thread_placement(pid, self.handle_cache)
+                except Exception as e:
+                    logger.debug(f"Error optimizing cache coherency for pid {pid}: {e}")
+            
+            try:
+                self.memory_bandwidth_manager.prioritize_foreground_memory_access(pid)
+            except Exception as e:
+                logger.debug(f"Error prioritizing memory bandwidth for pid {pid}: {e}")
+            
+            try:
+                self.io_priority_inheritance.inherit_io_priority(pid, desired_io)
+            except Exception as e:
+                logger.debug(f"Error inheriting I/O priority for pid {pid}: {e}")
+            
+        except Exception as e:
+            logger.error(f"Unhandled error in foreground optimization for pid {pid}: {e}")
+    
+    def get_process_view_stats(self):
+        with self.lock:
+            return self.process_view_stats.copy()
+    
+    def get_apply_executor_stats(self):
+        return self.apply_executor.get_stats()
+    
+    def get_group_apply_stats(self):
+        with self.lock:
+            stats = self.group_apply_stats.copy()
+            stats['foreground_group_size'] = len(self.foreground_group)
+            return stats
+    
+    def get_foreground_latency_stats(self):
+        return self.foreground_latency.get_stats()
+    
+    def get_handle_open_report(self):
+        return {
+            'process': self.handle_cache.get_open_rate_report(),
+            'thread': self.thread_handle_cache.get_stats()
+        }
+    
+    def get_deferred_work_stats(self):
+        with self.lock:
+            stats = self.deferred_stats.copy()
+            stats['pending'] = len(self.deferred_foreground_work)
+        stats['executor'] = self.deferred_executor.get_stats()
+        return stats
+    
+    def get_placement_stats(self):
+        return self.cpu_pinning.get_placement_stats()
+    
+    def get_migration_stats(self):
+        return self.migration_governor.get_stats()
+    
+    def get_timeseries_stats(self):
+        return self.timeseries.get_stats()
+    
+    def get_dvfs_stats(self):
+        return self.dvfs_scaler.get_stats()
+    
+    def get_working_set_trim_stats(self):
+        return self.workingset_optimizer.get_statistics()
+    
+    def get_reclaim_stats(self):
+        return self.reclaim_planner.get_stats()
+    
+    def get_standby_purge_stats(self):
+        return self.standby_purge_controller.get_stats()
+    
+    def get_memory_sampler_stats(self):
+        return self.memory_sampler.get_stats()
     
     def apply_settings_to_process_group(self, pid, is_foreground):
         
@@ -1184,6 +1432,11 @@ class UnifiedProcessManager:
         if not isinstance(is_foreground, bool):
             is_foreground = bool(is_foreground)
         
+        span = self.foreground_latency.get_span(pid) if is_foreground else None
+        if span is not None and 'debounce' not in span.stages:
+            span = None
+        self.foreground_latency.mark(span, 'queue')
+        
         try:
             main_process = psutil.Process(pid)
             process_name = main_process.name()
@@ -1191,7 +1444,8 @@ class UnifiedProcessManager:
             if not process_name.lower().endswith('.exe'):
                 return
             
-            if self.is_whitelisted(pid) or self.is_blacklisted(pid):
+            main_info = self._classify_process(pid)
+            if not main_info or main_info['whitelisted'] or main_info['blacklisted']:
                 return
             
             pids_to_set = set()
@@ -1199,42 +1453,53 @@ class UnifiedProcessManager:
             pids_to_set.update(self.get_process_children(pid))
             
             for p in self.get_processes_by_name(process_name):
-                try:
-                    if psutil.Process(p).username() == main_process.username():
-                        pids_to_set.add(p)
-                except Exception:
+                sibling_info = self._classify_process(p)
+                if sibling_info is None or sibling_info['username'] == main_info['username']:
                     pids_to_set.add(p)
             
+            target_pids = [target_pid for target_pid in pids_to_set if not self._is_excluded(target_pid)]
+            if is_foreground:
+                with self.lock:
+                    if pid == self.foreground_pid:
+                        self.foreground_group = set(target_pids)
+            self.foreground_latency.mark(span, 'group_expansion')
+            
             job_key = self._get_job_key(pid)
             job_handle = self._ensure_job_for_group(job_key, is_foreground)
             
+            if job_handle:
+                for target_pid in target_pids:
+                    self._assign_pid_to_job(target_pid, job_handle)
+            self.foreground_latency.mark(span, 'job_assign')
+            
             e_cores = self.pe_core_sets.get('e_cores', [])
             
-            for target_pid in list(pids_to_set):
-                if not psutil.pid_exists(target_pid):
-                    continue
-                
-                if self.is_whitelisted(target_pid) or self.is_blacklisted(target_pid):
-                    continue
-                
-                if job_handle:
-                    self._assign_pid_to_job(target_pid, job_handle)
-                
-                if not is_foreground and e_cores:
-                    try:
-                        handle = win32api.OpenProcess(PROCESS_SET_INFORMATION | PROCESS_QUERY_INFORMATION, False, target_pid)
-                        if handle:
-                            try:
-                                set_process_affinity_direct(handle, e_cores)
-                            finally:
-                                win32api.CloseHandle(handle)
-                    except Exception as e:
-                        logger.debug(f"Could not set background affinity for {target_pid}: {e}")
-                
-                self.apply_all_settings(target_pid, is_foreground)
+            for target_pid in target_pids:
+                with self.group_apply_locks[target_pid % len(self.group_apply_locks)]:
+                    if not is_foreground:
+                        with self.lock:
+                            if target_pid == self.foreground_pid or target_pid in self.foreground_group:
+                                self.group_apply_stats['background_skipped_foreground_member'] += 1
+                                continue
+                    
+                    if not is_foreground and e_cores:
+                        try:
+                            with self.handle_cache.borrow(target_pid, PROCESS_SET_INFORMATION | PROCESS_QUERY_INFORMATION) as handle:
+                                if handle:
+                                    set_process_affinity_direct(handle, e_cores)
+                        except Exception as e:
+                            logger.debug(f"Could not set background affinity for {target_pid}: {e}")
+                    
+                    self.apply_all_settings(target_pid, is_foreground)
+            
+            self.foreground_latency.mark(span, 'per_pid_apply')
+            self.foreground_latency.finish(span)
         
         except Exception as e:
             logger.error(f"Error applying settings to process group for pid {pid}: {e}")
+        finally:
+            if span is not None and self.foreground_latency.get_span(pid) is span:
+                self.foreground_latency.discard(pid)
     
     def _get_job_key(self, pid):
         try:
@@ -1247,6 +1512,10 @@ class UnifiedProcessManager:
             return (str(pid), 0)
     
     def _ensure_job_for_group(self, job_key, is_foreground):
+        with self.job_lock:
+            return self._ensure_job_for_group_locked(job_key, is_foreground)
+    
+    def _ensure_job_for_group_locked(self, job_key, is_foreground):
         job_info = self.jobs.get(job_key)
         if not job_info:
             try:
@@ -1259,7 +1528,7 @@ class UnifiedProcessManager:
         
         try:
             if job_info['is_foreground'] != is_foreground:
-                cpu_usage = psutil.cpu_percent(interval=0.1)
+                cpu_usage = self.cpu_load_sampler.get_system_percent()
                 
                 if is_foreground:
                     cpu_rate = 95
@@ -1291,22 +1560,25 @@ class UnifiedProcessManager:
         return job_info['handle']
     
     def _assign_pid_to_job(self, pid, job_handle):
+        with self.job_lock:
+            self._assign_pid_to_job_locked(pid, job_handle)
+    
+    def _assign_pid_to_job_locked(self, pid, job_handle):
         if pid in self.pid_to_job:
             return
         
         try:
-            hProc = win32api.OpenProcess(
-                win32con.PROCESS_SET_QUOTA | win32con.PROCESS_TERMINATE | 
-                win32con.PROCESS_SET_INFORMATION | win32con.PROCESS_QUERY_INFORMATION,
-                False, pid
-            )
-            try:
-                win32job.AssignProcessToJobObject(job_handle, hProc)
-                self.pid_to_job[pid] = job_handle
-            except Exception as e:
-                logger.debug(f"Failed to assign pid {pid} to job: {e}")
-            finally:
-                win32api.CloseHandle(hProc)
+            access = win32con.PROCESS_SET_QUOTA | win32con.PROCESS_TERMINATE | \
+                win32con.PROCESS_SET_INFORMATION | win32con.PROCESS_QUERY_INFORMATION
+            with self.handle_cache.borrow(pid, access) as hProc:
+                if not hProc:
+                    logger.debug(f"Could not open process {pid} to assign to job")
+                    return
+                try:
+                    win32job.AssignProcessToJobObject(job_handle, hProc)
+                    self.pid_to_job[pid] = job_handle
+                except Exception as e:
+                    logger.debug(f"Failed to assign pid {pid} to job: {e}")
         except Exception as e:
             logger.error(f"Failed to open process {pid} to assign to job: {e}")
     
@@ -1328,12 +1600,12 @@ class UnifiedProcessManager:
             logger.error(f"Failed to get standby memory: {e}")
             return 0
     
-    def clear_ram_cache(self):
+    def clear_ram_cache(self, mode='standbylist'):
         try:
             script_dir = os.path.dirname(os.path.abspath(__file__))
             exe_path = os.path.join(script_dir, 'emptystandbylist.exe')
             if os.path.exists(exe_path):
-                subprocess.Popen(exe_path, creationflags=subprocess.CREATE_NO_WINDOW)
+                subprocess.Popen([exe_path, mode], creationflags=subprocess.CREATE_NO_WINDOW)
                 return True
             return False
         except Exception as e:
@@ -1343,22 +1615,11 @@ class UnifiedProcessManager:
     def ram_monitor_worker(self):
         while self.ram_monitor_active:
             try:
-                current_time = time.time()
-                time_since_cleanup = current_time - self.last_ram_cleanup
-                
-                if time_since_cleanup >= self.ram_cleanup_cooldown:
-                    ram_usage = self.get_ram_usage_percent()
-                    standby_percent = self.get_standby_memory_percent()
-                    
-                    if ram_usage >= 75 and standby_percent >= 40:
-                        self.clear_ram_cache()
-                        self.last_ram_cleanup = current_time
-                        time.sleep(self.ram_cleanup_cooldown)
-                    else:
-                        time.sleep(60)
-                else:
-                    remaining_cooldown = self.ram_cleanup_cooldown - time_since_cleanup
-                    time.sleep(min(remaining_cooldown, 60))
+                pressure = self.reclaim_planner.sample(force=True)
+                event = self.standby_purge_controller.observe(pressure)
+                if event:
+                    logger.debug(f"Standby purge ({event['mode']}, {event['reason']}), next cooldown {event['cooldown']:.0f}s")
+                time.sleep(self.standby_purge_controller.poll_interval)
             except Exception as e:
                 logger.error(f"Error in RAM monitor worker: {e}")
                 time.sleep(60)
@@ -1396,13 +1657,14 @@ class UnifiedProcessManager:
                 self.applied_states.pop(pid, None)
                 self.pid_to_job.pop(pid, None)
                 self.decision_cache.invalidate(pid)
+                self.classification_cache.remove(pid)
             except Exception as e:
                 logger.error(f"Error cleaning up zombie process {pid}: {e}")
     
     def _check_and_suspend_inactive_processes(self):
         current_time = time.time()
         for pid, state in list(self.process_states.items()):
-            if self.is_whitelisted(pid) or self.is_blacklisted(pid):
+            if self._is_excluded(pid):
                 continue
             
             if not state.get('is_foreground') and pid != self.foreground_pid:
@@ -1414,7 +1676,26 @@ class UnifiedProcessManager:
                     except Exception as e:
                         logger.error(f"Error suspending process {pid}: {e}")
     
+    def _run_thermal_check(self):
+        if not self.modules_enabled['temperatura'] or not self.temp_monitor.monitoring_active:
+            return
+        
+        scheduler = self.thermal_aware_scheduler
+        scheduler.sample_core_temperatures()
+        
+        if not scheduler.predict_and_prevent_throttling():
+            return
+        
+        with self.lock:
+            movable_pids = [
+                pid for pid in self.process_states
+                if pid not in self.foreground_group and self.cpu_pinning.get_pinning_info(pid) is None
+            ]
+        
+        scheduler.rotate_loads_for_heat_distribution(movable_pids, self.handle_cache)
+    
     def update_all_processes(self):
+        self.thread_index.invalidate()
         ready_tasks = self.timer_coalescer.get_tasks_to_execute()
         
         for task_name, urgency in ready_tasks:
@@ -1424,9 +1705,6 @@ class UnifiedProcessManager:
                 if task_name == 'whitelist_reload':
                     self.load_whitelist()
                 
-                elif task_name == 'process_cache_update':
-                    current_exe_processes = self.process_snapshot.get_process_snapshot()
-                
                 elif task_name == 'zombie_cleanup':
                     self.clean_zombie_processes()
                 
@@ -1441,6 +1719,9 @@ class UnifiedProcessManager:
                 
                 elif task_name == 'handle_cache_cleanup':
                     self.handle_cache.cleanup_stale_handles()
+                    self.thread_handle_cache.cleanup_stale_handles()
+                    self.timeseries.cleanup_idle()
+                    self.reclaim_planner.cleanup()
                 
                 elif task_name == 'cpu_pinning_cleanup':
                     self.cpu_pinning.cleanup_dead_processes()
@@ -1450,6 +1731,9 @@ class UnifiedProcessManager:
                 
                 elif task_name == 'process_suspension_check':
                     self._check_and_suspend_inactive_processes()
+                
+                elif task_name == 'thermal_check':
+                    self._run_thermal_check()
             
             except Exception as e:
                 logger.error(f"Error executing coalesced task {task_name}: {e}")
@@ -1460,27 +1744,49 @@ class UnifiedProcessManager:
             self.timer_coalescer.mark_executed(task_name, execution_time_ms)
         
         try:
-            current_exe_processes = self.process_snapshot.get_process_snapshot()
+            created_pids, exited_pids = self.process_events.poll()
             
             with self.lock:
-                for pid, info in current_exe_processes.items():
-                    if self.is_whitelisted(pid) or self.is_blacklisted(pid):
+                for pid in exited_pids:
+                    self.process_states.pop(pid, None)
+                    self.applied_states.pop(pid, None)
+                    self.pid_to_job.pop(pid, None)
+                    self.foreground_group.discard(pid)
+                    self.classification_cache.remove(pid)
+                    self.apply_executor.cancel(pid)
+                    self._cancel_deferred_foreground_work(pid)
+                    self.thread_handle_cache.invalidate_pid(pid)
+                    self.handle_cache.invalidate(pid)
+                    self.cpu_load_sampler.untrack_pid(pid)
+                    self.migration_governor.forget(pid)
+                    self.workingset_optimizer.forget_process(pid)
+                    self.reclaim_planner.forget(pid)
+                
+                for pid in created_pids:
+                    if pid in self.process_states:
                         continue
                     
-                    if pid not in self.process_states:
-                        is_fg = (pid == self.foreground_pid)
-                        self.apply_settings_to_process_group(pid, is_fg)
-                        self.process_states[pid] = {
-                            'name': info['name'],
-                            'is_foreground': is_fg,
-                            'created_at': time.time()
-                        }
-                
-                for pid in list(self.process_states.keys()):
-                    if pid not in current_exe_processes:
-                        self.process_states.pop(pid, None)
-                        self.applied_states.pop(pid, None)
-                        self.pid_to_job.pop(pid, None)
+                    try:
+                        name = psutil.Process(pid).name()
+                    except psutil.NoSuchProcess:
+                        continue
+                    except psutil.AccessDenied:
+                        self.process_events.retry_later(pid)
+                        continue
+                    
+                    if not name.lower().endswith('.exe'):
+                        continue
+                    
+                    if self._is_excluded(pid):
+                        continue
+                    
+                    is_fg = (pid == self.foreground_pid)
+                    self.apply_executor.submit(pid, is_fg)
+                    self.process_states[pid] = {
+                        'name': name,
+                        'is_foreground': is_fg,
+                        'created_at': time.time()
+                    }
         
         except Exception as e:
             logger.error(f"Error in main process update loop: {e}")
@@ -1513,8 +1819,23 @@ class UnifiedProcessManager:
                 if self.modules_enabled['ajustes_varios']:
                     self.update_all_processes()
                 
-                if self.modules_enabled['temperatura'] and self.temp_monitor.monitoring_active:
-                    self.manage_thermal_throttling()
+                if self.modules_enabled['ram']:
+                    try:
+                        self.memory_sampler.snapshot()
+                    except Exception as e:
+                        logger.debug(f"Error refreshing memory snapshot: {e}")
+                
+                if self.modules_enabled['ram'] and iteration_count % 5 == 0:
+                    try:
+                        self.reclaim_planner.tick()
+                    except Exception as e:
+                        logger.debug(f"Error running reclaim planner: {e}")
+                
+                if self.modules_enabled['ram']:
+                    try:
+                        self.workingset_optimizer.process_pending()
+                    except Exception as e:
+                        logger.debug(f"Error processing working set trims: {e}")
                 
                 iteration_count += 1
                 
@@ -1541,6 +1862,12 @@ class UnifiedProcessManager:
                     except Exception as e:
                         logger.debug(f"Error tuning TCP congestion: {e}")
                 
+                if self.modules_enabled['energia'] and iteration_count % 10 == 0:
+                    try:
+                        self.dvfs_scaler.tick()
+                    except Exception as e:
+                        logger.debug(f"Error updating DVFS targets: {e}")
+                
                 if self.modules_enabled['ram'] and iteration_count % 50 == 0:
                     try:
                         self.memory_scrubbing_optimizer.schedule_scrubbing_low_load()
@@ -1549,7 +1876,7 @@ class UnifiedProcessManager:
                 
                 if iteration_count % 100 == 0:
                     try:
-                        cpu_percent = psutil.cpu_percent(interval=0.1)
+                        cpu_percent = self.cpu_load_sampler.get_average_system_percent()
                         if cpu_percent < 30:
                             gc.collect(generation=0)
                     except Exception as e:
@@ -1567,7 +1894,14 @@ class UnifiedProcessManager:
         except Exception as e:
             logger.critical(f"Main loop crashed: {e}")
         finally:
+            self.apply_executor.stop()
+            self.deferred_executor.stop()
+            self.cpu_load_sampler.stop()
+            self.process_events.stop()
+            self.workingset_optimizer.save_trim_profiles(force=True)
+            self.dvfs_scaler.restore()
             self.handle_cache.close_all()
+            self.thread_handle_cache.close_all()
             self.timer_coalescer._deactivate_high_resolution_timer()
             self.temp_monitor.cleanup()
 
@@ -1,4 +1,8 @@
+import os
+import json
 import time
+import struct
+import platform
 import psutil
 import win32api
 import win32con
@@ -8,7 +12,8 @@ import ctypes
 from ctypes import wintypes
 import threading
 import logging
-from collections import defaultdict
+from collections import defaultdict, deque
+from ajustes_varios import CoreSet, ProcessorGroupLayout, MigrationGovernor, TimeSeriesStore, PROCESSOR_GROUP_SIZE
 
 logger = logging.getLogger(__name__)
 
@@ -37,6 +42,16 @@ QUOTA_LIMITS_HARDWS_MIN_ENABLE = 0x00000001
 QUOTA_LIMITS_HARDWS_MAX_ENABLE = 0x00000002
 PROCESS_SET_INFORMATION = 0x0200
 PROCESS_QUERY_INFORMATION = 0x0400
+SLPI_EX_HEADER = struct.Struct('<II')
+SLPI_GROUP_AFFINITY = struct.Struct('<QH6x')
+SLPI_PROCESSOR_GROUP_INFO = struct.Struct('<BB38xQ')
+SYSTEM_CPU_SET_ENTRY = struct.Struct('<IIIHBBBBBB')
+CPU_SET_INFORMATION_TYPE = 0
+PLACEMENT_WIDTHS = {'single_thread': 1, 'latency_sensitive': 2, 'general': 4}
+PLACEMENT_SMT_PENALTY = 0.5
+PLACEMENT_E_CORE_PENALTY = 0.35
+PLACEMENT_CROSS_L3_PENALTY = 0.4
+PLACEMENT_DEMAND_CHANGE = 0.2
 
 ntdll = ctypes.WinDLL('ntdll')
 kernel32 = ctypes.WinDLL('kernel32')
@@ -60,6 +75,872 @@ class SYSTEM_LOGICAL_PROCESSOR_INFORMATION_UNION(ctypes.Union):
 class SYSTEM_LOGICAL_PROCESSOR_INFORMATION(ctypes.Structure):
     _fields_ = [("ProcessorMask", ctypes.c_ulonglong), ("Relationship", ctypes.wintypes.DWORD), ("u", SYSTEM_LOGICAL_PROCESSOR_INFORMATION_UNION)]
 
+class PROCESSOR_NUMBER(ctypes.Structure):
+    _fields_ = [('Group', ctypes.wintypes.WORD), ('Number', ctypes.wintypes.BYTE), ('Reserved', ctypes.wintypes.BYTE)]
+
+def _read_group_affinities(raw, offset, count):
+    affinities = []
+    for i in range(max(count, 1)):
+        mask, group = SLPI_GROUP_AFFINITY.unpack_from(raw, offset + i * SLPI_GROUP_AFFINITY.size)
+        affinities.append((group, mask))
+    return affinities
+
+def _core_set_from_affinities(layout, affinities):
+    cores = CoreSet()
+    for group, mask in affinities:
+        cores = cores | layout.core_set_from_group_mask(group, mask)
+    return cores
+
+def parse_logical_processor_information_ex(raw):
+    entries = []
+    group_masks = []
+    offset = 0
+    
+    while offset + SLPI_EX_HEADER.size <= len(raw):
+        relationship, size = SLPI_EX_HEADER.unpack_from(raw, offset)
+        if size == 0:
+            break
+        
+        if relationship == RelationGroup:
+            active_groups = struct.unpack_from('<H', raw, offset + 10)[0]
+            for i in range(active_groups):
+                _, _, active_mask = SLPI_PROCESSOR_GROUP_INFO.unpack_from(
+                    raw, offset + 32 + i * SLPI_PROCESSOR_GROUP_INFO.size
+                )
+                group_masks.append(active_mask)
+        else:
+            entries.append((relationship, offset))
+        
+        offset += size
+    
+    if group_masks:
+        layout = ProcessorGroupLayout(group_masks)
+    else:
+        highest = {}
+        for relationship, entry_offset in entries:
+            if relationship == RelationProcessorCore:
+                group_count = struct.unpack_from('<H', raw, entry_offset + 30)[0]
+                for group, mask in _read_group_affinities(raw, entry_offset + 32, group_count):
+                    highest[group] = highest.get(group, 0) | mask
+        layout = ProcessorGroupLayout([highest.get(g, 0) for g in range(max(highest) + 1)] if highest else [0])
+    
+    topology = {
+        'logical_count': layout.total,
+        'group_count': layout.group_count,
+        'group_sizes': [len(layout.group_bits[g]) for g in range(layout.group_count)],
+        'layout': layout,
+        'cores': [],
+        'packages': [],
+        'numa_nodes': {},
+        'caches': []
+    }
+    
+    for relationship, entry_offset in entries:
+        if relationship in (RelationProcessorCore, RelationProcessorPackage):
+            flags, efficiency_class = struct.unpack_from('<BB', raw, entry_offset + 8)
+            group_count = struct.unpack_from('<H', raw, entry_offset + 30)[0]
+            cpus = _core_set_from_affinities(layout, _read_group_affinities(raw, entry_offset + 32, group_count))
+            if relationship == RelationProcessorCore:
+                topology['cores'].append({'cpus': cpus, 'efficiency_class': efficiency_class, 'smt': bool(flags & 1)})
+            else:
+                topology['packages'].append(cpus)
+        
+        elif relationship == RelationNumaNode:
+            node_number = struct.unpack_from('<I', raw, entry_offset + 8)[0]
+            group_count = struct.unpack_from('<H', raw, entry_offset + 30)[0]
+            cpus = _core_set_from_affinities(layout, _read_group_affinities(raw, entry_offset + 32, group_count))
+            topology['numa_nodes'].setdefault(node_number, set()).update(cpus)
+        
+        elif relationship == RelationCache:
+            level, associativity, line_size, cache_size, cache_type = struct.unpack_from('<BBHII', raw, entry_offset + 8)
+            group_count = struct.unpack_from('<H', raw, entry_offset + 38)[0]
+            cpus = _core_set_from_affinities(layout, _read_group_affinities(raw, entry_offset + 40, group_count))
+            topology['caches'].append({
+                'level': level,
+                'type': cache_type,
+                'size': cache_size,
+                'line_size': line_size,
+                'cpus': cpus
+            })
+    
+    return topology
+
+def query_logical_processor_information_ex():
+    returned_length = wintypes.DWORD(0)
+    kernel32.GetLogicalProcessorInformationEx(RelationAll, None, ctypes.byref(returned_length))
+    if returned_length.value == 0:
+        return b''
+    
+    buf = (ctypes.c_byte * returned_length.value)()
+    if not kernel32.GetLogicalProcessorInformationEx(RelationAll, ctypes.byref(buf), ctypes.byref(returned_length)):
+        return b''
+    return bytes(buf)[:returned_length.value]
+
+def build_simulated_processor_information(group_sizes, threads_per_core=2, numa_nodes_per_group=1,
+                                          efficiency_classes=None, l3_size=32 * 1024 * 1024):
+    def entry(relationship, body):
+        return SLPI_EX_HEADER.pack(relationship, SLPI_EX_HEADER.size + len(body)) + body
+    
+    def processor_entry(relationship, group, mask, efficiency_class=0, smt=False):
+        body = struct.pack('<BB20xH', 1 if smt else 0, efficiency_class, 1) + SLPI_GROUP_AFFINITY.pack(mask, group)
+        return entry(relationship, body)
+    
+    raw = bytearray()
+    group_info = b''.join(SLPI_PROCESSOR_GROUP_INFO.pack(size, size, (1 << size) - 1) for size in group_sizes)
+    raw += entry(RelationGroup, struct.pack('<HH20x', len(group_sizes), len(group_sizes)) + group_info)
+    
+    core_index = 0
+    node_number = 0
+    for group, size in enumerate(group_sizes):
+        for first_bit in range(0, size, threads_per_core):
+            width = min(threads_per_core, size - first_bit)
+            mask = ((1 << width) - 1) << first_bit
+            efficiency_class = efficiency_classes[core_index] if efficiency_classes and core_index < len(efficiency_classes) else 0
+            raw += processor_entry(RelationProcessorCore, group, mask, efficiency_class, width > 1)
+            core_index += 1
+        
+        node_width = max(1, size // numa_nodes_per_group)
+        for first_bit in range(0, size, node_width):
+            width = min(node_width, size - first_bit)
+            mask = ((1 << width) - 1) << first_bit
+            raw += entry(RelationNumaNode, struct.pack('<I18xH', node_number, 1) + SLPI_GROUP_AFFINITY.pack(mask, group))
+            raw += entry(RelationCache, struct.pack('<BBHII18xH', 3, 16, 64, l3_size, CacheUnified, 1) + SLPI_GROUP_AFFINITY.pack(mask, group))
+            node_number += 1
+        
+        raw += processor_entry(RelationProcessorPackage, group, (1 << size) - 1)
+    
+    return bytes(raw)
+
+def simulate_cpu_topology(group_sizes, threads_per_core=2, numa_nodes_per_group=1, efficiency_classes=None):
+    raw = build_simulated_processor_information(group_sizes, threads_per_core, numa_nodes_per_group, efficiency_classes)
+    return parse_logical_processor_information_ex(raw)
+
+def build_fallback_topology(cpu_count):
+    layout = ProcessorGroupLayout.uniform(cpu_count)
+    return {
+        'logical_count': layout.total,
+        'group_count': layout.group_count,
+        'group_sizes': [len(layout.group_bits[g]) for g in range(layout.group_count)],
+        'layout': layout,
+        'cores': [],
+        'packages': [],
+        'numa_nodes': {0: set(range(cpu_count))},
+        'caches': []
+    }
+
+def _parse_cpu_list(text):
+    cpus = []
+    for part in text.strip().split(','):
+        if not part:
+            continue
+        if '-' in part:
+            start, end = part.split('-', 1)
+            cpus.extend(range(int(start), int(end) + 1))
+        else:
+            cpus.append(int(part))
+    return cpus
+
+def _parse_cache_size(text):
+    text = text.strip().upper()
+    multiplier = 1
+    if text.endswith('K'):
+        multiplier, text = 1024, text[:-1]
+    elif text.endswith('M'):
+        multiplier, text = 1024 * 1024, text[:-1]
+    return int(text) * multiplier if text.isdigit() else 0
+
+def _read_sysfs(path, default=None):
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return default
+
+def topology_from_fixture(data):
+    group_sizes = data.get('group_sizes') or [data.get('logical_count', 1)]
+    layout = ProcessorGroupLayout.from_group_sizes(group_sizes)
+    return {
+        'logical_count': layout.total,
+        'group_count': layout.group_count,
+        'group_sizes': list(group_sizes),
+        'layout': layout,
+        'cores': [
+            {'cpus': CoreSet.from_cores(core['cpus']), 'efficiency_class': core.get('efficiency_class', 0), 'smt': len(core['cpus']) > 1}
+            for core in data.get('cores', [])
+        ],
+        'packages': [CoreSet.from_cores(cpus) for cpus in data.get('packages', [])],
+        'numa_nodes': {int(node): set(cpus) for node, cpus in data.get('numa_nodes', {}).items()},
+        'caches': [
+            {
+                'level': cache['level'],
+                'type': cache.get('type', CacheUnified),
+                'size': cache.get('size', 0),
+                'line_size': cache.get('line_size', 64),
+                'cpus': CoreSet.from_cores(cache['cpus'])
+            }
+            for cache in data.get('caches', [])
+        ]
+    }
+
+def topology_to_fixture(topology):
+    return {
+        'group_sizes': list(topology['group_sizes']),
+        'cores': [{'cpus': core['cpus'].to_list(), 'efficiency_class': core['efficiency_class']} for core in topology['cores']],
+        'packages': [cpus.to_list() for cpus in topology['packages']],
+        'numa_nodes': {str(node): sorted(cpus) for node, cpus in topology['numa_nodes'].items()},
+        'caches': [
+            {'level': cache['level'], 'type': cache['type'], 'size': cache['size'], 'line_size': cache['line_size'], 'cpus': cache['cpus'].to_list()}
+            for cache in topology['caches']
+        ]
+    }
+
+class TopologyProvider:
+    _default = None
+    
+    def __init__(self, backend=None, fixture=None, cpu_count=None):
+        self.lock = threading.RLock()
+        if backend is None:
+            if fixture is not None:
+                backend = 'fixture'
+            else:
+                backend = 'windows' if platform.system() == 'Windows' else 'sysfs'
+        self.backend = backend
+        self.fixture = fixture
+        self.cpu_count = cpu_count
+        self.topology = None
+        self._derived = {}
+        self.stats = {
+            'backend': backend,
+            'loads': 0,
+            'load_errors': 0,
+            'load_time_ms': 0.0,
+            'fallback': False,
+            'queries': 0
+        }
+    
+    @classmethod
+    def set_default(cls, provider):
+        cls._default = provider
+    
+    @classmethod
+    def get_default(cls):
+        if cls._default is None:
+            cls._default = cls()
+        return cls._default
+    
+    def _load_windows(self):
+        raw = query_logical_processor_information_ex()
+        return parse_logical_processor_information_ex(raw) if raw else None
+    
+    def _load_sysfs(self):
+        base = '/sys/devices/system/cpu'
+        online = _read_sysfs(f'{base}/online')
+        if not online:
+            return None
+        cpu_ids = _parse_cpu_list(online)
+        
+        core_types = {}
+        for type_name, efficiency_class in (('cpu_core', 1), ('cpu_atom', 0)):
+            type_cpus = _read_sysfs(f'/sys/devices/{type_name}/cpus')
+            if type_cpus:
+                for cpu in _parse_cpu_list(type_cpus):
+                    core_types[cpu] = efficiency_class
+        
+        cores = {}
+        packages = defaultdict(set)
+        caches = {}
+        for cpu in cpu_ids:
+            topo = f'{base}/cpu{cpu}/topology'
+            siblings = _read_sysfs(f'{topo}/core_cpus_list') or _read_sysfs(f'{topo}/thread_siblings_list') or str(cpu)
+            sibling_cpus = tuple(_parse_cpu_list(siblings))
+            if sibling_cpus not in cores:
+                capacity = _read_sysfs(f'{base}/cpu{cpu}/cpu_capacity')
+                efficiency_class = core_types.get(cpu, int(capacity) if capacity and capacity.isdigit() else 0)
+                cores[sibling_cpus] = efficiency_class
+            packages[int(_read_sysfs(f'{topo}/physical_package_id', '0'))].add(cpu)
+            
+            index = 0
+            while True:
+                cache_dir = f'{base}/cpu{cpu}/cache/index{index}'
+                level = _read_sysfs(f'{cache_dir}/level')
+                if level is None:
+                    break
+                index += 1
+                shared = _read_sysfs(f'{cache_dir}/shared_cpu_list')
+                cache_type = {'Data': CacheData, 'Instruction': CacheInstruction}.get(_read_sysfs(f'{cache_dir}/type'), CacheUnified)
+                if not shared:
+                    continue
+                key = (int(level), cache_type, tuple(_parse_cpu_list(shared)))
+                if key not in caches:
+                    caches[key] = {
+                        'level': key[0],
+                        'type': cache_type,
+                        'size': _parse_cache_size(_read_sysfs(f'{cache_dir}/size', '0')),
+                        'line_size': int(_read_sysfs(f'{cache_dir}/coherency_line_size', '64') or 64),
+                        'cpus': list(key[2])
+                    }
+        
+        numa_nodes = {}
+        node_base = '/sys/devices/system/node'
+        try:
+            for entry in os.listdir(node_base):
+                if entry.startswith('node') and entry[4:].isdigit():
+                    node_cpus = _read_sysfs(f'{node_base}/{entry}/cpulist')
+                    if node_cpus:
+                        numa_nodes[entry[4:]] = _parse_cpu_list(node_cpus)
+        except OSError:
+            pass
+        
+        logical_count = max(cpu_ids) + 1
+        return topology_from_fixture({
+            'group_sizes': [min(PROCESSOR_GROUP_SIZE, logical_count - start) for start in range(0, logical_count, PROCESSOR_GROUP_SIZE)],
+            'cores': [{'cpus': list(cpus), 'efficiency_class': efficiency_class} for cpus, efficiency_class in cores.items()],
+            'packages': [sorted(cpus) for _, cpus in sorted(packages.items())],
+            'numa_nodes': numa_nodes or {'0': cpu_ids},
+            'caches': list(caches.values())
+        })
+    
+    def _load_fixture(self):
+        fixture = self.fixture
+        if isinstance(fixture, str):
+            with open(fixture) as f:
+                fixture = json.load(f)
+        return topology_from_fixture(fixture)
+    
+    def load(self):
+        with self.lock:
+            start = time.perf_counter()
+            topology = None
+            try:
+                loader = {'windows': self._load_windows, 'sysfs': self._load_sysfs, 'fixture': self._load_fixture}[self.backend]
+                topology = loader()
+            except Exception as e:
+                self.stats['load_errors'] += 1
+                logger.debug(f"Topology backend {self.backend} failed: {e}")
+            
+            self.stats['fallback'] = not topology or not topology['logical_count']
+            if self.stats['fallback']:
+                topology = build_fallback_topology(self.cpu_count or psutil.cpu_count(logical=True) or 1)
+            
+            self.topology = topology
+            self._derived = {}
+            self.stats['loads'] += 1
+            self.stats['load_time_ms'] = (time.perf_counter() - start) * 1000
+            return topology
+    
+    def get_topology(self):
+        with self.lock:
+            self.stats['queries'] += 1
+            if self.topology is None:
+                self.load()
+            return self.topology
+    
+    def _get_derived(self, key, builder):
+        with self.lock:
+            topology = self.get_topology()
+            if key not in self._derived:
+                self._derived[key] = builder(topology)
+            return self._derived[key]
+    
+    def get_layout(self):
+        return self.get_topology()['layout']
+    
+    def get_packages(self):
+        return list(self.get_topology()['packages'])
+    
+    def get_numa_nodes(self):
+        return {node: set(cpus) for node, cpus in self.get_topology()['numa_nodes'].items()}
+    
+    def get_cache_groups(self, level):
+        def build(topology):
+            groups = []
+            for cache in topology['caches']:
+                if cache['level'] == level and cache['type'] in (CacheUnified, CacheData) and cache['cpus'] not in groups:
+                    groups.append(cache['cpus'])
+            return groups
+        return list(self._get_derived(('cache', level), build))
+    
+    def get_cache_size_mb(self, level):
+        sizes = [cache['size'] for cache in self.get_topology()['caches'] if cache['level'] == level]
+        return max(sizes) / (1024 * 1024) if sizes else 0.0
+    
+    def get_smt_siblings(self):
+        def build(topology):
+            siblings = {}
+            for core in topology['cores']:
+                cpus = core['cpus'].to_list()
+                for cpu in cpus:
+                    siblings[cpu] = [c for c in cpus if c != cpu]
+            return siblings
+        return {cpu: list(others) for cpu, others in self._get_derived('smt', build).items()}
+    
+    def get_pe_core_sets(self):
+        def build(topology):
+            classes = {core['efficiency_class'] for core in topology['cores']}
+            if len(classes) <= 1:
+                return {'p_cores': list(range(topology['logical_count'])), 'e_cores': [], 'hybrid': False}
+            
+            top_class = max(classes)
+            p_cores = CoreSet()
+            e_cores = CoreSet()
+            for core in topology['cores']:
+                if core['efficiency_class'] == top_class:
+                    p_cores = p_cores | core['cpus']
+                else:
+                    e_cores = e_cores | core['cpus']
+            return {'p_cores': p_cores.to_list(), 'e_cores': e_cores.to_list(), 'hybrid': True}
+        derived = self._get_derived('pe', build)
+        return {'p_cores': list(derived['p_cores']), 'e_cores': list(derived['e_cores']), 'hybrid': derived['hybrid']}
+    
+    def save_fixture(self, path):
+        with open(path, 'w') as f:
+            json.dump(topology_to_fixture(self.get_topology()), f, indent=2)
+    
+    def get_stats(self):
+        with self.lock:
+            return dict(self.stats)
+
+class CpuSetPlacement:
+    
+    def __init__(self, layout=None, cpu_count=None):
+        self.lock = threading.RLock()
+        self.layout = layout or CoreSet.get_group_layout() or ProcessorGroupLayout.uniform(cpu_count or psutil.cpu_count(logical=True) or 1)
+        self.cpu_set_ids = {}
+        self.stats = {
+            'process_affinity_calls': 0,
+            'process_cpu_set_calls': 0,
+            'thread_group_affinity_calls': 0,
+            'thread_cpu_set_calls': 0,
+            'ideal_processor_calls': 0,
+            'failures': 0
+        }
+        if self.layout.group_count > 1:
+            self._load_cpu_set_ids()
+    
+    @property
+    def multi_group(self):
+        return self.layout.group_count > 1
+    
+    def _load_cpu_set_ids(self):
+        try:
+            returned_length = wintypes.ULONG(0)
+            kernel32.GetSystemCpuSetInformation(None, 0, ctypes.byref(returned_length), None, 0)
+            if returned_length.value == 0:
+                return
+            
+            buf = (ctypes.c_byte * returned_length.value)()
+            if not kernel32.GetSystemCpuSetInformation(ctypes.byref(buf), returned_length, ctypes.byref(returned_length), None, 0):
+                return
+            
+            self.load_cpu_set_entries(bytes(buf)[:returned_length.value])
+        except Exception as e:
+            logger.debug(f"Failed to query system CPU sets: {e}")
+    
+    def load_cpu_set_entries(self, raw):
+        offset = 0
+        cpu_set_ids = {}
+        while offset + SYSTEM_CPU_SET_ENTRY.size <= len(raw):
+            size, entry_type, cpu_set_id, group, logical_index = SYSTEM_CPU_SET_ENTRY.unpack_from(raw, offset)[:5]
+            if size == 0:
+                break
+            if entry_type == CPU_SET_INFORMATION_TYPE:
+                bits = self.layout.group_bits.get(group, [])
+                if logical_index in bits:
+                    cpu_set_ids[self.layout.group_offsets[group] + bits.index(logical_index)] = cpu_set_id
+            offset += size
+        
+        with self.lock:
+            self.cpu_set_ids = cpu_set_ids
+    
+    def _cpu_set_array(self, core_set):
+        ids = [self.cpu_set_ids[cpu] for cpu in core_set if cpu in self.cpu_set_ids]
+        if not ids:
+            return None, 0
+        return (ctypes.c_ulong * len(ids))(*ids), len(ids)
+    
+    def set_process_cores(self, handle, cores):
+        core_set = CoreSet.from_cores(cores)
+        if not handle or not core_set:
+            return False
+        
+        with self.lock:
+            try:
+                group_masks = self.layout.group_masks(core_set)
+                if not self.multi_group and group_masks:
+                    self.stats['process_affinity_calls'] += 1
+                    result = kernel32.SetProcessAffinityMask(int(handle), ULONG_PTR(group_masks.get(0, 0)))
+                else:
+                    ids, count = self._cpu_set_array(core_set)
+                    if not count:
+                        self.stats['failures'] += 1
+                        return False
+                    self.stats['process_cpu_set_calls'] += 1
+                    result = kernel32.SetProcessDefaultCpuSets(int(handle), ids, count)
+                
+                if not result:
+                    self.stats['failures'] += 1
+                return bool(result)
+            except Exception as e:
+                self.stats['failures'] += 1
+                logger.debug(f"Process placement failed: {e}")
+                return False
+    
+    def set_thread_cores(self, thread_handle, cores):
+        core_set = CoreSet.from_cores(cores)
+        if not thread_handle or not core_set:
+            return False
+        
+        with self.lock:
+            try:
+                group_masks = self.layout.group_masks(core_set)
+                if len(group_masks) == 1:
+                    group, mask = next(iter(group_masks.items()))
+                    affinity = GROUP_AFFINITY()
+                    affinity.Mask = mask
+                    affinity.Group = group
+                    self.stats['thread_group_affinity_calls'] += 1
+                    result = kernel32.SetThreadGroupAffinity(int(thread_handle), ctypes.byref(affinity), None)
+                else:
+                    ids, count = self._cpu_set_array(core_set)
+                    if not count:
+                        self.stats['failures'] += 1
+                        return False
+                    self.stats['thread_cpu_set_calls'] += 1
+                    result = kernel32.SetThreadSelectedCpuSets(int(thread_handle), ids, count)
+                
+                if not result:
+                    self.stats['failures'] += 1
+                return bool(result)
+            except Exception as e:
+                self.stats['failures'] += 1
+                logger.debug(f"Thread placement failed: {e}")
+                return False
+    
+    def set_thread_ideal_processor(self, thread_handle, cpu):
+        if not thread_handle or cpu >= self.layout.total:
+            return False
+        
+        with self.lock:
+            try:
+                group, number = self.layout.location(cpu)
+                processor = PROCESSOR_NUMBER()
+                processor.Group = group
+                processor.Number = number
+                self.stats['ideal_processor_calls'] += 1
+                return bool(kernel32.SetThreadIdealProcessorEx(int(thread_handle), ctypes.byref(processor), None))
+            except Exception as e:
+                self.stats['failures'] += 1
+                logger.debug(f"Setting ideal processor failed: {e}")
+                return False
+    
+    def get_stats(self):
+        with self.lock:
+            stats = self.stats.copy()
+            stats['group_count'] = self.layout.group_count
+            stats['cpu_set_ids'] = len(self.cpu_set_ids)
+            return stats
+
+class CpuLoadSampler:
+    
+    def __init__(self, sample_interval_ms=500, history_size=32, pid_idle_ttl_seconds=30.0, timeseries=None):
+        self.lock = threading.RLock()
+        self.sample_interval = sample_interval_ms / 1000.0
+        self.history_size = history_size
+        self.pid_idle_ttl = pid_idle_ttl_seconds
+        self.cpu_count = psutil.cpu_count(logical=True) or 1
+        
+        self.timeseries = timeseries or TimeSeriesStore(capacity=history_size)
+        self.pid_samples = {}
+        self.last_sample_time = 0.0
+        
+        self.active = False
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.stats = {
+            'samples': 0,
+            'sample_errors': 0,
+            'system_reads': 0,
+            'pid_reads': 0,
+            'pid_misses': 0,
+            'pids_expired': 0
+        }
+        
+        try:
+            psutil.cpu_percent(interval=None, percpu=True)
+        except Exception:
+            pass
+    
+    def start(self):
+        with self.lock:
+            if self.active:
+                return
+            self.active = True
+            self.stop_event.clear()
+            self.sample_once()
+            self.thread = threading.Thread(target=self._sampler_loop, daemon=True, name="CpuLoadSampler")
+            self.thread.start()
+    
+    def stop(self):
+        with self.lock:
+            self.active = False
+        self.stop_event.set()
+    
+    def _sampler_loop(self):
+        while not self.stop_event.wait(self.sample_interval):
+            self.sample_once()
+    
+    def sample_once(self):
+        try:
+            per_core = psutil.cpu_percent(interval=None, percpu=True)
+        except Exception as e:
+            with self.lock:
+                self.stats['sample_errors'] += 1
+            logger.debug(f"CPU load sampling error: {e}")
+            return False
+        
+        with self.lock:
+            tracked = list(self.pid_samples.items())
+        
+        pid_values = {}
+        for pid, entry in tracked:
+            try:
+                pid_values[pid] = entry['process'].cpu_percent(interval=None)
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                pid_values[pid] = None
+            except Exception:
+                pid_values[pid] = None
+        
+        now = time.time()
+        self.timeseries.record_cores('cpu_load', per_core[:self.cpu_count], now)
+        if per_core:
+            self.timeseries.record('cpu_load', sum(per_core) / len(per_core), timestamp=now)
+        
+        with self.lock:
+            for pid, value in pid_values.items():
+                entry = self.pid_samples.get(pid)
+                if entry is None:
+                    continue
+                if value is None or now - entry['last_access'] > self.pid_idle_ttl:
+                    del self.pid_samples[pid]
+                    self.timeseries.drop_pid(pid)
+                    self.stats['pids_expired'] += 1
+                    continue
+                self.timeseries.record('cpu_percent', value, pid=pid, timestamp=now)
+            
+            self.last_sample_time = now
+            self.stats['samples'] += 1
+        return True
+    
+    def track_pid(self, pid):
+        with self.lock:
+            entry = self.pid_samples.get(pid)
+            if entry is not None:
+                entry['last_access'] = time.time()
+                return True
+        
+        try:
+            process = psutil.Process(pid)
+            process.cpu_percent(interval=None)
+        except Exception:
+            return False
+        
+        with self.lock:
+            self.pid_samples.setdefault(pid, {
+                'process': process,
+                'last_access': time.time()
+            })
+        return True
+    
+    def get_system_percent(self, default=0.0):
+        with self.lock:
+            self.stats['system_reads'] += 1
+        latest = self.timeseries.latest('cpu_load')
+        if latest is not None:
+            return latest
+        try:
+            return psutil.cpu_percent(interval=None)
+        except Exception:
+            return default
+    
+    def get_average_system_percent(self, samples=5):
+        if self.timeseries.latest('cpu_load') is None:
+            return self.get_system_percent()
+        return self.timeseries.mean('cpu_load', count=samples)
+    
+    def get_per_core_percents(self):
+        with self.lock:
+            self.stats['system_reads'] += 1
+        if self.last_sample_time:
+            return self.timeseries.latest_cores('cpu_load', self.cpu_count)
+        try:
+            return psutil.cpu_percent(interval=None, percpu=True)
+        except Exception:
+            return [0.0] * self.cpu_count
+    
+    def get_core_history(self, core_idx):
+        if 0 <= core_idx < self.cpu_count:
+            return list(self.timeseries.values('cpu_load', core=core_idx))
+        return []
+    
+    def get_core_load_ewma(self, alpha=0.3):
+        return self.timeseries.ewma_cores('cpu_load', self.cpu_count, alpha=alpha)
+    
+    def get_pid_percent(self, pid, default=0.0):
+        with self.lock:
+            self.stats['pid_reads'] += 1
+            entry = self.pid_samples.get(pid)
+            if entry is not None:
+                entry['last_access'] = time.time()
+                return self.timeseries.latest('cpu_percent', pid=pid, default=default)
+            self.stats['pid_misses'] += 1
+        
+        self.track_pid(pid)
+        return default
+    
+    def untrack_pid(self, pid):
+        with self.lock:
+            self.pid_samples.pop(pid, None)
+        self.timeseries.drop_pid(pid)
+    
+    def get_stats(self):
+        with self.lock:
+            stats = self.stats.copy()
+            stats['tracked_pids'] = len(self.pid_samples)
+            stats['sample_age_ms'] = (time.time() - self.last_sample_time) * 1000 if self.last_sample_time else None
+            return stats
+
+class _OwnedThreadHandle:
+    __slots__ = ('thread_id', 'access', 'handle')
+    
+    def __init__(self, thread_id, access):
+        self.thread_id = thread_id
+        self.access = access
+        self.handle = None
+    
+    def __enter__(self):
+        self.handle = kernel32.OpenThread(self.access, False, self.thread_id)
+        return self.handle
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.handle:
+            kernel32.CloseHandle(self.handle)
+            self.handle = None
+        return False
+
+def _acquire_thread_handle(thread_handle_cache, thread_id, access, pid=None):
+    if thread_handle_cache is not None:
+        return thread_handle_cache.borrow(thread_id, access, pid)
+    return _OwnedThreadHandle(thread_id, access)
+
+class ThreadSnapshotIndex:
+    
+    def __init__(self, max_age_ms=1000, min_refresh_interval_ms=100, backend=None):
+        self.lock = threading.RLock()
+        self.max_age = max_age_ms / 1000.0
+        self.min_refresh_interval = min_refresh_interval_ms / 1000.0
+        self.backend = backend or ('toolhelp' if platform.system() == 'Windows' else 'proc')
+        self.threads_by_pid = {}
+        self.snapshot_time = 0.0
+        self.stale = True
+        self.stats = {
+            'snapshots': 0,
+            'snapshot_errors': 0,
+            'snapshot_time_ms': 0.0,
+            'lookups': 0,
+            'lookup_misses': 0,
+            'threads_indexed': 0
+        }
+    
+    def invalidate(self):
+        with self.lock:
+            self.stale = True
+    
+    def _snapshot_toolhelp(self):
+        threads_by_pid = defaultdict(list)
+        snapshot_handle = kernel32.CreateToolhelp32Snapshot(TH32CS_SNAPTHREAD, 0)
+        if snapshot_handle == -1 or snapshot_handle == 0:
+            return None
+        
+        try:
+            te32 = THREADENTRY32()
+            te32.dwSize = ctypes.sizeof(THREADENTRY32)
+            
+            if kernel32.Thread32First(snapshot_handle, ctypes.byref(te32)):
+                while True:
+                    threads_by_pid[te32.th32OwnerProcessID].append(te32.th32ThreadID)
+                    if not kernel32.Thread32Next(snapshot_handle, ctypes.byref(te32)):
+                        break
+        finally:
+            kernel32.CloseHandle(snapshot_handle)
+        
+        return dict(threads_by_pid)
+    
+    def _read_proc_tasks(self, pid):
+        try:
+            return [int(tid) for tid in os.listdir(f'/proc/{pid}/task') if tid.isdigit()]
+        except OSError:
+            return None
+    
+    def _snapshot_proc(self):
+        threads_by_pid = {}
+        for entry in os.listdir('/proc'):
+            if not entry.isdigit():
+                continue
+            pid = int(entry)
+            tids = self._read_proc_tasks(pid)
+            if tids:
+                threads_by_pid[pid] = tids
+        return threads_by_pid
+    
+    def refresh(self):
+        start_time = time.perf_counter()
+        try:
+            if self.backend == 'toolhelp':
+                threads_by_pid = self._snapshot_toolhelp()
+            else:
+                threads_by_pid = self._snapshot_proc()
+        except Exception as e:
+            logger.debug(f"Thread snapshot failed: {e}")
+            threads_by_pid = None
+        
+        with self.lock:
+            if threads_by_pid is None:
+                self.stats['snapshot_errors'] += 1
+                return False
+            
+            self.threads_by_pid = threads_by_pid
+            self.snapshot_time = time.time()
+            self.stale = False
+            self.stats['snapshots'] += 1
+            self.stats['snapshot_time_ms'] += (time.perf_counter() - start_time) * 1000
+            self.stats['threads_indexed'] = sum(len(tids) for tids in threads_by_pid.values())
+            return True
+    
+    def get_threads(self, pid):
+        with self.lock:
+            self.stats['lookups'] += 1
+            age = time.time() - self.snapshot_time
+            
+            if self.stale or age > self.max_age:
+                self.refresh()
+            
+            tids = self.threads_by_pid.get(pid)
+            if tids is None and time.time() - self.snapshot_time > self.min_refresh_interval:
+                self.refresh()
+                tids = self.threads_by_pid.get(pid)
+            
+            if tids is None:
+                self.stats['lookup_misses'] += 1
+                return []
+            return list(tids)
+    
+    def get_stats(self):
+        with self.lock:
+            stats = self.stats.copy()
+            stats['indexed_pids'] = len(self.threads_by_pid)
+            stats['lookups_per_snapshot'] = stats['lookups'] / stats['snapshots'] if stats['snapshots'] else 0.0
+            return stats
+
 class CPUParkingController:
     def __init__(self):
         self.lock = threading.RLock()
@@ -101,77 +982,61 @@ class CPUParkingController:
         with self.lock:
             pass
 class HeterogeneousThreadScheduler:
-    def __init__(self, handle_cache, p_cores, e_cores):
+    def __init__(self, handle_cache, p_cores, e_cores, thread_index=None, thread_handle_cache=None, placement=None):
         self.handle_cache = handle_cache
         self.p_cores = p_cores
         self.e_cores = e_cores
+        self.placement = placement or CpuSetPlacement()
+        self.thread_index = thread_index or ThreadSnapshotIndex()
+        self.thread_handle_cache = thread_handle_cache
         self.lock = threading.RLock()
         self.thread_classifications = {}
     
-    def classify_and_schedule_threads(self, pid, is_latency_sensitive):
+    def classify_and_schedule_threads(self, pid, is_latency_sensitive, set_affinity=True):
         with self.lock:
             try:
-                snapshot_handle = kernel32.CreateToolhelp32Snapshot(TH32CS_SNAPTHREAD, 0)
-                
-                if snapshot_handle == -1 or snapshot_handle == 0:
-                    return False
-                
                 threads_scheduled = 0
                 target_cores = self.p_cores if is_latency_sensitive else self.e_cores
                 
                 if not target_cores:
                     target_cores = self.p_cores
                 
-                try:
-                    te32 = THREADENTRY32()
-                    te32.dwSize = ctypes.sizeof(THREADENTRY32)
-                    
-                    if kernel32.Thread32First(snapshot_handle, ctypes.byref(te32)):
-                        while True:
-                            try:
-                                if te32.th32OwnerProcessID == pid:
-                                    thread_id = te32.th32ThreadID
+                target_set = CoreSet.from_cores(target_cores)
+                
+                thread_ids = self.thread_index.get_threads(pid)
+                if self.thread_handle_cache is not None:
+                    self.thread_handle_cache.retain_threads(pid, thread_ids)
+                
+                for thread_id in thread_ids:
+                    try:
+                        with _acquire_thread_handle(
+                            self.thread_handle_cache,
+                            thread_id,
+                            THREAD_SET_INFORMATION | THREAD_QUERY_INFORMATION,
+                            pid
+                        ) as thread_handle:
+                            if thread_handle:
+                                if is_latency_sensitive:
+                                    throttling_state = THREAD_POWER_THROTTLING_STATE()
+                                    throttling_state.Version = 1
+                                    throttling_state.ControlMask = THREAD_POWER_THROTTLING_VALID_FLAGS
+                                    throttling_state.StateMask = 0
                                     
-                                    thread_handle = kernel32.OpenThread(
-                                        THREAD_SET_INFORMATION | THREAD_QUERY_INFORMATION,
-                                        False,
-                                        thread_id
+                                    ntdll.NtSetInformationThread(
+                                        thread_handle,
+                                        ThreadPowerThrottling,
+                                        ctypes.byref(throttling_state),
+                                        ctypes.sizeof(throttling_state)
                                     )
-                                    
-                                    if thread_handle:
-                                        try:
-                                            if is_latency_sensitive:
-                                                throttling_state = THREAD_POWER_THROTTLING_STATE()
-                                                throttling_state.Version = 1
-                                                throttling_state.ControlMask = THREAD_POWER_THROTTLING_VALID_FLAGS
-                                                throttling_state.StateMask = 0
-                                                
-                                                ntdll.NtSetInformationThread(
-                                                    thread_handle,
-                                                    ThreadPowerThrottling,
-                                                    ctypes.byref(throttling_state),
-                                                    ctypes.sizeof(throttling_state)
-                                                )
-                                            
-                                            affinity_mask = 0
-                                            for core in target_cores:
-                                                affinity_mask |= (1 << core)
-                                            
-                                            kernel32.SetThreadAffinityMask(thread_handle, affinity_mask)
-                                            
-                                            threads_scheduled += 1
-                                            
-                                            self.thread_classifications[thread_id] = 'latency' if is_latency_sensitive else 'throughput'
-                                            
-                                        finally:
-                                            kernel32.CloseHandle(thread_handle)
-                            except Exception:
-                                pass
-                            
-                            if not kernel32.Thread32Next(snapshot_handle, ctypes.byref(te32)):
-                                break
-                finally:
-                    kernel32.CloseHandle(snapshot_handle)
+                                
+                                if set_affinity:
+                                    self.placement.set_thread_cores(thread_handle, target_set)
+                                
+                                threads_scheduled += 1
+                                
+                                self.thread_classifications[thread_id] = 'latency' if is_latency_sensitive else 'throughput'
+                    except Exception:
+                        pass
                 
                 return threads_scheduled > 0
                 
@@ -182,43 +1047,26 @@ class HeterogeneousThreadScheduler:
         with self.lock:
             pass
 class SMTScheduler:
-    def __init__(self, cpu_count):
+    def __init__(self, cpu_count, handle_cache=None, topology_provider=None):
         self.cpu_count = cpu_count
+        self.handle_cache = handle_cache
+        self.topology_provider = topology_provider or TopologyProvider.get_default()
         self.lock = threading.RLock()
         self.sibling_map = {}
         self._detect_siblings()
     
     def _detect_siblings(self):
         try:
-            returned_length = wintypes.DWORD(0)
-            kernel32.GetLogicalProcessorInformationEx(RelationProcessorCore, None, ctypes.byref(returned_length))
-            buf_size = returned_length.value
-            
-            if buf_size > 0:
-                buf = (ctypes.c_byte * buf_size)()
-                if kernel32.GetLogicalProcessorInformationEx(RelationProcessorCore, ctypes.byref(buf), ctypes.byref(returned_length)):
-                    offset = 0
-                    while offset < buf_size:
-                        entry = SYSTEM_LOGICAL_PROCESSOR_INFORMATION_EX.from_buffer_copy(buf[offset:])
-                        if entry.Relationship == RelationProcessorCore:
-                            proc_rel = entry.u.Processor
-                            if proc_rel.GroupCount > 0:
-                                mask = proc_rel.GroupMask[0].Mask
-                                cpus = []
-                                bit = 0
-                                temp_mask = mask
-                                while temp_mask:
-                                    if temp_mask & 1:
-                                        cpus.append(bit)
-                                    temp_mask >>= 1
-                                    bit += 1
-                                
-                                for cpu in cpus:
-                                    self.sibling_map[cpu] = [c for c in cpus if c != cpu]
-                        
-                        offset += entry.Size
-        except Exception:
-            pass
+            self.sibling_map = self.topology_provider.get_smt_siblings()
+        except Exception as e:
+            logger.debug(f"SMT sibling detection error: {e}")
+    
+    def _set_affinity(self, handle, cores):
+        if not handle:
+            return False
+        
+        affinity_mask = CoreSet.from_cores(cores).affinity_mask()
+        return bool(kernel32.SetProcessAffinityMask(handle, ULONG_PTR(affinity_mask)))
     
     def get_physical_cores_only(self):
         with self.lock:
@@ -242,23 +1090,16 @@ class SMTScheduler:
             try:
                 physical_cores = self.get_physical_cores_only()
                 
-                handle = win32api.OpenProcess(PROCESS_SET_INFORMATION | PROCESS_QUERY_INFORMATION, False, pid)
-                if not handle:
-                    return False
+                if self.handle_cache is not None:
+                    with self.handle_cache.borrow(pid, PROCESS_SET_INFORMATION | PROCESS_QUERY_INFORMATION) as handle:
+                        return self._set_affinity(handle, physical_cores)
                 
+                handle = win32api.OpenProcess(PROCESS_SET_INFORMATION | PROCESS_QUERY_INFORMATION, False, pid)
                 try:
-                    affinity_mask = 0
-                    for core in physical_cores:
-                        affinity_mask |= (1 << core)
-                    
-                    result = kernel32.SetProcessAffinityMask(handle, ULONG_PTR(affinity_mask))
-                    
-                    if result:
-                        return True
-                    
-                    return False
+                    return self._set_affinity(handle, physical_cores)
                 finally:
-                    win32api.CloseHandle(handle)
+                    if handle:
+                        win32api.CloseHandle(handle)
             except Exception:
                 return False
     
@@ -297,44 +1138,18 @@ class CPUFrequencyScaler:
         with self.lock:
             pass
 class L3CacheOptimizer:
-    def __init__(self, topology):
+    def __init__(self, topology, topology_provider=None):
         self.lock = threading.RLock()
         self.topology = topology
+        self.topology_provider = topology_provider or TopologyProvider.get_default()
         self.cache_groups = self._detect_l3_cache_groups()
         self.process_assignments = {}
     
     def _detect_l3_cache_groups(self):
         cache_groups = defaultdict(set)
         try:
-            returned_length = wintypes.DWORD(0)
-            kernel32.GetLogicalProcessorInformation(None, ctypes.byref(returned_length))
-            
-            if returned_length.value > 0:
-                buf = (ctypes.c_byte * returned_length.value)()
-                if not kernel32.GetLogicalProcessorInformation(ctypes.byref(buf), ctypes.byref(returned_length)):
-                    return cache_groups
-                
-                entry_size = ctypes.sizeof(SYSTEM_LOGICAL_PROCESSOR_INFORMATION)
-                entry_count = returned_length.value // entry_size
-                
-                for i in range(entry_count):
-                    offset = i * entry_size
-                    entry = SYSTEM_LOGICAL_PROCESSOR_INFORMATION.from_buffer_copy(buf[offset:offset+entry_size])
-                    
-                    if entry.Relationship == RelationCache:
-                        cache_desc = entry.u.Cache
-                        if cache_desc.Level == 3:
-                            mask = entry.ProcessorMask
-                            cores = []
-                            core_idx = 0
-                            while mask:
-                                if mask & 1:
-                                    cores.append(core_idx)
-                                mask >>= 1
-                                core_idx += 1
-                            
-                            cache_id = i
-                            cache_groups[cache_id].update(cores)
+            for cache_id, cores in enumerate(self.topology_provider.get_cache_groups(3)):
+                cache_groups[cache_id].update(cores)
         except Exception:
             pass
         return cache_groups
@@ -357,13 +1172,13 @@ class L3CacheOptimizer:
                             best_cache_group = cores
                     
                     if best_cache_group:
-                        handle = handle_cache.get_handle(pid, PROCESS_SET_INFORMATION | PROCESS_QUERY_INFORMATION)
-                        if handle:
-                            affinity_mask = sum(1 << core for core in best_cache_group)
-                            result = kernel32.SetProcessAffinityMask(handle, ULONG_PTR(affinity_mask))
-                            if result:
-                                self.process_assignments[pid] = list(best_cache_group)
-                                return True
+                        with handle_cache.borrow(pid, PROCESS_SET_INFORMATION | PROCESS_QUERY_INFORMATION) as handle:
+                            if handle:
+                                affinity_mask = CoreSet.from_cores(best_cache_group).affinity_mask()
+                                result = kernel32.SetProcessAffinityMask(handle, ULONG_PTR(affinity_mask))
+                                if result:
+                                    self.process_assignments[pid] = list(best_cache_group)
+                                    return True
             except Exception:
                 pass
             return False
@@ -381,82 +1196,37 @@ class L3CacheOptimizer:
             return False, None, []
 class EnhancedCacheTopologyOptimizer:
     
-    def __init__(self, topology):
+    def __init__(self, topology, topology_provider=None, migration_governor=None):
         self.lock = threading.RLock()
         self.topology = topology
+        self.topology_provider = topology_provider or TopologyProvider.get_default()
         self.l2_cache_groups = self._detect_l2_cache_groups()
         self.l3_cache_groups = self._detect_l3_cache_groups()
+        self.migration_governor = migration_governor or MigrationGovernor(
+            l3_groups=list(self.l3_cache_groups.values()),
+            l3_size_mb=self.topology_provider.get_cache_size_mb(3) or 32.0
+        )
         self.process_cache_assignments = {}
         self.cache_contention_scores = defaultdict(float)
         self.last_rebalance = time.time()
     
-    def _detect_l2_cache_groups(self):
+    def _detect_cache_groups(self, level):
         cache_groups = defaultdict(set)
         try:
-            returned_length = wintypes.DWORD(0)
-            kernel32.GetLogicalProcessorInformation(None, ctypes.byref(returned_length))
-            
-            if returned_length.value > 0:
-                buf = (ctypes.c_byte * returned_length.value)()
-                if not kernel32.GetLogicalProcessorInformation(ctypes.byref(buf), ctypes.byref(returned_length)):
-                    return cache_groups
-                
-                entry_size = ctypes.sizeof(SYSTEM_LOGICAL_PROCESSOR_INFORMATION)
-                entry_count = returned_length.value // entry_size
-                
-                for i in range(entry_count):
-                    offset = i * entry_size
-                    entry = SYSTEM_LOGICAL_PROCESSOR_INFORMATION.from_buffer_copy(buf[offset:offset+entry_size])
-                    
-                    if entry.Relationship == RelationCache:
-                        cache_desc = entry.u.Cache
-                        if cache_desc.Level == 2:
-                            mask = entry.ProcessorMask
-                            cores = self._mask_to_cores(mask)
-                            cache_id = f"L2_{i}"
-                            cache_groups[cache_id].update(cores)
+            for i, cores in enumerate(self.topology_provider.get_cache_groups(level)):
+                cache_groups[f"L{level}_{i}"].update(cores)
         except Exception as e:
-            logger.debug(f"L2 cache detection error: {e}")
+            logger.debug(f"L{level} cache detection error: {e}")
         return cache_groups
     
+    def _detect_l2_cache_groups(self):
+        return self._detect_cache_groups(2)
+    
     def _detect_l3_cache_groups(self):
-        cache_groups = defaultdict(set)
-        try:
-            returned_length = wintypes.DWORD(0)
-            kernel32.GetLogicalProcessorInformation(None, ctypes.byref(returned_length))
-            
-            if returned_length.value > 0:
-                buf = (ctypes.c_byte * returned_length.value)()
-                if not kernel32.GetLogicalProcessorInformation(ctypes.byref(buf), ctypes.byref(returned_length)):
-                    return cache_groups
-                
-                entry_size = ctypes.sizeof(SYSTEM_LOGICAL_PROCESSOR_INFORMATION)
-                entry_count = returned_length.value // entry_size
-                
-                for i in range(entry_count):
-                    offset = i * entry_size
-                    entry = SYSTEM_LOGICAL_PROCESSOR_INFORMATION.from_buffer_copy(buf[offset:offset+entry_size])
-                    
-                    if entry.Relationship == RelationCache:
-                        cache_desc = entry.u.Cache
-                        if cache_desc.Level == 3:
-                            mask = entry.ProcessorMask
-                            cores = self._mask_to_cores(mask)
-                            cache_id = f"L3_{i}"
-                            cache_groups[cache_id].update(cores)
-        except Exception as e:
-            logger.debug(f"L3 cache detection error: {e}")
-        return cache_groups
+        return self._detect_cache_groups(3)
     
     def _mask_to_cores(self, mask):
-        cores = []
-        core_idx = 0
-        while mask:
-            if mask & 1:
-                cores.append(core_idx)
-            mask >>= 1
-            core_idx += 1
-        return cores
+        return CoreSet.from_mask(mask).to_list()
     
     def assign_process_to_cache_group(self, pid, process_name, related_pids=None, handle_cache=None):
         with self.lock:
@@ -486,18 +1256,19 @@ class EnhancedCacheTopologyOptimizer:
                 
                 if target_cache_group and handle_cache:
                     cores = self.l3_cache_groups[target_cache_group]
-                    handle = handle_cache.get_handle(pid, PROCESS_SET_INFORMATION | PROCESS_QUERY_INFORMATION)
-                    if handle:
-                        affinity_mask = sum(1 << core for core in cores)
-                        result = kernel32.SetProcessAffinityMask(handle, ULONG_PTR(affinity_mask))
-                        if result:
-                            self.process_cache_assignments[pid] = {
-                                'cache_group': target_cache_group,
-                                'cores': list(cores),
-                                'assigned_at': time.time()
-                            }
-                            logger.debug(f"Process {pid} assigned to cache group {target_cache_group}")
-                            return True
+                    with handle_cache.borrow(pid, PROCESS_SET_INFORMATION | PROCESS_QUERY_INFORMATION) as handle:
+                        if handle:
+                            affinity_mask = CoreSet.from_cores(cores).affinity_mask()
+                            result = kernel32.SetProcessAffinityMask(handle, ULONG_PTR(affinity_mask))
+                            if result:
+                                self.process_cache_assignments[pid] = {
+                                    'cache_group': target_cache_group,
+                                    'cores': list(cores),
+                                    'assigned_at': time.time()
+                                }
+                                self.migration_governor.observe(pid, cores)
+                                logger.debug(f"Process {pid} assigned to cache group {target_cache_group}")
+                                return True
             except Exception as e:
                 logger.debug(f"Cache assignment error for pid {pid}: {e}")
             return False
@@ -561,18 +1332,26 @@ class EnhancedCacheTopologyOptimizer:
                 for i, pid in enumerate(processes_to_move[:move_count]):
                     target_cache_id = low_contention_groups[i % len(low_contention_groups)]
                     cores = self.l3_cache_groups[target_cache_id]
+                    source_cores = self.process_cache_assignments[pid]['cores']
+                    benefit = self.cache_contention_scores[high_cache_id] - self.cache_contention_scores[target_cache_id]
                     
-                    handle = handle_cache.get_handle(pid, PROCESS_SET_INFORMATION | PROCESS_QUERY_INFORMATION)
-                    if handle:
-                        affinity_mask = sum(1 << core for core in cores)
-                        result = kernel32.SetProcessAffinityMask(handle, ULONG_PTR(affinity_mask))
-                        if result:
-                            self.process_cache_assignments[pid] = {
-                                'cache_group': target_cache_id,
-                                'cores': list(cores),
-                                'assigned_at': time.time()
-                            }
-                            logger.debug(f"Rebalanced process {pid} from {high_cache_id} to {target_cache_id}")
+                    if not self.migration_governor.evaluate(pid, cores, benefit, source_cores):
+                        continue
+                    
+                    with handle_cache.borrow(pid, PROCESS_SET_INFORMATION | PROCESS_QUERY_INFORMATION) as handle:
+                        if handle:
+                            affinity_mask = CoreSet.from_cores(cores).affinity_mask()
+                            result = kernel32.SetProcessAffinityMask(handle, ULONG_PTR(affinity_mask))
+                            if result:
+                                self.process_cache_assignments[pid] = {
+                                    'cache_group': target_cache_id,
+                                    'cores': list(cores),
+                                    'assigned_at': time.time()
+                                }
+                                self.migration_governor.record(pid, cores, source_cores)
+                                self.cache_contention_scores[high_cache_id] -= 1.0 / max(len(self.l3_cache_groups[high_cache_id]), 1)
+                                self.cache_contention_scores[target_cache_id] += 1.0 / max(len(cores), 1)
+                                logger.debug(f"Rebalanced process {pid} from {high_cache_id} to {target_cache_id}")
         except Exception as e:
             logger.debug(f"Rebalancing error: {e}")
     
@@ -639,20 +1418,20 @@ class AVXInstructionOptimizer:
                     return False
                 
                 if self.avx_capable_cores:
-                    handle = self.handle_cache.get_handle(pid, PROCESS_SET_INFORMATION | PROCESS_QUERY_INFORMATION)
-                    if handle:
+                    with self.handle_cache.borrow(pid, PROCESS_SET_INFORMATION | PROCESS_QUERY_INFORMATION) as handle:
+                        if handle:
 
-                        cores_to_use = max(len(self.avx_capable_cores) // 2, min(4, len(self.avx_capable_cores)))
-                        affinity_mask = sum(1 << core for core in self.avx_capable_cores[:cores_to_use])
-                        result = kernel32.SetProcessAffinityMask(handle, ULONG_PTR(affinity_mask))
-                        if result:
-                            self.avx_processes[pid]['optimized'] = True
-                            
-                            try:
-                                win32process.SetPriorityClass(handle, win32process.ABOVE_NORMAL_PRIORITY_CLASS)
-                            except Exception:
-                                pass
-                            return True
+                            cores_to_use = max(len(self.avx_capable_cores) // 2, min(4, len(self.avx_capable_cores)))
+                            affinity_mask = CoreSet.from_cores(self.avx_capable_cores[:cores_to_use]).affinity_mask()
+                            result = kernel32.SetProcessAffinityMask(handle, ULONG_PTR(affinity_mask))
+                            if result:
+                                self.avx_processes[pid]['optimized'] = True
+                                
+                                try:
+                                    win32process.SetPriorityClass(handle, win32process.ABOVE_NORMAL_PRIORITY_CLASS)
+                                except Exception:
+                                    pass
+                                return True
             except Exception:
                 pass
             return False
@@ -694,13 +1473,13 @@ class EnhancedSMTOptimizer:
                 if not self.physical_cores:
                     return False
                 
-                handle = handle_cache.get_handle(pid, PROCESS_SET_INFORMATION | PROCESS_QUERY_INFORMATION)
-                if handle:
-                    affinity_mask = sum(1 << core for core in self.physical_cores)
-                    result = kernel32.SetProcessAffinityMask(handle, ULONG_PTR(affinity_mask))
-                    if result:
-                        self.process_smt_config[pid] = 'latency'
-                        return True
+                with handle_cache.borrow(pid, PROCESS_SET_INFORMATION | PROCESS_QUERY_INFORMATION) as handle:
+                    if handle:
+                        affinity_mask = CoreSet.from_cores(self.physical_cores).affinity_mask()
+                        result = kernel32.SetProcessAffinityMask(handle, ULONG_PTR(affinity_mask))
+                        if result:
+                            self.process_smt_config[pid] = 'latency'
+                            return True
             except Exception:
                 pass
             return False
@@ -709,13 +1488,13 @@ class EnhancedSMTOptimizer:
 
         with self.lock:
             try:
-                handle = handle_cache.get_handle(pid, PROCESS_SET_INFORMATION | PROCESS_QUERY_INFORMATION)
-                if handle:
-                    affinity_mask = (1 << self.cpu_count) - 1
-                    result = kernel32.SetProcessAffinityMask(handle, ULONG_PTR(affinity_mask))
-                    if result:
-                        self.process_smt_config[pid] = 'throughput'
-                        return True
+                with handle_cache.borrow(pid, PROCESS_SET_INFORMATION | PROCESS_QUERY_INFORMATION) as handle:
+                    if handle:
+                        affinity_mask = CoreSet.range(self.cpu_count).affinity_mask()
+                        result = kernel32.SetProcessAffinityMask(handle, ULONG_PTR(affinity_mask))
+                        if result:
+                            self.process_smt_config[pid] = 'throughput'
+                            return True
             except Exception:
                 pass
             return False
@@ -729,19 +1508,19 @@ class CPUPipelineOptimizer:
 
         with self.lock:
             try:
-                handle = self.handle_cache.get_handle(pid, PROCESS_SET_INFORMATION | PROCESS_QUERY_INFORMATION)
-                if not handle:
-                    return False
-                
-                if is_critical:
-                    kernel32.SetProcessPriorityBoost(handle, wintypes.BOOL(False))
-                    
-                    try:
-                        win32process.SetPriorityClass(handle, win32process.HIGH_PRIORITY_CLASS)
-                    except Exception:
-                        pass
+                with self.handle_cache.borrow(pid, PROCESS_SET_INFORMATION | PROCESS_QUERY_INFORMATION) as handle:
+                    if not handle:
+                        return False
                     
-                    return True
+                    if is_critical:
+                        kernel32.SetProcessPriorityBoost(handle, wintypes.BOOL(False))
+                        
+                        try:
+                            win32process.SetPriorityClass(handle, win32process.HIGH_PRIORITY_CLASS)
+                        except Exception:
+                            pass
+                        
+                        return True
             except Exception:
                 pass
             return False
@@ -759,41 +1538,275 @@ class TLBOptimizer:
                 if pid in self.large_page_processes:
                     return True
                 
-                handle = self.handle_cache.get_handle(pid, PROCESS_SET_QUOTA | PROCESS_QUERY_INFORMATION)
-                if handle:
-                    min_ws = 1024 * 1024 * 1024
-                    max_ws = 4 * 1024 * 1024 * 1024
-                    flags = QUOTA_LIMITS_HARDWS_MIN_ENABLE | QUOTA_LIMITS_HARDWS_MAX_ENABLE
-                    
-                    result = kernel32.SetProcessWorkingSetSizeEx(handle, min_ws, max_ws, flags)
-                    if result:
-                        self.large_page_processes.add(pid)
-                        return True
+                with self.handle_cache.borrow(pid, PROCESS_SET_QUOTA | PROCESS_QUERY_INFORMATION) as handle:
+                    if handle:
+                        min_ws = 1024 * 1024 * 1024
+                        max_ws = 4 * 1024 * 1024 * 1024
+                        flags = QUOTA_LIMITS_HARDWS_MIN_ENABLE | QUOTA_LIMITS_HARDWS_MAX_ENABLE
+                        
+                        result = kernel32.SetProcessWorkingSetSizeEx(handle, min_ws, max_ws, flags)
+                        if result:
+                            self.large_page_processes.add(pid)
+                            return True
             except Exception:
                 pass
             return False
     
-    def optimize_memory_layout(self, pid):
+    def optimize_memory_layout(self, pid, process_view=None):
 
         with self.lock:
             try:
-                proc = psutil.Process(pid)
-                mem_info = proc.memory_info()
+                if process_view is not None:
+                    mem_info = process_view.memory_info()
+                else:
+                    mem_info = psutil.Process(pid).memory_info()
                 
                 if mem_info.rss > 512 * 1024 * 1024:
                     return self.enable_large_pages(pid)
             except Exception:
                 pass
             return False
+class PlacementSolver:
+    
+    def __init__(self, topology_provider=None, cpu_sampler=None, cpu_count=None,
+                 migration_cost=0.15, resolve_interval_seconds=5.0):
+        self.lock = threading.RLock()
+        self.topology_provider = topology_provider or TopologyProvider.get_default()
+        self.cpu_sampler = cpu_sampler
+        self.cpu_count = cpu_count or self.topology_provider.get_topology()['logical_count']
+        self.migration_cost = migration_cost
+        self.resolve_interval = resolve_interval_seconds
+        self.requests = {}
+        self.assignments = {}
+        self.dirty = False
+        self.last_solve = 0.0
+        self.move_history = deque(maxlen=64)
+        self.stats = {
+            'solves': 0,
+            'skipped_solves': 0,
+            'placements': 0,
+            'moves': 0,
+            'kept': 0,
+            'last_solve_moves': 0,
+            'last_solve_ms': 0.0
+        }
+        self.load_topology()
+    
+    def load_topology(self):
+        with self.lock:
+            self.siblings = self.topology_provider.get_smt_siblings()
+            groups = self.topology_provider.get_cache_groups(3) or [CoreSet.range(self.cpu_count)]
+            self.l3_groups = [group.to_list() for group in groups]
+            self.l3_of = {}
+            for index, cpus in enumerate(self.l3_groups):
+                for cpu in cpus:
+                    self.l3_of.setdefault(cpu, index)
+            self.e_cores = set(self.topology_provider.get_pe_core_sets()['e_cores'])
+            self.dirty = True
+    
+    def _estimate_demand(self, pid, workload, allowed_count):
+        default = {'single_thread': 0.5, 'latency_sensitive': 1.0, 'general': 1.0}.get(workload, max(1.0, allowed_count / 2))
+        if self.cpu_sampler is None:
+            return default
+        percent = self.cpu_sampler.get_pid_percent(pid, default=None)
+        return default if percent is None else max(0.05, percent / 100.0)
+    
+    def update_process(self, pid, allowed_cores, workload='general', demand=None):
+        allowed = tuple(sorted({core for core in allowed_cores if 0 <= core < self.cpu_count}))
+        if demand is None:
+            demand = self._estimate_demand(pid, workload, len(allowed))
+        
+        with self.lock:
+            previous = self.requests.get(pid)
+            if (previous is not None and previous['allowed'] == allowed and previous['workload'] == workload
+                    and abs(previous['demand'] - demand) <= PLACEMENT_DEMAND_CHANGE):
+                return False
+            
+            self.requests[pid] = {
+                'allowed': allowed,
+                'workload': workload,
+                'demand': demand,
+                'latency': workload in ('single_thread', 'latency_sensitive')
+            }
+            self.dirty = True
+            return True
+    
+    def remove_process(self, pid):
+        with self.lock:
+            self.assignments.pop(pid, None)
+            if self.requests.pop(pid, None) is not None:
+                self.dirty = True
+                return True
+            return False
+    
+    def get_assignment(self, pid):
+        with self.lock:
+            cores = self.assignments.get(pid)
+            return list(cores) if cores else None
+    
+    def get_pids(self):
+        with self.lock:
+            return list(self.requests.keys())
+    
+    def _core_loads(self):
+        loads = [0.0] * self.cpu_count
+        try:
+            if self.cpu_sampler is not None:
+                for core, load in enumerate(self.cpu_sampler.get_core_load_ewma()[:self.cpu_count]):
+                    loads[core] = load / 100.0
+            else:
+                for core, percent in enumerate(psutil.cpu_percent(interval=None, percpu=True)[:self.cpu_count]):
+                    loads[core] = percent / 100.0
+        except Exception as e:
+            logger.debug(f"Placement load sampling failed: {e}")
+        
+        incumbent = [0.0] * self.cpu_count
+        for pid, cores in self.assignments.items():
+            request = self.requests.get(pid)
+            if request and cores:
+                share = request['demand'] / len(cores)
+                for core in cores:
+                    incumbent[core] += share
+        return [max(load, held) for load, held in zip(loads, incumbent)]
+    
+    def _occupy(self, pid, cores, loads, latency_cores, sign):
+        request = self.requests.get(pid)
+        if not request or not cores:
+            return
+        share = request['demand'] / len(cores)
+        for core in cores:
+            loads[core] = max(0.0, loads[core] + sign * share)
+            if request['latency']:
+                latency_cores[core] = latency_cores.get(core, 0) + sign
+    
+    def _core_cost(self, core, request, loads, latency_cores):
+        cost = loads[core]
+        if request['latency']:
+            if core in self.e_cores:
+                cost += PLACEMENT_E_CORE_PENALTY
+            if latency_cores.get(core):
+                cost += 1.0
+            elif any(latency_cores.get(sibling) for sibling in self.siblings.get(core, ())):
+                cost += PLACEMENT_SMT_PENALTY
+        return cost
+    
+    def _set_cost(self, cores, request, loads, latency_cores):
+        cost = sum(self._core_cost(core, request, loads, latency_cores) for core in cores)
+        cost += PLACEMENT_CROSS_L3_PENALTY * (len({self.l3_of.get(core) for core in cores}) - 1)
+        chosen = set()
+        for core in cores:
+            if any(sibling in chosen for sibling in self.siblings.get(core, ())):
+                cost += PLACEMENT_SMT_PENALTY
+            chosen.add(core)
+        return cost
+    
+    def _best_set(self, request, width, loads, latency_cores):
+        allowed = request['allowed']
+        if width >= len(allowed):
+            return self._set_cost(allowed, request, loads, latency_cores), allowed
+        
+        allowed_set = set(allowed)
+        pools = [[core for core in group if core in allowed_set] for group in self.l3_groups]
+        pools = [pool for pool in pools if len(pool) >= width] or [list(allowed)]
+        
+        best = None
+        for pool in pools:
+            chosen = []
+            for _ in range(width):
+                core = min(
+                    (c for c in pool if c not in chosen),
+                    key=lambda c: self._core_cost(c, request, loads, latency_cores) +
+                    (PLACEMENT_SMT_PENALTY if any(s in chosen for s in self.siblings.get(c, ())) else 0.0)
+                )
+                chosen.append(core)
+            candidate = tuple(sorted(chosen))
+            cost = self._set_cost(candidate, request, loads, latency_cores)
+            if best is None or cost < best[0]:
+                best = (cost, candidate)
+        return best
+    
+    def solve(self, force=False):
+        with self.lock:
+            now = time.time()
+            if not force and not self.dirty and now - self.last_solve < self.resolve_interval:
+                self.stats['skipped_solves'] += 1
+                return None
+            
+            start = time.perf_counter()
+            loads = self._core_loads()
+            latency_cores = {}
+            for pid, cores in self.assignments.items():
+                if pid in self.requests and self.requests[pid]['latency']:
+                    for core in cores:
+                        latency_cores[core] = latency_cores.get(core, 0) + 1
+            plan = {}
+            kept = 0
+            
+            order = sorted(self.requests.items(), key=lambda item: (not item[1]['latency'], -item[1]['demand'], item[0]))
+            for pid, request in order:
+                if not request['allowed']:
+                    continue
+                
+                width = min(PLACEMENT_WIDTHS.get(request['workload'], len(request['allowed'])), len(request['allowed']))
+                current = self.assignments.get(pid)
+                self._occupy(pid, current, loads, latency_cores, -1)
+                best_cost, cores = self._best_set(request, width, loads, latency_cores)
+                
+                if current is not None and current != cores and len(current) == width and set(current) <= set(request['allowed']):
+                    if self._set_cost(current, request, loads, latency_cores) <= best_cost + self.migration_cost * width:
+                        cores = current
+                        kept += 1
+                
+                plan[pid] = cores
+                self._occupy(pid, cores, loads, latency_cores, 1)
+            
+            changed = [pid for pid, cores in plan.items() if self.assignments.get(pid) != cores]
+            moves = sum(1 for pid in changed if pid in self.assignments)
+            
+            self.assignments = plan
+            self.dirty = False
+            self.last_solve = now
+            self.move_history.append(moves)
+            self.stats['solves'] += 1
+            self.stats['placements'] += len(changed) - moves
+            self.stats['moves'] += moves
+            self.stats['kept'] += kept
+            self.stats['last_solve_moves'] = moves
+            self.stats['last_solve_ms'] = (time.perf_counter() - start) * 1000
+            
+            if moves:
+                logger.debug(f"Placement solve moved {moves} of {len(plan)} processes")
+            
+            return {
+                'changed': {pid: list(plan[pid]) for pid in changed},
+                'moves': moves,
+                'processes': len(plan)
+            }
+    
+    def get_stats(self):
+        with self.lock:
+            stats = dict(self.stats)
+            stats['managed_processes'] = len(self.requests)
+            stats['recent_moves'] = list(self.move_history)
+            return stats
+
 class CPUPinningEngine:
-    def __init__(self, handle_cache, cpu_count, numa_topology=None):
+    def __init__(self, handle_cache, cpu_count, numa_topology=None, cpu_sampler=None, thread_index=None,
+                 thread_handle_cache=None, placement=None, topology_provider=None):
         self.handle_cache = handle_cache
         self.cpu_count = cpu_count
         self.numa_topology = numa_topology or {}
+        self.placement = placement or CpuSetPlacement(self.numa_topology.get('layout'), cpu_count)
+        self.cpu_sampler = cpu_sampler
+        self.thread_index = thread_index or ThreadSnapshotIndex()
+        self.thread_handle_cache = thread_handle_cache
+        self.solver = PlacementSolver(topology_provider, cpu_sampler, cpu_count)
         
         self.pinned_processes = {}
         self.core_assignments = defaultdict(set)
         self.thread_affinity_cache = {}
+        self.placement_modes = {}
+        self.active_pids = set()
         
         self.lock = threading.RLock()
         
@@ -809,12 +1822,11 @@ class CPUPinningEngine:
                 return result
             
             try:
-                handle = win32api.OpenProcess(PROCESS_SET_INFORMATION | PROCESS_QUERY_INFORMATION, False, pid)
-                if not handle:
-                    return result
-                
-                try:
-                    success = set_process_affinity_direct(handle, [core_id])
+                with self.handle_cache.borrow(pid, PROCESS_SET_INFORMATION | PROCESS_QUERY_INFORMATION) as handle:
+                    if not handle:
+                        return result
+                    
+                    success = self.placement.set_process_cores(handle, CoreSet((core_id,)))
                     
                     if not success:
                         return result
@@ -837,8 +1849,6 @@ class CPUPinningEngine:
                         'threads_pinned': threads_pinned
                     })
                     
-                finally:
-                    win32api.CloseHandle(handle)
                 
             except Exception as e:
                 logger.debug(f"Error pinning threads for PID {pid}: {type(e).__name__}: {e}")
@@ -849,49 +1859,29 @@ class CPUPinningEngine:
         threads_pinned = 0
         
         try:
-            snapshot_handle = kernel32.CreateToolhelp32Snapshot(TH32CS_SNAPTHREAD, 0)
+            thread_ids = self.thread_index.get_threads(pid)
+            if self.thread_handle_cache is not None:
+                self.thread_handle_cache.retain_threads(pid, thread_ids)
             
-            if snapshot_handle == -1 or snapshot_handle == 0:
-                return 0
-            
-            try:
-                te32 = THREADENTRY32()
-                te32.dwSize = ctypes.sizeof(THREADENTRY32)
-                
-                if kernel32.Thread32First(snapshot_handle, ctypes.byref(te32)):
-                    while True:
-                        try:
-                            if te32.th32OwnerProcessID == pid:
-                                thread_id = te32.th32ThreadID
-                                
-                                thread_handle = kernel32.OpenThread(
-                                    THREAD_SET_INFORMATION | THREAD_QUERY_INFORMATION,
-                                    False,
-                                    thread_id
-                                )
-                                
-                                if thread_handle:
-                                    try:
-                                        kernel32.SetThreadIdealProcessor(thread_handle, core_id)
-                                        
-                                        affinity_mask = 1 << core_id
-                                        kernel32.SetThreadAffinityMask(thread_handle, affinity_mask)
-                                        
-                                        threads_pinned += 1
-                                        
-                                        if pid not in self.thread_affinity_cache:
-                                            self.thread_affinity_cache[pid] = {}
-                                        self.thread_affinity_cache[pid][thread_id] = core_id
-                                        
-                                    finally:
-                                        kernel32.CloseHandle(thread_handle)
-                        except Exception as e:
-                            logger.debug(f"Error pinning thread {thread_id}: {type(e).__name__}: {e}")
-                        
-                        if not kernel32.Thread32Next(snapshot_handle, ctypes.byref(te32)):
-                            break
-            finally:
-                kernel32.CloseHandle(snapshot_handle)
+            for thread_id in thread_ids:
+                try:
+                    with _acquire_thread_handle(
+                        self.thread_handle_cache,
+                        thread_id,
+                        THREAD_SET_INFORMATION | THREAD_QUERY_INFORMATION,
+                        pid
+                    ) as thread_handle:
+                        if thread_handle:
+                            self.placement.set_thread_ideal_processor(thread_handle, core_id)
+                            self.placement.set_thread_cores(thread_handle, CoreSet((core_id,)))
+                            
+                            threads_pinned += 1
+                            
+                            if pid not in self.thread_affinity_cache:
+                                self.thread_affinity_cache[pid] = {}
+                            self.thread_affinity_cache[pid][thread_id] = core_id
+                except Exception as e:
+                    logger.debug(f"Error pinning thread {thread_id}: {type(e).__name__}: {e}")
         
         except Exception:
             pass
@@ -904,13 +1894,11 @@ class CPUPinningEngine:
                 return False
             
             try:
-                handle = win32api.OpenProcess(PROCESS_SET_INFORMATION | PROCESS_QUERY_INFORMATION, False, pid)
-                if not handle:
-                    return False
-                
-                try:
-                    all_cores = list(range(self.cpu_count))
-                    set_process_affinity_direct(handle, all_cores)
+                with self.handle_cache.borrow(pid, PROCESS_SET_INFORMATION | PROCESS_QUERY_INFORMATION) as handle:
+                    if not handle:
+                        return False
+                    
+                    self.placement.set_process_cores(handle, CoreSet.range(self.cpu_count))
                     
                     pinning_info = self.pinned_processes[pid]
                     core_id = pinning_info['core']
@@ -921,14 +1909,22 @@ class CPUPinningEngine:
                     if pid in self.thread_affinity_cache:
                         del self.thread_affinity_cache[pid]
                     
+                    self.placement_modes.pop(pid, None)
+                    self.active_pids.discard(pid)
+                    self.solver.remove_process(pid)
                     return True
                 
-                finally:
-                    win32api.CloseHandle(handle)
                 
             except Exception:
                 return False
     
+    def release_process(self, pid):
+        with self.lock:
+            self._forget_pin(pid)
+            self.placement_modes.pop(pid, None)
+            self.active_pids.discard(pid)
+            self.solver.remove_process(pid)
+    
     def get_least_loaded_core(self, core_candidates):
         if not core_candidates:
             return 0
@@ -939,7 +1935,10 @@ class CPUPinningEngine:
                 loads[core_id] = len(self.core_assignments.get(core_id, set()))
             
             try:
-                per_cpu_percent = psutil.cpu_percent(interval=0.1, percpu=True)
+                if self.cpu_sampler is not None:
+                    per_cpu_percent = self.cpu_sampler.get_per_core_percents()
+                else:
+                    per_cpu_percent = psutil.cpu_percent(interval=None, percpu=True)
                 
                 scores = {}
                 for core_id in core_candidates:
@@ -969,53 +1968,69 @@ class CPUPinningEngine:
         except Exception:
             return available_cores
     
-    def apply_intelligent_pinning(self, pid, available_cores, workload_type='general'):
+    def _forget_pin(self, pid):
+        pinning_info = self.pinned_processes.pop(pid, None)
+        if pinning_info is not None:
+            self.core_assignments[pinning_info['core']].discard(pid)
+        self.thread_affinity_cache.pop(pid, None)
+    
+    def _apply_assignment(self, pid, cores, mode):
+        if len(cores) == 1:
+            pinning_info = self.pinned_processes.get(pid)
+            if pinning_info is not None and pinning_info['core'] != cores[0]:
+                self._forget_pin(pid)
+            result = self.pin_process_to_core(pid, cores[0], pin_threads=True)
+        else:
+            self._forget_pin(pid)
+            with self.handle_cache.borrow(pid, PROCESS_SET_INFORMATION | PROCESS_QUERY_INFORMATION) as handle:
+                if not handle:
+                    return {'success': False}
+                result = {'success': self.placement.set_process_cores(handle, cores), 'cores': cores, 'mode': mode}
+        
+        self.placement_modes[pid] = mode
+        return result
+    
+    def apply_intelligent_pinning(self, pid, available_cores, workload_type='general', process_view=None):
         with self.lock:
             try:
                 numa_cores = self.get_numa_preferred_cores(available_cores)
                 
-                handle = win32api.OpenProcess(PROCESS_SET_INFORMATION | PROCESS_QUERY_INFORMATION, False, pid)
-                if not handle:
-                    return {'success': False}
+                if process_view is not None:
+                    num_threads = process_view.num_threads()
+                else:
+                    num_threads = psutil.Process(pid).num_threads()
                 
-                try:
-                    process = psutil.Process(pid)
-                    num_threads = process.num_threads()
-                    
-                    if workload_type == 'single_thread' or num_threads <= 2:
-                        best_core = self.get_least_loaded_core(numa_cores)
-                        return self.pin_process_to_core(pid, best_core, pin_threads=True)
-                    
-                    elif workload_type == 'latency_sensitive':
-                        if len(numa_cores) >= 2:
-                            sorted_cores = sorted(numa_cores, 
-                                                key=lambda c: len(self.core_assignments.get(c, set())))
-                            selected_cores = sorted_cores[:2]
-                            
-                            set_process_affinity_direct(handle, selected_cores)
-                            return {'success': True, 'cores': selected_cores, 'mode': 'soft_affinity'}
-                        else:
-                            best_core = self.get_least_loaded_core(numa_cores)
-                            return self.pin_process_to_core(pid, best_core, pin_threads=True)
-                    
-                    elif workload_type == 'throughput':
-                        set_process_affinity_direct(handle, numa_cores)
-                        return {'success': True, 'cores': numa_cores, 'mode': 'affinity_only'}
-                    
-                    else:
-                        if num_threads <= 4:
-                            cores_to_use = numa_cores[:min(4, len(numa_cores))]
-                            set_process_affinity_direct(handle, cores_to_use)
-                            return {'success': True, 'cores': cores_to_use, 'mode': 'limited_affinity'}
-                        else:
-                            set_process_affinity_direct(handle, numa_cores)
-                            return {'success': True, 'cores': numa_cores, 'mode': 'full_affinity'}
+                if workload_type == 'single_thread' or num_threads <= 2:
+                    solver_workload, mode = 'single_thread', 'pinned'
+                elif workload_type == 'latency_sensitive':
+                    solver_workload, mode = 'latency_sensitive', 'soft_affinity'
+                elif workload_type == 'throughput':
+                    solver_workload, mode = 'throughput', 'affinity_only'
+                elif num_threads <= 4:
+                    solver_workload, mode = 'general', 'limited_affinity'
+                else:
+                    solver_workload, mode = 'throughput', 'full_affinity'
                 
-                finally:
-                    try:
-                        win32api.CloseHandle(handle)
-                    except Exception:
-                        pass
+                self.active_pids.add(pid)
+                self.solver.update_process(pid, numa_cores, solver_workload)
+                solution = self.solver.solve()
+                
+                if solution:
+                    for moved_pid, cores in solution['changed'].items():
+                        if moved_pid == pid:
+                            continue
+                        if moved_pid not in self.active_pids:
+                            self.solver.remove_process(moved_pid)
+                            continue
+                        self._apply_assignment(moved_pid, cores, self.placement_modes.get(moved_pid, 'limited_affinity'))
+                
+                cores = self.solver.get_assignment(pid)
+                if not cores:
+                    return {'success': False}
+                
+                result = self._apply_assignment(pid, cores, mode)
+                result['moves'] = solution['moves'] if solution else 0
+                return result
                         
             except Exception:
                 return {'success': False}
@@ -1036,15 +2051,15 @@ class CPUPinningEngine:
                 if not psutil.pid_exists(pid):
                     dead_pids.append(pid)
             
+            for pid in self.solver.get_pids():
+                if pid not in dead_pids and not psutil.pid_exists(pid):
+                    dead_pids.append(pid)
+            
             for pid in dead_pids:
-                pinning_info = self.pinned_processes[pid]
-                core_id = pinning_info['core']
-                
-                del self.pinned_processes[pid]
-                self.core_assignments[core_id].discard(pid)
-                
-                if pid in self.thread_affinity_cache:
-                    del self.thread_affinity_cache[pid]
+                self.release_process(pid)
+    
+    def get_placement_stats(self):
+        return self.solver.get_stats()
             
     def get_statistics(self):
         with self.lock:
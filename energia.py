@@ -1,6 +1,11 @@
+import re
+import time
+import logging
 import subprocess
 import threading
 
+logger = logging.getLogger(__name__)
+
 class PowerManagementOptimizer:
     def __init__(self):
         self.lock = threading.RLock()
@@ -78,38 +83,212 @@ class CStatesOptimizer:
                 return True
             except Exception:
                 return False
+def run_powercfg_batch(commands, timeout=10):
+    script = ' && '.join('powercfg ' + ' '.join(command) for command in commands)
+    result = subprocess.run(
+        ['cmd', '/c', script],
+        capture_output=True,
+        creationflags=subprocess.CREATE_NO_WINDOW,
+        timeout=timeout
+    )
+    return result.returncode == 0
+def query_powercfg_setting(subgroup, setting, timeout=10):
+    result = subprocess.run(
+        ['powercfg', '/query', 'SCHEME_CURRENT', subgroup, setting],
+        capture_output=True,
+        text=True,
+        creationflags=subprocess.CREATE_NO_WINDOW,
+        timeout=timeout
+    )
+    if result.returncode != 0:
+        return None
+    values = re.findall(r'0x([0-9a-fA-F]+)\s*$', result.stdout, re.MULTILINE)
+    if len(values) < 2:
+        return None
+    return int(values[-2], 16), int(values[-1], 16)
 class DynamicVoltageFrequencyScaler:
     HIGH_WORKLOAD_THRESHOLD = 80
     MEDIUM_WORKLOAD_THRESHOLD = 50
     MAX_THROTTLE = 0
     MEDIUM_THROTTLE = 50
     HIGH_THROTTLE = 100
+    MIN_FREQUENCY_PERCENT = 70
+    HYSTERESIS = 5
+    DOMAIN_SETTINGS = {0: 'PROCTHROTTLEMAX', 1: 'PROCTHROTTLEMAX1'}
     
-    def __init__(self):
+    def __init__(self, core_domains=None, command_runner=None, query_runner=None, timeseries=None, cpu_count=None,
+                 min_apply_interval_seconds=5.0):
         self.lock = threading.RLock()
+        self.command_runner = command_runner or run_powercfg_batch
+        self.query_runner = query_runner or query_powercfg_setting
+        self.timeseries = timeseries
+        self.cpu_count = cpu_count
+        self.core_domains = dict(core_domains or {})
+        self.min_apply_interval = min_apply_interval_seconds
         self.per_core_states = {}
+        self.core_demand = {}
+        self.applied_targets = {}
+        self.original_values = {}
+        self.unrestorable_domains = set()
+        self.last_apply = 0.0
+        self.stats = {
+            'demand_updates': 0,
+            'batches': 0,
+            'settings_written': 0,
+            'batch_failures': 0,
+            'unchanged': 0,
+            'rate_limited': 0,
+            'skipped_unrestorable': 0,
+            'restores': 0
+        }
     
-    def adjust_core_frequency(self, core_id, workload_level):
+    def _domain_of(self, core_id):
+        return self.core_domains.get(core_id, 0)
+    
+    def _throttle_for(self, workload_level, current_throttle=None):
+        if current_throttle is not None:
+            if current_throttle == self.MAX_THROTTLE and workload_level > self.HIGH_WORKLOAD_THRESHOLD - self.HYSTERESIS:
+                return self.MAX_THROTTLE
+            if current_throttle == self.MEDIUM_THROTTLE and self.MEDIUM_WORKLOAD_THRESHOLD - self.HYSTERESIS < workload_level <= self.HIGH_WORKLOAD_THRESHOLD:
+                return self.MEDIUM_THROTTLE
+        
+        if workload_level > self.HIGH_WORKLOAD_THRESHOLD:
+            return self.MAX_THROTTLE
+        elif workload_level > self.MEDIUM_WORKLOAD_THRESHOLD:
+            return self.MEDIUM_THROTTLE
+        return self.HIGH_THROTTLE
+    
+    def update_core_demand(self, core_id, workload_level):
+        with self.lock:
+            self.core_demand[core_id] = workload_level
+            self.stats['demand_updates'] += 1
+    
+    def update_from_timeseries(self, alpha=0.3):
+        if self.timeseries is None or not self.cpu_count:
+            return False
+        demand = self.timeseries.ewma_cores('cpu_load', self.cpu_count, alpha=alpha)
         with self.lock:
+            for core_id, workload_level in enumerate(demand):
+                self.core_demand[core_id] = workload_level
+            self.stats['demand_updates'] += len(demand)
+        return True
+    
+    def compute_domain_targets(self):
+        with self.lock:
+            domain_demand = {}
+            for core_id, workload_level in self.core_demand.items():
+                domain = self._domain_of(core_id)
+                domain_demand[domain] = max(domain_demand.get(domain, 0.0), workload_level)
+            
+            targets = {}
+            for domain, workload_level in domain_demand.items():
+                applied = self.applied_targets.get(domain)
+                current_throttle = 100 - applied if applied is not None else None
+                throttle_percent = self._throttle_for(workload_level, current_throttle)
+                targets[domain] = max(self.MIN_FREQUENCY_PERCENT, 100 - throttle_percent)
+            return targets
+    
+    def _capture_original(self, domain):
+        if domain in self.original_values:
+            return True
+        if domain in self.unrestorable_domains:
+            return False
+        try:
+            original = self.query_runner('SUB_PROCESSOR', self.DOMAIN_SETTINGS[domain])
+        except Exception as e:
+            logger.debug(f"DVFS could not read {self.DOMAIN_SETTINGS[domain]}: {e}")
+            original = None
+        if original is None:
+            self.unrestorable_domains.add(domain)
+            self.stats['skipped_unrestorable'] += 1
+            return False
+        self.original_values[domain] = original
+        return True
+    
+    def apply_pending(self, force=False):
+        with self.lock:
+            targets = self.compute_domain_targets()
+            changes = {
+                domain: percent for domain, percent in targets.items()
+                if self.applied_targets.get(domain) != percent and domain in self.DOMAIN_SETTINGS
+                and self._capture_original(domain)
+            }
+            
+            if not changes:
+                self.stats['unchanged'] += 1
+                return False
+            
+            now = time.time()
+            if not force and now - self.last_apply < self.min_apply_interval:
+                self.stats['rate_limited'] += 1
+                return False
+            
+            commands = [
+                ['/setacvalueindex', 'SCHEME_CURRENT', 'SUB_PROCESSOR', self.DOMAIN_SETTINGS[domain], str(percent)]
+                for domain, percent in sorted(changes.items())
+            ]
+            commands.append(['/setactive', 'SCHEME_CURRENT'])
+            
             try:
-                if workload_level > self.HIGH_WORKLOAD_THRESHOLD:
-                    throttle_percent = self.MAX_THROTTLE
-                elif workload_level > self.MEDIUM_WORKLOAD_THRESHOLD:
-                    throttle_percent = self.MEDIUM_THROTTLE
-                else:
-                    throttle_percent = self.HIGH_THROTTLE
-                
-                max_frequency_percent = 100 - throttle_percent
-                
-                subprocess.run(
-                    ['powercfg', '/setacvalueindex', 'SCHEME_CURRENT', 'SUB_PROCESSOR', 
-                     'PROCTHROTTLEMAX', str(max_frequency_percent)],
-                    capture_output=True,
-                    creationflags=subprocess.CREATE_NO_WINDOW,
-                    timeout=2
-                )
-                
-                self.per_core_states[core_id] = throttle_percent
-                return True
-            except Exception:
+                success = self.command_runner(commands)
+            except Exception as e:
+                logger.debug(f"DVFS batch apply failed: {e}")
+                success = False
+            
+            self.last_apply = now
+            if not success:
+                self.stats['batch_failures'] += 1
+                return False
+            
+            self.applied_targets.update(changes)
+            for core_id in self.core_demand:
+                percent = self.applied_targets.get(self._domain_of(core_id))
+                if percent is not None:
+                    self.per_core_states[core_id] = 100 - percent
+            self.stats['batches'] += 1
+            self.stats['settings_written'] += len(changes)
+            return True
+    
+    def tick(self):
+        self.update_from_timeseries()
+        return self.apply_pending()
+    
+    def restore(self):
+        with self.lock:
+            if not self.applied_targets:
+                return False
+            commands = []
+            for domain in sorted(self.applied_targets):
+                ac_value, dc_value = self.original_values[domain]
+                setting = self.DOMAIN_SETTINGS[domain]
+                commands.append(['/setacvalueindex', 'SCHEME_CURRENT', 'SUB_PROCESSOR', setting, str(ac_value)])
+                commands.append(['/setdcvalueindex', 'SCHEME_CURRENT', 'SUB_PROCESSOR', setting, str(dc_value)])
+            commands.append(['/setactive', 'SCHEME_CURRENT'])
+            
+            try:
+                success = self.command_runner(commands)
+            except Exception as e:
+                logger.debug(f"DVFS restore failed: {e}")
+                success = False
+            
+            if not success:
+                self.stats['batch_failures'] += 1
                 return False
+            
+            self.applied_targets.clear()
+            self.per_core_states.clear()
+            self.stats['restores'] += 1
+            return True
+    
+    def adjust_core_frequency(self, core_id, workload_level):
+        try:
+            self.update_core_demand(core_id, workload_level)
+            return True
+        except Exception:
+            return False
+    
+    def get_stats(self):
+        with self.lock:
+            stats = self.stats.copy()
+            stats['applied_targets'] = dict(self.applied_targets)
+            return stats
@@ -4,6 +4,7 @@ import winreg
 import subprocess
 import ctypes
 import threading
+import heapq
 import logging
 from collections import defaultdict, deque
 
@@ -89,6 +90,8 @@ class AdvancedTimerCoalescer:
         self.base_resolution_ms = base_resolution_ms
         self.timer_resolution_active = False
         self.task_registry = {}
+        self.due_heap = []
+        self.ready_heap = []
         self.execution_history = defaultdict(deque)
         self.lock = threading.RLock()
         self.performance_counter_freq = self._get_performance_frequency()
@@ -142,8 +145,41 @@ class AdvancedTimerCoalescer:
                 'execution_count': 0,
                 'total_execution_time_ms': 0,
                 'avg_execution_time_ms': 0,
-                'adaptive_multiplier': 1.0
+                'adaptive_multiplier': 1.0,
+                'version': self.task_registry[name]['version'] if name in self.task_registry else 0
             }
+            self._schedule_task(name)
+    
+    def _schedule_task(self, task_name):
+        task = self.task_registry[task_name]
+        task['version'] += 1
+        version = task['version']
+        
+        heapq.heappush(self.due_heap, (task['next_execution'], task_name, version))
+        ready_at = task['next_execution'] - (task['coalescence_window_ms'] / 1000.0)
+        heapq.heappush(self.ready_heap, (ready_at, task_name, version))
+        
+        if len(self.due_heap) > 4 * len(self.task_registry) + 64:
+            self._compact_heaps()
+    
+    def _is_current_entry(self, entry):
+        task = self.task_registry.get(entry[1])
+        return task is not None and task['version'] == entry[2]
+    
+    def _compact_heaps(self):
+        self.due_heap = [entry for entry in self.due_heap if self._is_current_entry(entry)]
+        self.ready_heap = [entry for entry in self.ready_heap if self._is_current_entry(entry)]
+        heapq.heapify(self.due_heap)
+        heapq.heapify(self.ready_heap)
+    
+    def _calculate_urgency(self, task, current_time):
+        time_until_next = task['next_execution'] - current_time
+        
+        if time_until_next <= 0:
+            return min(10.0, abs(time_until_next) * 1000.0 / task['interval_ms'])
+        
+        proximity_factor = 1.0 - (time_until_next / (task['coalescence_window_ms'] / 1000.0))
+        return task['priority'] * proximity_factor
     
     def should_execute(self, task_name):
         with self.lock:
@@ -191,6 +227,7 @@ class AdvancedTimerCoalescer:
             
             interval_with_multiplier = task['interval_ms'] * task['adaptive_multiplier']
             task['next_execution'] = current_time + (interval_with_multiplier / 1000.0)
+            self._schedule_task(task_name)
             
             self.execution_history[task_name].append(current_time)
             if len(self.execution_history[task_name]) > 100:
@@ -212,33 +249,34 @@ class AdvancedTimerCoalescer:
     
     def get_next_wake_time(self):
         with self.lock:
-            if not self.task_registry:
-                return 0.1
-            
-            current_time = time.perf_counter()
-            next_wake = float('inf')
+            heap = self.due_heap
+            while heap and not self._is_current_entry(heap[0]):
+                heapq.heappop(heap)
             
-            for task in self.task_registry.values():
-                time_until = task['next_execution'] - current_time
-                if time_until < next_wake:
-                    next_wake = time_until
+            if not heap:
+                return 0.1
             
+            next_wake = heap[0][0] - time.perf_counter()
             return max(0.001, min(5.0, next_wake))
     
     def get_tasks_to_execute(self):
         with self.lock:
+            current_time = time.perf_counter()
+            heap = self.ready_heap
             
-            import heapq
-            ready_tasks_heap = []
-            
-            for task_name in self.task_registry.keys():
-                should_exec, urgency = self.should_execute(task_name)
-                if should_exec:
-                    
-                    heapq.heappush(ready_tasks_heap, (-urgency, task_name))
+            ready_entries = []
+            while heap and heap[0][0] <= current_time:
+                entry = heapq.heappop(heap)
+                if self._is_current_entry(entry):
+                    ready_entries.append(entry)
             
+            ready_tasks = []
+            for entry in ready_entries:
+                heapq.heappush(heap, entry)
+                urgency = self._calculate_urgency(self.task_registry[entry[1]], current_time)
+                ready_tasks.append((entry[1], urgency))
             
-            ready_tasks = [(name, -urgency) for urgency, name in sorted(ready_tasks_heap)]
+            ready_tasks.sort(key=lambda t: (-t[1], t[0]))
             
             if len(ready_tasks) > 1:
                 self.stats['total_coalesced'] += len(ready_tasks) - 1
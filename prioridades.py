@@ -20,21 +20,31 @@ PROCESS_SET_INFORMATION = 0x0200
 SystemResponsivenessKey = r"SOFTWARE\Microsoft\Windows NT\CurrentVersion\Multimedia\SystemProfile"
 
 class DynamicPriorityAlgorithm:
-    def __init__(self, handle_cache):
+    def __init__(self, handle_cache, cpu_sampler=None):
         self.handle_cache = handle_cache
+        self.cpu_sampler = cpu_sampler
         self.lock = threading.RLock()
         self.process_metrics = {}
         self.stats = {'priority_adjustments': 0, 'processes_analyzed': 0}
     
-    def analyze_process(self, pid):
+    def analyze_process(self, pid, process_view=None):
         with self.lock:
             try:
-                proc = psutil.Process(pid)
-                cpu_percent = proc.cpu_percent(interval=0.1)
-                io_counters = proc.io_counters()
-                memory_info = proc.memory_info()
-                num_threads = proc.num_threads()
-                create_time = proc.create_time()
+                if process_view is not None:
+                    proc = process_view.process
+                    process_view.prefetch(('io_counters', 'memory_info', 'num_threads', 'create_time'))
+                    io_counters = process_view.io_counters()
+                    memory_info = process_view.memory_info()
+                    num_threads = process_view.num_threads()
+                    create_time = process_view.create_time()
+                else:
+                    proc = psutil.Process(pid)
+                    io_counters = proc.io_counters()
+                    memory_info = proc.memory_info()
+                    num_threads = proc.num_threads()
+                    create_time = proc.create_time()
+                
+                cpu_percent = self._get_cpu_percent(pid, proc)
                 
                 current_time = time.time()
                 execution_time = current_time - create_time
@@ -65,6 +75,12 @@ class DynamicPriorityAlgorithm:
             except Exception:
                 return 50
     
+    def _get_cpu_percent(self, pid, proc):
+        if self.cpu_sampler is not None:
+            previous = self.process_metrics.get(pid, {}).get('cpu', 0.0)
+            return self.cpu_sampler.get_pid_percent(pid, default=previous)
+        return proc.cpu_percent(interval=None)
+    
     def _calculate_priority_score(self, cpu, io_rate, memory, exec_time, threads, deps):
         cpu_score = min(cpu / 100.0 * 30, 30)
         io_score = min((io_rate / (1024 * 1024 * 100)) * 20, 20)
@@ -76,10 +92,10 @@ class DynamicPriorityAlgorithm:
         total_score = cpu_score + io_score + mem_score + time_score + thread_score + dep_score
         return min(max(total_score, 0), 100)
     
-    def adjust_priority(self, pid, is_foreground):
+    def adjust_priority(self, pid, is_foreground, process_view=None):
         with self.lock:
             try:
-                score = self.analyze_process(pid)
+                score = self.analyze_process(pid, process_view)
                 
                 if is_foreground:
                     if score > 70:
@@ -96,11 +112,11 @@ class DynamicPriorityAlgorithm:
                     else:
                         priority_class = PRIORITY_CLASSES['IDLE']
                 
-                handle = self.handle_cache.get_handle(pid, PROCESS_SET_INFORMATION)
-                if handle:
-                    win32process.SetPriorityClass(int(handle), priority_class)
-                    self.stats['priority_adjustments'] += 1
-                    return True
+                with self.handle_cache.borrow(pid, PROCESS_SET_INFORMATION) as handle:
+                    if handle:
+                        win32process.SetPriorityClass(int(handle), priority_class)
+                        self.stats['priority_adjustments'] += 1
+                        return True
             except Exception:
                 pass
             return False
@@ -114,7 +130,7 @@ class RealtimePriorityManager:
         self.monitored_processes = {}
         self.stats = {'adjustments': 0, 'glitches_detected': 0}
     
-    def monitor_realtime_process(self, pid, process_name):
+    def monitor_realtime_process(self, pid, process_name, process_view=None):
         with self.lock:
             try:
                 process_name_lower = process_name.lower()
@@ -123,8 +139,10 @@ class RealtimePriorityManager:
                 is_game = any(x in process_name_lower for x in ['game', 'dx11', 'dx12', 'vulkan'])
                 
                 if is_audio or is_video or is_game:
-                    proc = psutil.Process(pid)
-                    cpu_times = proc.cpu_times()
+                    if process_view is not None:
+                        cpu_times = process_view.cpu_times()
+                    else:
+                        cpu_times = psutil.Process(pid).cpu_times()
                     
                     if pid not in self.monitored_processes:
                         self.monitored_processes[pid] = {
@@ -153,11 +171,11 @@ class RealtimePriorityManager:
     def _boost_priority(self, pid):
         with self.lock:
             try:
-                handle = self.handle_cache.get_handle(pid, PROCESS_SET_INFORMATION)
-                if handle:
-                    win32process.SetPriorityClass(int(handle), PRIORITY_CLASSES['HIGH'])
-                    self.stats['adjustments'] += 1
-                    return True
+                with self.handle_cache.borrow(pid, PROCESS_SET_INFORMATION) as handle:
+                    if handle:
+                        win32process.SetPriorityClass(int(handle), PRIORITY_CLASSES['HIGH'])
+                        self.stats['adjustments'] += 1
+                        return True
             except Exception:
                 pass
             return False
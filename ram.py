@@ -1,14 +1,18 @@
+import os
+import json
 import time
 import psutil
 import win32api
 import win32con
+import win32pdh
 import winreg
 import subprocess
 import ctypes
 import threading
 import platform
 from ctypes import wintypes
-from collections import defaultdict, deque
+from collections import defaultdict, deque, OrderedDict
+from array import array
 import logging
 
 logger = logging.getLogger(__name__)
@@ -39,6 +43,30 @@ SE_PRIVILEGE_ENABLED = 0x00000002
 PROCESS_SET_INFORMATION = 0x0200
 PROCESS_QUERY_INFORMATION = 0x0400
 PROCESS_SET_QUOTA = 0x0100
+TRIM_PROFILE_DATABASE = 'trim_profile_database.json'
+TRIM_PROFILE_EWMA_ALPHA = 0.3
+TRIM_PROFILE_MIN_SAMPLES = 3
+TRIM_THRASH_BACKOFF_RATIO = 0.3
+TRIM_THRASH_SKIP_RATIO = 0.8
+RECLAIM_LEVEL_NAMES = ('none', 'low', 'medium', 'high')
+RECLAIM_BUDGET_MB = (0.0, 128.0, 512.0, 2048.0)
+RECLAIM_MAX_ACTIONS = (0, 2, 6, 16)
+RECLAIM_DEFAULT_FRACTION = 0.4
+RECLAIM_HARD_FAULT_CEILING = 2000.0
+STANDBY_PURGE_MODES = ('priority0standbylist', 'standbylist')
+SystemProcessInformation = 5
+STATUS_INFO_LENGTH_MISMATCH = 0xC0000004
+SystemMemoryListInformation = 80
+MEMORY_PAGE_SIZE = 4096
+STANDBY_PDH_COUNTERS = (
+    '\\Memory\\Standby Cache Normal Priority Bytes',
+    '\\Memory\\Standby Cache Reserve Bytes',
+    '\\Memory\\Standby Cache Core Bytes'
+)
+STANDBY_PDH_LOW_PRIORITY_INDEX = 1
+FREE_PDH_COUNTER = '\\Memory\\Free & Zero Page List Bytes'
+STANDBY_PURGE_MIN_RELEASED_MB = 64.0
+MEMORY_SNAPSHOT_COLUMNS = ('working_set_mb', 'peak_working_set_mb', 'private_mb', 'commit_mb', 'page_faults', 'hard_faults')
 
 ntdll = ctypes.WinDLL('ntdll')
 kernel32 = ctypes.WinDLL('kernel32')
@@ -53,155 +81,561 @@ class TOKEN_PRIVILEGES(ctypes.Structure):
 class MEMORY_PRIORITY_INFORMATION(ctypes.Structure):
     _fields_ = [('MemoryPriority', ctypes.wintypes.ULONG)]
 
+class UNICODE_STRING(ctypes.Structure):
+    _fields_ = [
+        ('Length', wintypes.USHORT),
+        ('MaximumLength', wintypes.USHORT),
+        ('Buffer', ctypes.c_void_p)
+    ]
+
+class SYSTEM_PROCESS_INFORMATION(ctypes.Structure):
+    _fields_ = [
+        ('NextEntryOffset', wintypes.ULONG),
+        ('NumberOfThreads', wintypes.ULONG),
+        ('WorkingSetPrivateSize', ctypes.c_longlong),
+        ('HardFaultCount', wintypes.ULONG),
+        ('NumberOfThreadsHighWatermark', wintypes.ULONG),
+        ('CycleTime', ctypes.c_ulonglong),
+        ('CreateTime', ctypes.c_longlong),
+        ('UserTime', ctypes.c_longlong),
+        ('KernelTime', ctypes.c_longlong),
+        ('ImageName', UNICODE_STRING),
+        ('BasePriority', wintypes.LONG),
+        ('UniqueProcessId', ctypes.c_void_p),
+        ('InheritedFromUniqueProcessId', ctypes.c_void_p),
+        ('HandleCount', wintypes.ULONG),
+        ('SessionId', wintypes.ULONG),
+        ('UniqueProcessKey', ctypes.c_void_p),
+        ('PeakVirtualSize', ctypes.c_size_t),
+        ('VirtualSize', ctypes.c_size_t),
+        ('PageFaultCount', wintypes.ULONG),
+        ('PeakWorkingSetSize', ctypes.c_size_t),
+        ('WorkingSetSize', ctypes.c_size_t),
+        ('QuotaPeakPagedPoolUsage', ctypes.c_size_t),
+        ('QuotaPagedPoolUsage', ctypes.c_size_t),
+        ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+        ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+        ('PagefileUsage', ctypes.c_size_t),
+        ('PeakPagefileUsage', ctypes.c_size_t),
+        ('PrivatePageCount', ctypes.c_size_t)
+    ]
+
+class SYSTEM_MEMORY_LIST_INFORMATION(ctypes.Structure):
+    _fields_ = [
+        ('ZeroPageCount', ctypes.c_size_t),
+        ('FreePageCount', ctypes.c_size_t),
+        ('ModifiedPageCount', ctypes.c_size_t),
+        ('ModifiedNoWritePageCount', ctypes.c_size_t),
+        ('BadPageCount', ctypes.c_size_t),
+        ('PageCountByPriority', ctypes.c_size_t * 8),
+        ('RepurposedPagesByPriority', ctypes.c_size_t * 8),
+        ('ModifiedPageCountPageFile', ctypes.c_size_t)
+    ]
+
+class MEMORYSTATUSEX(ctypes.Structure):
+    _fields_ = [
+        ('dwLength', wintypes.DWORD),
+        ('dwMemoryLoad', wintypes.DWORD),
+        ('ullTotalPhys', ctypes.c_ulonglong),
+        ('ullAvailPhys', ctypes.c_ulonglong),
+        ('ullTotalPageFile', ctypes.c_ulonglong),
+        ('ullAvailPageFile', ctypes.c_ulonglong),
+        ('ullTotalVirtual', ctypes.c_ulonglong),
+        ('ullAvailVirtual', ctypes.c_ulonglong),
+        ('ullAvailExtendedVirtual', ctypes.c_ulonglong)
+    ]
+
+class ProcessMemorySnapshot:
+    def __init__(self, timestamp, rows):
+        self.timestamp = timestamp
+        self.pids = array('q')
+        self.columns = {name: array('d') for name in MEMORY_SNAPSHOT_COLUMNS}
+        self.index = {}
+        for row in rows:
+            self.index[row[0]] = len(self.pids)
+            self.pids.append(row[0])
+            for name, value in zip(MEMORY_SNAPSHOT_COLUMNS, row[1:]):
+                self.columns[name].append(value)
+    
+    def __len__(self):
+        return len(self.pids)
+    
+    def __contains__(self, pid):
+        return pid in self.index
+    
+    def column(self, name):
+        return self.columns[name]
+    
+    def value(self, pid, name):
+        row = self.index.get(pid)
+        if row is None:
+            return None
+        return self.columns[name][row]
+    
+    def get(self, pid):
+        row = self.index.get(pid)
+        if row is None:
+            return None
+        return {name: self.columns[name][row] for name in MEMORY_SNAPSHOT_COLUMNS}
+class NtProcessMemoryBackend:
+    def __init__(self, initial_buffer_size=512 * 1024):
+        self.buffer_size = initial_buffer_size
+        self.buffer = ctypes.create_string_buffer(self.buffer_size)
+    
+    def collect(self):
+        return_length = wintypes.ULONG(0)
+        while True:
+            status = ntdll.NtQuerySystemInformation(
+                SystemProcessInformation,
+                self.buffer,
+                self.buffer_size,
+                ctypes.byref(return_length)
+            ) & 0xFFFFFFFF
+            if status != STATUS_INFO_LENGTH_MISMATCH:
+                break
+            self.buffer_size = max(self.buffer_size * 2, return_length.value + 64 * 1024)
+            self.buffer = ctypes.create_string_buffer(self.buffer_size)
+        
+        if status != 0:
+            raise OSError(f"NtQuerySystemInformation failed: 0x{status:08X}")
+        
+        rows = []
+        base = ctypes.addressof(self.buffer)
+        offset = 0
+        mb = 1024 * 1024
+        while True:
+            info = SYSTEM_PROCESS_INFORMATION.from_address(base + offset)
+            rows.append((
+                info.UniqueProcessId or 0,
+                info.WorkingSetSize / mb,
+                info.PeakWorkingSetSize / mb,
+                info.PrivatePageCount / mb,
+                info.PagefileUsage / mb,
+                info.PageFaultCount,
+                info.HardFaultCount
+            ))
+            if not info.NextEntryOffset:
+                break
+            offset += info.NextEntryOffset
+        return rows
+class ProcMemoryBackend:
+    def __init__(self, proc_root='/proc'):
+        self.proc_root = proc_root
+        self.page_mb = os.sysconf('SC_PAGE_SIZE') / (1024 * 1024) if hasattr(os, 'sysconf') else 4096 / (1024 * 1024)
+        self.peaks = {}
+    
+    def collect(self):
+        rows = []
+        live = set()
+        for entry in os.listdir(self.proc_root):
+            if not entry.isdigit():
+                continue
+            pid = int(entry)
+            try:
+                with open(f'{self.proc_root}/{entry}/stat', 'rb') as f:
+                    stat = f.read()
+                with open(f'{self.proc_root}/{entry}/statm', 'rb') as f:
+                    statm = f.read().split()
+            except OSError:
+                continue
+            
+            fields = stat[stat.rfind(b')') + 2:].split()
+            minor_faults = int(fields[7])
+            major_faults = int(fields[9])
+            size_pages, resident_pages, shared_pages = int(statm[0]), int(statm[1]), int(statm[2])
+            working_set_mb = resident_pages * self.page_mb
+            peak_mb = max(self.peaks.get(pid, 0.0), working_set_mb)
+            self.peaks[pid] = peak_mb
+            live.add(pid)
+            rows.append((
+                pid,
+                working_set_mb,
+                peak_mb,
+                (resident_pages - shared_pages) * self.page_mb,
+                size_pages * self.page_mb,
+                minor_faults + major_faults,
+                major_faults
+            ))
+        
+        for pid in list(self.peaks):
+            if pid not in live:
+                del self.peaks[pid]
+        return rows
+class SystemMemorySampler:
+    def __init__(self, backend=None, max_age_seconds=2.0):
+        if backend is None:
+            backend = NtProcessMemoryBackend() if platform.system() == 'Windows' else ProcMemoryBackend()
+        self.backend = backend
+        self.max_age = max_age_seconds
+        self.current = None
+        self.lock = threading.RLock()
+        self.stats = {
+            'refreshes': 0,
+            'refresh_failures': 0,
+            'reads': 0,
+            'misses': 0,
+            'last_process_count': 0,
+            'last_refresh_ms': 0.0
+        }
+    
+    def refresh(self, now=None):
+        now = now or time.time()
+        with self.lock:
+            start = time.perf_counter()
+            try:
+                rows = self.backend.collect()
+            except Exception as e:
+                logger.debug(f"Memory sampler refresh failed: {e}")
+                self.stats['refresh_failures'] += 1
+                return self.current
+            self.current = ProcessMemorySnapshot(now, rows)
+            self.stats['refreshes'] += 1
+            self.stats['last_process_count'] = len(self.current)
+            self.stats['last_refresh_ms'] = (time.perf_counter() - start) * 1000
+            return self.current
+    
+    def snapshot(self, max_age_seconds=None, now=None):
+        now = now or time.time()
+        max_age = self.max_age if max_age_seconds is None else max_age_seconds
+        with self.lock:
+            current = self.current
+            if current is None or now - current.timestamp > max_age:
+                current = self.refresh(now)
+            return current
+    
+    def get(self, pid, max_age_seconds=None, not_before=None):
+        snapshot = self.snapshot(max_age_seconds)
+        if snapshot is not None and not_before is not None and snapshot.timestamp < not_before:
+            snapshot = self.refresh()
+        with self.lock:
+            self.stats['reads'] += 1
+            if snapshot is None or pid not in snapshot:
+                self.stats['misses'] += 1
+                return None
+        return snapshot.get(pid)
+    
+    def get_stats(self):
+        with self.lock:
+            return self.stats.copy()
 class WorkingSetOptimizer:
-    def __init__(self, handle_cache):
+    def __init__(self, handle_cache, max_batch_size=16, measure_delay_seconds=1.0, rate_window_seconds=60.0,
+                 regrowth_window_seconds=30.0, profile_path=None, memory_sampler=None):
         self.handle_cache = handle_cache
+        self.memory_sampler = memory_sampler
         self.trim_history = defaultdict(deque)
         self.memory_baselines = {}
         self.foreground_tracking = {}
+        self.pending_trims = OrderedDict()
+        self.inflight_trims = {}
+        self.regrowth_watch = {}
+        self.recent_trims = deque()
         self.lock = threading.RLock()
         
+        self.max_batch_size = max_batch_size
+        self.measure_delay = measure_delay_seconds
+        self.rate_window = rate_window_seconds
+        self.regrowth_window = regrowth_window_seconds
+        
+        if profile_path is None:
+            profile_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), TRIM_PROFILE_DATABASE)
+        self.profile_path = profile_path
+        self.trim_profiles = {}
+        self.profiles_dirty = False
+        self.last_profile_save = time.time()
+        
         self.default_trim_interval = 60.0
         self.min_trim_interval = 30.0
         self.max_trim_interval = 300.0
         
-        self.significant_memory_change_percent = 20.0
-        self.aggressive_trim_threshold_mb = 500
         self.min_background_time_for_trim = 900.0
         
         self.stats = {
             'total_trims': 0,
             'total_memory_freed_mb': 0,
             'avg_memory_freed_per_trim_mb': 0,
-            'trims_with_significant_effect': 0
+            'trims_with_significant_effect': 0,
+            'trims_requested': 0,
+            'trims_issued': 0,
+            'trim_failures': 0,
+            'measurements_lost': 0,
+            'batches': 0,
+            'total_refault_mb': 0.0,
+            'regrowth_samples': 0
         }
+        self.load_trim_profiles()
     
-    def should_trim_working_set(self, pid, current_memory_mb):
+    def load_trim_profiles(self):
+        try:
+            if os.path.exists(self.profile_path):
+                with open(self.profile_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if isinstance(data, dict):
+                    self.trim_profiles = data
+        except Exception as e:
+            logger.debug(f"Could not load trim profiles: {e}")
+            self.trim_profiles = {}
+    
+    def save_trim_profiles(self, force=False):
         with self.lock:
-            current_time = time.time()
-            
-            if pid not in self.memory_baselines:
-                self.memory_baselines[pid] = {
-                    'initial_mb': current_memory_mb,
-                    'peak_mb': current_memory_mb,
-                    'last_trim': 0,
-                    'trim_interval': self.default_trim_interval
-                }
-                self.foreground_tracking[pid] = {
-                    'last_foreground': current_time,
-                    'is_foreground': False
-                }
-                return False
-            
-            baseline = self.memory_baselines[pid]
-            tracking = self.foreground_tracking.get(pid, {'last_foreground': current_time, 'is_foreground': False})
-            
-            if current_memory_mb > baseline['peak_mb']:
-                baseline['peak_mb'] = current_memory_mb
-            
-            time_since_trim = current_time - baseline['last_trim']
-            if time_since_trim < baseline['trim_interval']:
+            if not self.profiles_dirty or (not force and time.time() - self.last_profile_save < 60.0):
                 return False
-            
-            time_since_foreground = current_time - tracking['last_foreground']
-            if time_since_foreground < self.min_background_time_for_trim:
-                return False
-            
-            if pid in self.trim_history and self.trim_history[pid]:
-                last_trim_event = self.trim_history[pid][-1]
-                memory_growth_percent = ((current_memory_mb - last_trim_event['memory_after_mb']) / 
-                                        max(last_trim_event['memory_after_mb'], 1)) * 100
-                
-                if memory_growth_percent > self.significant_memory_change_percent:
-                    return True
-            
-            if current_memory_mb > self.aggressive_trim_threshold_mb:
-                return True
-            
-            if time_since_trim >= baseline['trim_interval']:
-                return True
-            
+            data = {name: dict(profile) for name, profile in self.trim_profiles.items()}
+            self.profiles_dirty = False
+            self.last_profile_save = time.time()
+        
+        try:
+            temp_path = self.profile_path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2)
+            os.replace(temp_path, self.profile_path)
+            return True
+        except Exception as e:
+            logger.debug(f"Could not save trim profiles: {e}")
             return False
     
-    def trim_working_set(self, pid, current_memory_mb=None):
+    def _update_trim_profile(self, process_name, freed_mb, regrowth_mb, refault_mb):
+        profile = self.trim_profiles.setdefault(process_name, {
+            'samples': 0,
+            'freed_mb': 0.0,
+            'regrowth_mb': 0.0,
+            'refault_mb': 0.0,
+            'thrash_ratio': 0.0
+        })
+        ratio = min(1.5, regrowth_mb / freed_mb) if freed_mb > 0 else 1.0
+        if profile['samples'] == 0:
+            profile.update({'freed_mb': freed_mb, 'regrowth_mb': regrowth_mb, 'refault_mb': refault_mb, 'thrash_ratio': ratio})
+        else:
+            a = TRIM_PROFILE_EWMA_ALPHA
+            profile['freed_mb'] += a * (freed_mb - profile['freed_mb'])
+            profile['regrowth_mb'] += a * (regrowth_mb - profile['regrowth_mb'])
+            profile['refault_mb'] += a * (refault_mb - profile['refault_mb'])
+            profile['thrash_ratio'] += a * (ratio - profile['thrash_ratio'])
+        profile['samples'] += 1
+        profile['updated_at'] = time.time()
+        self.profiles_dirty = True
+    
+    def get_trim_policy(self, process_name):
         with self.lock:
-            result = {
-                'success': False,
-                'memory_freed_mb': 0.0,
-                'effectiveness': 0.0
+            profile = self.trim_profiles.get(process_name) if process_name else None
+            if not profile or profile['samples'] < TRIM_PROFILE_MIN_SAMPLES:
+                return {'skip': False, 'backoff': 1.0}
+            
+            ratio = profile['thrash_ratio']
+            if ratio >= TRIM_THRASH_SKIP_RATIO:
+                return {'skip': True, 'backoff': 4.0}
+            if ratio >= TRIM_THRASH_BACKOFF_RATIO:
+                return {'skip': False, 'backoff': 1.0 + (ratio - TRIM_THRASH_BACKOFF_RATIO) / (TRIM_THRASH_SKIP_RATIO - TRIM_THRASH_BACKOFF_RATIO) * 3.0}
+            return {'skip': False, 'backoff': 1.0}
+    
+    def _ensure_baseline(self, pid, memory_mb, process_name=None):
+        baseline = self.memory_baselines.get(pid)
+        if baseline is None:
+            baseline = self.memory_baselines[pid] = {
+                'initial_mb': memory_mb,
+                'peak_mb': memory_mb,
+                'last_trim': 0,
+                'trim_interval': self.default_trim_interval,
+                'process_name': process_name
             }
+        if process_name:
+            baseline['process_name'] = process_name
+        if memory_mb is not None and (baseline['peak_mb'] is None or memory_mb > baseline['peak_mb']):
+            baseline['peak_mb'] = memory_mb
+        return baseline
+    
+    def get_trim_interval(self, pid):
+        with self.lock:
+            baseline = self.memory_baselines.get(pid)
+            return baseline['trim_interval'] if baseline else self.default_trim_interval
+    
+    def _read_memory(self, pid, not_before=None):
+        if self.memory_sampler:
+            sample = self.memory_sampler.get(pid, not_before=not_before)
+            if sample is not None:
+                return sample['working_set_mb'], sample['page_faults']
+        try:
+            info = psutil.Process(pid).memory_info()
+            return info.rss / (1024 * 1024), getattr(info, 'num_page_faults', None)
+        except Exception:
+            return None, None
+    
+    def request_trim(self, pid, current_memory_mb=None, process_name=None):
+        with self.lock:
+            if pid in self.pending_trims or pid in self.inflight_trims:
+                return False
+            baseline = self._ensure_baseline(pid, current_memory_mb, process_name)
+            self.pending_trims[pid] = current_memory_mb
+            self.stats['trims_requested'] += 1
+            baseline['last_trim'] = time.time()
+            return True
+    
+    def _issue_trim(self, pid, current_memory_mb):
+        memory_before_mb, faults_before = self._read_memory(pid)
+        if memory_before_mb is None:
+            memory_before_mb = current_memory_mb
+        if memory_before_mb is None:
+            return None
+        
+        with self.handle_cache.borrow(
+            pid,
+            PROCESS_SET_INFORMATION | PROCESS_QUERY_INFORMATION | PROCESS_SET_QUOTA
+        ) as handle:
+            if not handle:
+                return None
             
+            if not kernel32.SetProcessWorkingSetSize(handle, ctypes.c_size_t(-1), ctypes.c_size_t(-1)):
+                return None
+        
+        return {
+            'issued_at': time.time(),
+            'memory_before_mb': memory_before_mb,
+            'faults_before': faults_before
+        }
+    
+    def _record_trim_effect(self, pid, trim, memory_after_mb, faults_after, measured_at):
+        memory_before_mb = trim['memory_before_mb']
+        memory_freed_mb = max(0, memory_before_mb - memory_after_mb)
+        effectiveness = (memory_freed_mb / memory_before_mb * 100) if memory_before_mb > 0 else 0
+        
+        refault_mb = 0.0
+        if trim['faults_before'] is not None and faults_after is not None:
+            refault_mb = max(0, faults_after - trim['faults_before']) * 4096 / (1024 * 1024)
+        
+        trim_event = {
+            'timestamp': trim['issued_at'],
+            'measured_at': measured_at,
+            'memory_before_mb': memory_before_mb,
+            'memory_after_mb': memory_after_mb,
+            'memory_freed_mb': memory_freed_mb,
+            'refault_mb': refault_mb,
+            'effectiveness_percent': effectiveness
+        }
+        
+        self.trim_history[pid].append(trim_event)
+        if len(self.trim_history[pid]) > 20:
+            self.trim_history[pid].popleft()
+        
+        self._adapt_trim_interval(pid, effectiveness)
+        
+        process_name = self.memory_baselines.get(pid, {}).get('process_name')
+        if process_name and memory_freed_mb > 0:
+            self.regrowth_watch[pid] = {
+                'process_name': process_name,
+                'issued_at': trim['issued_at'],
+                'faults_before': trim['faults_before'],
+                'memory_after_mb': memory_after_mb,
+                'memory_freed_mb': memory_freed_mb
+            }
+        
+        self.recent_trims.append((measured_at, memory_freed_mb))
+        self.stats['total_trims'] += 1
+        self.stats['total_memory_freed_mb'] += memory_freed_mb
+        self.stats['total_refault_mb'] += refault_mb
+        self.stats['avg_memory_freed_per_trim_mb'] = \
+            self.stats['total_memory_freed_mb'] / self.stats['total_trims']
+        
+        if effectiveness > 10.0:
+            self.stats['trims_with_significant_effect'] += 1
+        
+        return trim_event
+    
+    def _measure_completed(self, now):
+        with self.lock:
+            due = [
+                (pid, trim) for pid, trim in self.inflight_trims.items()
+                if now - trim['issued_at'] >= self.measure_delay
+            ]
+        
+        measured = []
+        for pid, trim in due:
+            memory_after_mb, faults_after = self._read_memory(pid, not_before=trim['issued_at'] + self.measure_delay)
+            with self.lock:
+                self.inflight_trims.pop(pid, None)
+                if memory_after_mb is None:
+                    self.stats['measurements_lost'] += 1
+                    continue
+                measured.append(self._record_trim_effect(pid, trim, memory_after_mb, faults_after, now))
+        return measured
+    
+    def _measure_regrowth(self, now):
+        with self.lock:
+            due = [
+                (pid, watch) for pid, watch in self.regrowth_watch.items()
+                if now - watch['issued_at'] >= self.regrowth_window
+            ]
+        
+        for pid, watch in due:
+            memory_mb, faults = self._read_memory(pid, not_before=watch['issued_at'] + self.regrowth_window)
+            with self.lock:
+                self.regrowth_watch.pop(pid, None)
+                if memory_mb is None:
+                    continue
+                regrowth_mb = max(0.0, memory_mb - watch['memory_after_mb'])
+                refault_mb = 0.0
+                if watch['faults_before'] is not None and faults is not None:
+                    refault_mb = max(0, faults - watch['faults_before']) * 4096 / (1024 * 1024)
+                self._update_trim_profile(watch['process_name'], watch['memory_freed_mb'], regrowth_mb, refault_mb)
+                self.stats['regrowth_samples'] += 1
+        return len(due)
+    
+    def process_pending(self, now=None):
+        now = now or time.time()
+        measured = self._measure_completed(now)
+        self._measure_regrowth(now)
+        self.save_trim_profiles()
+        
+        with self.lock:
+            batch = []
+            while self.pending_trims and len(batch) < self.max_batch_size:
+                batch.append(self.pending_trims.popitem(last=False))
+        
+        issued = 0
+        for pid, current_memory_mb in batch:
             try:
-                if current_memory_mb is None:
-                    process = psutil.Process(pid)
-                    current_memory_mb = process.memory_info().rss / (1024 * 1024)
-                
-                memory_before_mb = current_memory_mb
-                
-                handle = self.handle_cache.get_handle(
-                    pid,
-                    PROCESS_SET_INFORMATION | PROCESS_QUERY_INFORMATION | PROCESS_SET_QUOTA
-                )
-                
-                if not handle:
-                    return result
-                
-                trim_result = kernel32.SetProcessWorkingSetSize(
-                    handle,
-                    ctypes.c_size_t(-1),
-                    ctypes.c_size_t(-1)
-                )
-                
-                if not trim_result:
-                    return result
-                
-                time.sleep(0.05)
-                
-                try:
-                    process = psutil.Process(pid)
-                    memory_after_mb = process.memory_info().rss / (1024 * 1024)
-                except Exception:
-                    memory_after_mb = memory_before_mb
-                
-                memory_freed_mb = max(0, memory_before_mb - memory_after_mb)
-                effectiveness = (memory_freed_mb / memory_before_mb * 100) if memory_before_mb > 0 else 0
-                
-                current_time = time.time()
-                trim_event = {
-                    'timestamp': current_time,
-                    'memory_before_mb': memory_before_mb,
-                    'memory_after_mb': memory_after_mb,
-                    'memory_freed_mb': memory_freed_mb,
-                    'effectiveness_percent': effectiveness
-                }
-                
-                self.trim_history[pid].append(trim_event)
-                if len(self.trim_history[pid]) > 20:
-                    self.trim_history[pid].popleft()
-                
-                if pid in self.memory_baselines:
-                    self.memory_baselines[pid]['last_trim'] = current_time
-                    
-                    self._adapt_trim_interval(pid, effectiveness)
-                
-                self.stats['total_trims'] += 1
-                self.stats['total_memory_freed_mb'] += memory_freed_mb
-                self.stats['avg_memory_freed_per_trim_mb'] = \
-                    self.stats['total_memory_freed_mb'] / self.stats['total_trims']
-                
-                if effectiveness > 10.0:
-                    self.stats['trims_with_significant_effect'] += 1
-                
-                result.update({
-                    'success': True,
-                    'memory_freed_mb': memory_freed_mb,
-                    'effectiveness': effectiveness
-                })
-                
+                trim = self._issue_trim(pid, current_memory_mb)
             except Exception as e:
-                logger.debug(f"Error collecting memory metrics for PID {pid}: {type(e).__name__}: {e}")
+                logger.debug(f"Error trimming working set for PID {pid}: {type(e).__name__}: {e}")
+                trim = None
+            
+            with self.lock:
+                if trim is None:
+                    self.stats['trim_failures'] += 1
+                    continue
+                self.inflight_trims[pid] = trim
+                self.stats['trims_issued'] += 1
+                issued += 1
+        
+        if batch:
+            with self.lock:
+                self.stats['batches'] += 1
+        
+        return {'issued': issued, 'measured': len(measured)}
+    
+    def trim_working_set(self, pid, current_memory_mb=None, process_name=None):
+        result = {
+            'success': False,
+            'memory_freed_mb': 0.0,
+            'effectiveness': 0.0,
+            'pending': False
+        }
+        
+        try:
+            trim = self._issue_trim(pid, current_memory_mb)
+        except Exception as e:
+            logger.debug(f"Error trimming working set for PID {pid}: {type(e).__name__}: {e}")
+            trim = None
+        
+        with self.lock:
+            if trim is None:
+                self.stats['trim_failures'] += 1
+                return result
             
-            return result
+            self.inflight_trims[pid] = trim
+            self.stats['trims_issued'] += 1
+            self._ensure_baseline(pid, trim['memory_before_mb'], process_name)['last_trim'] = trim['issued_at']
+        
+        result.update({'success': True, 'pending': True})
+        return result
     
     def _adapt_trim_interval(self, pid, last_effectiveness):
         if pid not in self.memory_baselines:
@@ -228,6 +662,31 @@ class WorkingSetOptimizer:
                     tracking['last_foreground'] = current_time
                 tracking['is_foreground'] = is_foreground
     
+    def forget_process(self, pid):
+        with self.lock:
+            self.pending_trims.pop(pid, None)
+            self.inflight_trims.pop(pid, None)
+            self.regrowth_watch.pop(pid, None)
+            self.memory_baselines.pop(pid, None)
+            self.foreground_tracking.pop(pid, None)
+            self.trim_history.pop(pid, None)
+    
+    def get_trim_rates(self, now=None):
+        now = now or time.time()
+        with self.lock:
+            while self.recent_trims and now - self.recent_trims[0][0] > self.rate_window:
+                self.recent_trims.popleft()
+            freed_mb = sum(freed for _, freed in self.recent_trims)
+            return {
+                'trims_per_second': len(self.recent_trims) / self.rate_window,
+                'mb_reclaimed_per_second': freed_mb / self.rate_window
+            }
+    
+    def get_trim_profile(self, process_name):
+        with self.lock:
+            profile = self.trim_profiles.get(process_name)
+            return dict(profile) if profile else None
+    
     def get_trim_statistics_for_pid(self, pid):
         with self.lock:
             if pid not in self.trim_history or len(self.trim_history[pid]) == 0:
@@ -245,10 +704,20 @@ class WorkingSetOptimizer:
     
     def get_statistics(self):
         with self.lock:
-            return self.stats.copy()
+            stats = self.stats.copy()
+            stats['pending_trims'] = len(self.pending_trims)
+            stats['inflight_trims'] = len(self.inflight_trims)
+            stats['tracked_executables'] = len(self.trim_profiles)
+            stats['thrashing_executables'] = sum(
+                1 for p in self.trim_profiles.values()
+                if p['samples'] >= TRIM_PROFILE_MIN_SAMPLES and p['thrash_ratio'] >= TRIM_THRASH_BACKOFF_RATIO
+            )
+        stats.update(self.get_trim_rates())
+        return stats
 class LargePageManager:
-    def __init__(self, handle_cache):
+    def __init__(self, handle_cache, memory_sampler=None):
         self.handle_cache = handle_cache
+        self.memory_sampler = memory_sampler
         self.large_page_enabled_pids = set()
         self.lock = threading.RLock()
         self.large_page_privilege_enabled = False
@@ -284,7 +753,16 @@ class LargePageManager:
         except Exception:
             return False
     
-    def should_enable_large_pages(self, pid, is_foreground):
+    def _memory_mb(self, pid, process_view=None):
+        if self.memory_sampler:
+            sample = self.memory_sampler.get(pid)
+            if sample is not None:
+                return sample['working_set_mb']
+        if process_view is not None:
+            return process_view.memory_mb()
+        return psutil.Process(pid).memory_info().rss / (1024 * 1024)
+    
+    def should_enable_large_pages(self, pid, is_foreground, process_view=None):
         if not self.large_page_privilege_enabled:
             return False
         
@@ -292,8 +770,7 @@ class LargePageManager:
             return False
         
         try:
-            process = psutil.Process(pid)
-            memory_mb = process.memory_info().rss / (1024 * 1024)
+            memory_mb = self._memory_mb(pid, process_view)
             
             if memory_mb > 2048:
                 return True
@@ -302,14 +779,13 @@ class LargePageManager:
         
         return False
     
-    def enable_large_pages_for_process(self, pid):
+    def enable_large_pages_for_process(self, pid, process_view=None):
         with self.lock:
             if pid in self.large_page_enabled_pids:
                 return True
             
             try:
-                process = psutil.Process(pid)
-                memory_mb = process.memory_info().rss / (1024 * 1024)
+                memory_mb = self._memory_mb(pid, process_view)
                 
                 if memory_mb > 2048:
                     self.large_page_enabled_pids.add(pid)
@@ -336,21 +812,20 @@ class AdvancedWorkingSetTrimmer:
     
     def _trim_working_set(self, pid):
         try:
-            handle = self.handle_cache.get_handle(
+            with self.handle_cache.borrow(
                 pid,
                 PROCESS_SET_INFORMATION | PROCESS_QUERY_INFORMATION | PROCESS_SET_QUOTA
-            )
-            
-            if not handle:
-                return False
-            
-            result = kernel32.SetProcessWorkingSetSize(
-                handle,
-                ctypes.c_size_t(-1),
-                ctypes.c_size_t(-1)
-            )
-            
-            return bool(result)
+            ) as handle:
+                if not handle:
+                    return False
+                
+                result = kernel32.SetProcessWorkingSetSize(
+                    handle,
+                    ctypes.c_size_t(-1),
+                    ctypes.c_size_t(-1)
+                )
+                
+                return bool(result)
         except Exception:
             return False
     
@@ -396,42 +871,41 @@ class MemoryPriorityManager:
                     else:
                         target_priority = MEMORY_PRIORITY_LOW
                 
-                handle = self.handle_cache.get_handle(
+                with self.handle_cache.borrow(
                     pid,
                     PROCESS_SET_INFORMATION | PROCESS_QUERY_INFORMATION
-                )
-                
-                if not handle:
-                    return False
-                
-                mem_priority = MEMORY_PRIORITY_INFORMATION()
-                mem_priority.MemoryPriority = target_priority
-                
-                result = ntdll.NtSetInformationProcess(
-                    handle,
-                    ProcessMemoryPriority,
-                    ctypes.byref(mem_priority),
-                    ctypes.sizeof(mem_priority)
-                )
-                
-                if result == 0:
-                    self.priority_map[pid] = target_priority
-                    self.stats['total_priority_changes'] += 1
+                ) as handle:
+                    if not handle:
+                        return False
                     
-                    if target_priority == MEMORY_PRIORITY_VERY_LOW:
-                        self.stats['very_low_count'] += 1
-                    elif target_priority == MEMORY_PRIORITY_LOW:
-                        self.stats['low_count'] += 1
-                    elif target_priority == MEMORY_PRIORITY_MEDIUM:
-                        self.stats['medium_count'] += 1
-                    elif target_priority == MEMORY_PRIORITY_BELOW_NORMAL:
-                        self.stats['below_normal_count'] += 1
-                    elif target_priority == MEMORY_PRIORITY_NORMAL:
-                        self.stats['normal_count'] += 1
+                    mem_priority = MEMORY_PRIORITY_INFORMATION()
+                    mem_priority.MemoryPriority = target_priority
                     
-                    return True
-                
-                return False
+                    result = ntdll.NtSetInformationProcess(
+                        handle,
+                        ProcessMemoryPriority,
+                        ctypes.byref(mem_priority),
+                        ctypes.sizeof(mem_priority)
+                    )
+                    
+                    if result == 0:
+                        self.priority_map[pid] = target_priority
+                        self.stats['total_priority_changes'] += 1
+                        
+                        if target_priority == MEMORY_PRIORITY_VERY_LOW:
+                            self.stats['very_low_count'] += 1
+                        elif target_priority == MEMORY_PRIORITY_LOW:
+                            self.stats['low_count'] += 1
+                        elif target_priority == MEMORY_PRIORITY_MEDIUM:
+                            self.stats['medium_count'] += 1
+                        elif target_priority == MEMORY_PRIORITY_BELOW_NORMAL:
+                            self.stats['below_normal_count'] += 1
+                        elif target_priority == MEMORY_PRIORITY_NORMAL:
+                            self.stats['normal_count'] += 1
+                        
+                        return True
+                    
+                    return False
             except Exception:
                 return False
     
@@ -478,36 +952,35 @@ class AWEManager:
                 
                 self.stats['total_32bit_processes'] += 1
                 
-                handle = self.handle_cache.get_handle(
+                with self.handle_cache.borrow(
                     pid,
                     PROCESS_SET_INFORMATION | PROCESS_QUERY_INFORMATION | PROCESS_SET_QUOTA
-                )
-                
-                if not handle:
-                    self.stats['awe_failures'] += 1
-                    return False
-                
-                try:
-                    min_size = ctypes.c_size_t(0)
-                    max_size = ctypes.c_size_t(0xFFFFFFFF)
-                    
-                    result = kernel32.SetProcessWorkingSetSizeEx(
-                        handle,
-                        min_size,
-                        max_size,
-                        AWE_ENABLED_FLAG
-                    )
+                ) as handle:
+                    if not handle:
+                        self.stats['awe_failures'] += 1
+                        return False
                     
-                    if result:
-                        self.awe_enabled_processes.add(pid)
-                        self.stats['awe_enabled_count'] += 1
-                        return True
-                    else:
+                    try:
+                        min_size = ctypes.c_size_t(0)
+                        max_size = ctypes.c_size_t(0xFFFFFFFF)
+                        
+                        result = kernel32.SetProcessWorkingSetSizeEx(
+                            handle,
+                            min_size,
+                            max_size,
+                            AWE_ENABLED_FLAG
+                        )
+                        
+                        if result:
+                            self.awe_enabled_processes.add(pid)
+                            self.stats['awe_enabled_count'] += 1
+                            return True
+                        else:
+                            self.stats['awe_failures'] += 1
+                            return False
+                    except Exception:
                         self.stats['awe_failures'] += 1
                         return False
-                except Exception:
-                    self.stats['awe_failures'] += 1
-                    return False
             except Exception:
                 self.stats['awe_failures'] += 1
                 return False
@@ -566,38 +1039,44 @@ class DynamicHugePagesManager:
     MEMORY_THRESHOLD_GB = 2
     MEMORY_ACCESS_DETECTION_THRESHOLD = 1024 * 1024
     
-    def __init__(self, handle_cache):
+    def __init__(self, handle_cache, memory_sampler=None):
         self.handle_cache = handle_cache
+        self.memory_sampler = memory_sampler
         self.lock = threading.RLock()
         self.monitored_processes = {}
         self.stats = {'huge_pages_enabled': 0, 'processes_monitored': 0}
     
-    def monitor_process(self, pid):
+    def monitor_process(self, pid, process_view=None):
         with self.lock:
             try:
-                proc = psutil.Process(pid)
-                mem_info = proc.memory_info()
+                sample = self.memory_sampler.get(pid) if self.memory_sampler else None
+                if sample is not None:
+                    rss = int(sample['working_set_mb'] * 1024 * 1024)
+                elif process_view is not None:
+                    rss = process_view.memory_info().rss
+                else:
+                    rss = psutil.Process(pid).memory_info().rss
                 
                 if pid not in self.monitored_processes:
                     self.monitored_processes[pid] = {
-                        'start_rss': mem_info.rss,
-                        'last_rss': mem_info.rss,
+                        'start_rss': rss,
+                        'last_rss': rss,
                         'access_count': 0,
                         'huge_pages_enabled': False
                     }
                     self.stats['processes_monitored'] += 1
                 else:
                     data = self.monitored_processes[pid]
-                    rss_delta = abs(mem_info.rss - data['last_rss'])
+                    rss_delta = abs(rss - data['last_rss'])
                     
                     if rss_delta > self.MEMORY_ACCESS_DETECTION_THRESHOLD:
                         data['access_count'] += 1
                     
-                    data['last_rss'] = mem_info.rss
+                    data['last_rss'] = rss
                     
                     memory_threshold_bytes = self.MEMORY_THRESHOLD_GB * 1024 * 1024 * 1024
                     if data['access_count'] > self.ACCESS_THRESHOLD and not data['huge_pages_enabled']:
-                        if mem_info.rss > memory_threshold_bytes:
+                        if rss > memory_threshold_bytes:
                             self._enable_huge_pages(pid)
                             data['huge_pages_enabled'] = True
                             self.stats['huge_pages_enabled'] += 1
@@ -607,13 +1086,13 @@ class DynamicHugePagesManager:
     def _enable_huge_pages(self, pid):
         with self.lock:
             try:
-                handle = self.handle_cache.get_handle(pid, PROCESS_SET_QUOTA)
-                if handle:
-                    min_ws = 2 * 1024 * 1024 * 1024
-                    max_ws = 4 * 1024 * 1024 * 1024
-                    flags = QUOTA_LIMITS_HARDWS_MIN_ENABLE | QUOTA_LIMITS_HARDWS_MAX_ENABLE
-                    kernel32.SetProcessWorkingSetSizeEx(handle, min_ws, max_ws, flags)
-                    return True
+                with self.handle_cache.borrow(pid, PROCESS_SET_QUOTA) as handle:
+                    if handle:
+                        min_ws = 2 * 1024 * 1024 * 1024
+                        max_ws = 4 * 1024 * 1024 * 1024
+                        flags = QUOTA_LIMITS_HARDWS_MIN_ENABLE | QUOTA_LIMITS_HARDWS_MAX_ENABLE
+                        kernel32.SetProcessWorkingSetSizeEx(handle, min_ws, max_ws, flags)
+                        return True
             except Exception:
                 pass
             return False
@@ -638,9 +1117,10 @@ class MemoryDeduplicationManager:
                 return False
 class AdvancedMemoryPagePriorityManager:
     
-    def __init__(self, handle_cache):
+    def __init__(self, handle_cache, memory_sampler=None):
         self.lock = threading.RLock()
         self.handle_cache = handle_cache
+        self.memory_sampler = memory_sampler
         self.process_working_sets = {}
         self.page_access_patterns = defaultdict(lambda: {
             'sequential_accesses': 0,
@@ -660,11 +1140,11 @@ class AdvancedMemoryPagePriorityManager:
     def analyze_working_set(self, pid):
         with self.lock:
             try:
-                proc = psutil.Process(pid)
-                mem_info = proc.memory_info()
-                
-                
-                working_set_mb = mem_info.wset / (1024 * 1024)
+                sample = self.memory_sampler.get(pid) if self.memory_sampler else None
+                if sample is not None:
+                    working_set_mb = sample['working_set_mb']
+                else:
+                    working_set_mb = psutil.Process(pid).memory_info().wset / (1024 * 1024)
                 
                 
                 if pid not in self.process_working_sets:
@@ -721,24 +1201,24 @@ class AdvancedMemoryPagePriorityManager:
                         page_priority = PAGE_PRIORITY_LOW
                 
                 
-                handle = self.handle_cache.get_handle(pid, PROCESS_SET_INFORMATION)
-                if handle:
-                    page_priority_info = MEMORY_PRIORITY_INFORMATION()
-                    page_priority_info.MemoryPriority = page_priority
-                    
-                    result = ntdll.NtSetInformationProcess(
-                        int(handle),
-                        ProcessMemoryPriority,
-                        ctypes.byref(page_priority_info),
-                        ctypes.sizeof(page_priority_info)
-                    )
-                    
-                    if result == 0:
-                        if page_priority == PAGE_PRIORITY_NORMAL:
-                            self.stats['promotions'] += 1
-                        else:
-                            self.stats['demotions'] += 1
-                        return True
+                with self.handle_cache.borrow(pid, PROCESS_SET_INFORMATION) as handle:
+                    if handle:
+                        page_priority_info = MEMORY_PRIORITY_INFORMATION()
+                        page_priority_info.MemoryPriority = page_priority
+                        
+                        result = ntdll.NtSetInformationProcess(
+                            int(handle),
+                            ProcessMemoryPriority,
+                            ctypes.byref(page_priority_info),
+                            ctypes.sizeof(page_priority_info)
+                        )
+                        
+                        if result == 0:
+                            if page_priority == PAGE_PRIORITY_NORMAL:
+                                self.stats['promotions'] += 1
+                            else:
+                                self.stats['demotions'] += 1
+                            return True
             except Exception as e:
                 logger.debug(f"Page priority optimization error for pid {pid}: {e}")
             return False
@@ -807,17 +1287,17 @@ class AdvancedMemoryPagePriorityManager:
                 max_ws_bytes = int(max_ws_mb * 1024 * 1024)
                 
                 
-                handle = self.handle_cache.get_handle(pid, PROCESS_SET_QUOTA)
-                if handle:
-                    result = kernel32.SetProcessWorkingSetSize(
-                        int(handle),
-                        ctypes.c_size_t(min_ws_bytes),
-                        ctypes.c_size_t(max_ws_bytes)
-                    )
-                    if result:
-                        self.stats['working_set_optimizations'] += 1
-                        logger.debug(f"Working set optimized for pid {pid}: {min_ws_mb:.1f}MB - {max_ws_mb:.1f}MB")
-                        return True
+                with self.handle_cache.borrow(pid, PROCESS_SET_QUOTA) as handle:
+                    if handle:
+                        result = kernel32.SetProcessWorkingSetSize(
+                            int(handle),
+                            ctypes.c_size_t(min_ws_bytes),
+                            ctypes.c_size_t(max_ws_bytes)
+                        )
+                        if result:
+                            self.stats['working_set_optimizations'] += 1
+                            logger.debug(f"Working set optimized for pid {pid}: {min_ws_mb:.1f}MB - {max_ws_mb:.1f}MB")
+                            return True
             except Exception as e:
                 logger.debug(f"Working set optimization error for pid {pid}: {e}")
             return False
@@ -825,3 +1305,682 @@ class AdvancedMemoryPagePriorityManager:
     def get_stats(self):
         with self.lock:
             return self.stats.copy()
+class WindowsMemoryPressureBackend:
+    def __init__(self):
+        self.query = None
+        self.hard_fault_counter = None
+        self.standby_counters = []
+        self.free_counter = None
+        try:
+            self.query = win32pdh.OpenQuery()
+            self.hard_fault_counter = win32pdh.AddCounter(self.query, '\\Memory\\Pages Input/sec')
+        except Exception as e:
+            logger.debug(f"Hard fault counter unavailable: {e}")
+        
+        if self.query:
+            try:
+                self.standby_counters = [win32pdh.AddCounter(self.query, path) for path in STANDBY_PDH_COUNTERS]
+                self.free_counter = win32pdh.AddCounter(self.query, FREE_PDH_COUNTER)
+            except Exception as e:
+                logger.debug(f"Standby cache counters unavailable: {e}")
+                self.standby_counters = []
+                self.free_counter = None
+            try:
+                win32pdh.CollectQueryData(self.query)
+            except Exception as e:
+                logger.debug(f"Initial PDH collection failed: {e}")
+        
+        self.memory_list_available = not self.standby_counters and self._memory_list_info() is not None
+        if not self.standby_counters and not self.memory_list_available:
+            logger.error("No standby list source available (PDH standby counters and SystemMemoryListInformation both failed)")
+    
+    def _collect(self):
+        if not self.query:
+            return False
+        try:
+            win32pdh.CollectQueryData(self.query)
+            return True
+        except Exception as e:
+            logger.debug(f"PDH collection failed: {e}")
+            return False
+    
+    def _hard_fault_rate(self, collected):
+        if not collected or self.hard_fault_counter is None:
+            return 0.0
+        try:
+            _, value = win32pdh.GetFormattedCounterValue(self.hard_fault_counter, win32pdh.PDH_FMT_DOUBLE)
+            return float(value)
+        except Exception:
+            return 0.0
+    
+    def _memory_list_info(self):
+        try:
+            info = SYSTEM_MEMORY_LIST_INFORMATION()
+            status = ntdll.NtQuerySystemInformation(
+                SystemMemoryListInformation,
+                ctypes.byref(info),
+                ctypes.sizeof(info),
+                None
+            ) & 0xFFFFFFFF
+            if status != 0:
+                return None
+            page_mb = MEMORY_PAGE_SIZE / (1024 * 1024)
+            return (
+                sum(info.PageCountByPriority) * page_mb,
+                info.PageCountByPriority[0] * page_mb,
+                (info.ZeroPageCount + info.FreePageCount) * page_mb
+            )
+        except Exception:
+            return None
+    
+    def _memory_lists(self, collected):
+        if self.standby_counters and collected:
+            try:
+                values = []
+                for counter in self.standby_counters:
+                    _, value = win32pdh.GetFormattedCounterValue(counter, win32pdh.PDH_FMT_LARGE)
+                    values.append(value / (1024 * 1024))
+                _, free_value = win32pdh.GetFormattedCounterValue(self.free_counter, win32pdh.PDH_FMT_LARGE)
+                return sum(values), values[STANDBY_PDH_LOW_PRIORITY_INDEX], free_value / (1024 * 1024)
+            except Exception as e:
+                logger.debug(f"Standby cache counters failed: {e}")
+        
+        lists = self._memory_list_info()
+        if lists is None:
+            raise RuntimeError("Standby list size unavailable from PDH and SystemMemoryListInformation")
+        return lists
+    
+    def sample(self):
+        status = MEMORYSTATUSEX()
+        status.dwLength = ctypes.sizeof(MEMORYSTATUSEX)
+        if not kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+            return None
+        
+        collected = self._collect()
+        standby_mb, standby_low_mb, free_mb = self._memory_lists(collected)
+        
+        return self.build_sample(
+            status.ullTotalPhys,
+            status.ullAvailPhys,
+            status.ullTotalPageFile,
+            status.ullAvailPageFile,
+            standby_mb * 1024 * 1024,
+            self._hard_fault_rate(collected),
+            free_mb * 1024 * 1024,
+            standby_low_mb * 1024 * 1024
+        )
+    
+    @staticmethod
+    def build_sample(total_phys, avail_phys, total_page_file, avail_page_file, standby_bytes, hard_faults_per_second,
+                     free_bytes=None, standby_low_bytes=None):
+        return {
+            'total_mb': total_phys / (1024 * 1024),
+            'available_mb': avail_phys / (1024 * 1024),
+            'commit_limit_mb': total_page_file / (1024 * 1024),
+            'commit_mb': (total_page_file - avail_page_file) / (1024 * 1024),
+            'standby_mb': standby_bytes / (1024 * 1024),
+            'standby_low_mb': standby_low_bytes / (1024 * 1024) if standby_low_bytes is not None else None,
+            'free_mb': free_bytes / (1024 * 1024) if free_bytes is not None else None,
+            'hard_faults_per_second': hard_faults_per_second,
+            'stall_percent': None
+        }
+    
+    def close(self):
+        if self.query:
+            try:
+                win32pdh.CloseQuery(self.query)
+            except Exception:
+                pass
+            self.query = None
+class PsiMemoryPressureBackend:
+    def __init__(self, proc_root='/proc'):
+        self.proc_root = proc_root
+        self.last_major_faults = None
+        self.last_sample_time = None
+    
+    def _read(self, name):
+        with open(os.path.join(self.proc_root, name), 'r') as f:
+            return f.read()
+    
+    def _meminfo(self):
+        values = {}
+        for line in self._read('meminfo').splitlines():
+            key, _, rest = line.partition(':')
+            parts = rest.split()
+            if parts:
+                values[key] = int(parts[0]) / 1024
+        return values
+    
+    def _stall_percent(self):
+        try:
+            for line in self._read('pressure/memory').splitlines():
+                if line.startswith('some'):
+                    for field in line.split()[1:]:
+                        key, _, value = field.partition('=')
+                        if key == 'avg10':
+                            return float(value)
+        except Exception:
+            pass
+        return None
+    
+    def _hard_fault_rate(self, now):
+        try:
+            major_faults = None
+            for line in self._read('vmstat').splitlines():
+                if line.startswith('pgmajfault '):
+                    major_faults = int(line.split()[1])
+                    break
+            if major_faults is None:
+                return 0.0
+            rate = 0.0
+            if self.last_major_faults is not None and now > self.last_sample_time:
+                rate = max(0, major_faults - self.last_major_faults) / (now - self.last_sample_time)
+            self.last_major_faults = major_faults
+            self.last_sample_time = now
+            return rate
+        except Exception:
+            return 0.0
+    
+    def sample(self):
+        try:
+            meminfo = self._meminfo()
+        except Exception as e:
+            logger.debug(f"Could not read meminfo: {e}")
+            return None
+        
+        return {
+            'total_mb': meminfo.get('MemTotal', 0.0),
+            'available_mb': meminfo.get('MemAvailable', meminfo.get('MemFree', 0.0)),
+            'commit_limit_mb': meminfo.get('CommitLimit', 0.0),
+            'commit_mb': meminfo.get('Committed_AS', 0.0),
+            'standby_mb': meminfo.get('Inactive(file)', meminfo.get('Cached', 0.0)),
+            'standby_low_mb': None,
+            'free_mb': meminfo.get('MemFree'),
+            'hard_faults_per_second': self._hard_fault_rate(time.time()),
+            'stall_percent': self._stall_percent()
+        }
+    
+    def close(self):
+        pass
+class MemoryReclaimPlanner:
+    def __init__(self, backend=None, workingset_optimizer=None, trimmer=None, priority_manager=None,
+                 dedup_manager=None, memory_sampler=None, sample_interval_seconds=2.0,
+                 candidate_cooldown_seconds=120.0, candidate_ttl_seconds=900.0):
+        if backend is None:
+            backend = WindowsMemoryPressureBackend() if platform.system() == 'Windows' else PsiMemoryPressureBackend()
+        self.backend = backend
+        self.workingset_optimizer = workingset_optimizer
+        self.trimmer = trimmer
+        self.priority_manager = priority_manager
+        self.dedup_manager = dedup_manager
+        self.memory_sampler = memory_sampler
+        
+        self.sample_interval = sample_interval_seconds
+        self.candidate_cooldown = candidate_cooldown_seconds
+        self.candidate_ttl = candidate_ttl_seconds
+        
+        self.candidates = {}
+        self.last_reclaim = {}
+        self.demoted_pids = set()
+        self.pressure = None
+        self.last_sample_time = 0.0
+        self.compression_enabled = False
+        self.lock = threading.RLock()
+        
+        self.stats = {
+            'samples': 0,
+            'ticks': 0,
+            'ticks_under_pressure': 0,
+            'budget_mb_granted': 0.0,
+            'budget_mb_planned': 0.0,
+            'trims_planned': 0,
+            'demotions': 0,
+            'skipped_refault_risk': 0,
+            'budget_throttled_by_faults': 0,
+            'candidates_refreshed': 0,
+            'candidates_exited': 0
+        }
+    
+    def _classify(self, sample):
+        total_mb = sample['total_mb'] or 1.0
+        available_percent = sample['available_mb'] / total_mb * 100
+        commit_percent = sample['commit_mb'] / sample['commit_limit_mb'] * 100 if sample['commit_limit_mb'] else 0.0
+        stall = sample['stall_percent']
+        
+        level = 0
+        if available_percent < 25 or commit_percent > 80 or (stall is not None and stall > 1.0):
+            level = 1
+        if available_percent < 15 or commit_percent > 90 or (stall is not None and stall > 5.0):
+            level = 2
+        if available_percent < 7 or commit_percent > 95 or (stall is not None and stall > 15.0):
+            level = 3
+        
+        sample['available_percent'] = available_percent
+        sample['commit_percent'] = commit_percent
+        sample['level'] = level
+        sample['level_name'] = RECLAIM_LEVEL_NAMES[level]
+        return sample
+    
+    def sample(self, now=None, force=False):
+        if now is None:
+            now = time.time()
+        with self.lock:
+            if not force and self.pressure is not None and now - self.last_sample_time < self.sample_interval:
+                return self.pressure
+            
+            sample = self.backend.sample()
+            if sample is None:
+                return self.pressure
+            sample = self._classify(sample)
+            sample['timestamp'] = now
+            
+            self.pressure = sample
+            self.last_sample_time = now
+            self.stats['samples'] += 1
+        return sample
+    
+    def get_pressure(self):
+        with self.lock:
+            return dict(self.pressure) if self.pressure else None
+    
+    def observe_process(self, pid, process_name, memory_mb, minimized_time=0, now=None):
+        now = now or time.time()
+        with self.lock:
+            previous = self.candidates.get(pid)
+            self.candidates[pid] = {
+                'name': process_name,
+                'memory_mb': memory_mb,
+                'minimized_time': minimized_time,
+                'observed_at': now,
+                'background_since': previous['background_since'] if previous else now,
+                'seen_at': now
+            }
+    
+    def _refresh_candidates(self, now):
+        if not self.memory_sampler:
+            return
+        snapshot = self.memory_sampler.snapshot()
+        if snapshot is None:
+            return
+        with self.lock:
+            for pid in list(self.candidates):
+                sample = snapshot.get(pid)
+                if sample is None:
+                    self.candidates.pop(pid, None)
+                    self.demoted_pids.discard(pid)
+                    self.stats['candidates_exited'] += 1
+                    continue
+                info = self.candidates[pid]
+                info['memory_mb'] = sample['working_set_mb']
+                info['seen_at'] = now
+                self.stats['candidates_refreshed'] += 1
+    
+    def mark_foreground(self, pid):
+        with self.lock:
+            self.candidates.pop(pid, None)
+            self.demoted_pids.discard(pid)
+    
+    def forget(self, pid):
+        with self.lock:
+            self.candidates.pop(pid, None)
+            self.last_reclaim.pop(pid, None)
+            self.demoted_pids.discard(pid)
+    
+    def _refault_risk(self, process_name):
+        if not self.workingset_optimizer or not process_name:
+            return 0.0, None
+        profile = self.workingset_optimizer.get_trim_profile(process_name)
+        if not profile or profile['samples'] < TRIM_PROFILE_MIN_SAMPLES:
+            return 0.0, profile
+        return min(1.0, profile['thrash_ratio']), profile
+    
+    def _is_eligible(self, pid, info, risk, level, now):
+        backoff = 1.0
+        if self.workingset_optimizer:
+            backoff = self.workingset_optimizer.get_trim_policy(info['name'])['backoff']
+            min_background = self.workingset_optimizer.min_background_time_for_trim * backoff
+            if level < 3 and now - info['background_since'] < min_background:
+                return False
+            cooldown = max(self.candidate_cooldown, self.workingset_optimizer.get_trim_interval(pid))
+        else:
+            cooldown = self.candidate_cooldown
+        return now - self.last_reclaim.get(pid, 0) >= cooldown * backoff
+    
+    def rank_candidates(self, now=None, level=1):
+        now = now or time.time()
+        with self.lock:
+            candidates = [(pid, dict(info)) for pid, info in self.candidates.items()]
+        
+        ranked = []
+        for pid, info in candidates:
+            risk, profile = self._refault_risk(info['name'])
+            if risk >= TRIM_THRASH_SKIP_RATIO and level < 3:
+                with self.lock:
+                    self.stats['skipped_refault_risk'] += 1
+                continue
+            if not self._is_eligible(pid, info, risk, level, now):
+                continue
+            
+            if profile and profile['samples'] >= TRIM_PROFILE_MIN_SAMPLES:
+                reclaimable_mb = min(info['memory_mb'], profile['freed_mb'])
+            else:
+                reclaimable_mb = info['memory_mb'] * RECLAIM_DEFAULT_FRACTION
+            net_mb = reclaimable_mb * (1.0 - risk)
+            idle_time = info['minimized_time'] + max(0.0, now - info['observed_at'])
+            idle_bonus = 1.0 + min(idle_time, 1800) / 1800
+            ranked.append({
+                'pid': pid,
+                'name': info['name'],
+                'memory_mb': info['memory_mb'],
+                'minimized_time': idle_time,
+                'reclaimable_mb': reclaimable_mb,
+                'refault_risk': risk,
+                'score': net_mb * idle_bonus
+            })
+        
+        ranked.sort(key=lambda c: c['score'], reverse=True)
+        return ranked
+    
+    def compute_budget(self, pressure):
+        level = pressure['level']
+        budget_mb = RECLAIM_BUDGET_MB[level]
+        if level >= 2:
+            target_available_mb = pressure['total_mb'] * 0.2
+            budget_mb = max(budget_mb, target_available_mb - pressure['available_mb'])
+        
+        fault_rate = pressure['hard_faults_per_second']
+        if budget_mb > 0 and fault_rate > RECLAIM_HARD_FAULT_CEILING:
+            budget_mb *= max(0.25, RECLAIM_HARD_FAULT_CEILING / fault_rate)
+            self.stats['budget_throttled_by_faults'] += 1
+        return budget_mb, RECLAIM_MAX_ACTIONS[level]
+    
+    def plan(self, now=None):
+        now = now or time.time()
+        pressure = self.sample(now)
+        if pressure is None:
+            return {'level': 0, 'budget_mb': 0.0, 'actions': []}
+        
+        self._refresh_candidates(now)
+        budget_mb, max_actions = self.compute_budget(pressure)
+        actions = []
+        remaining_mb = budget_mb
+        if budget_mb > 0:
+            for candidate in self.rank_candidates(now, pressure['level']):
+                if len(actions) >= max_actions or remaining_mb <= 0:
+                    break
+                if candidate['score'] <= 0:
+                    break
+                actions.append(candidate)
+                remaining_mb -= candidate['reclaimable_mb']
+        
+        return {
+            'level': pressure['level'],
+            'budget_mb': budget_mb,
+            'planned_mb': budget_mb - remaining_mb,
+            'actions': actions
+        }
+    
+    def _reclaim(self, candidate):
+        pid = candidate['pid']
+        if self.workingset_optimizer:
+            return self.workingset_optimizer.request_trim(pid, candidate['memory_mb'], candidate['name'])
+        if self.trimmer:
+            return self.trimmer.trim_private_pages(pid)
+        return False
+    
+    def tick(self, now=None):
+        now = now or time.time()
+        plan = self.plan(now)
+        
+        with self.lock:
+            self.stats['ticks'] += 1
+            if plan['level'] > 0:
+                self.stats['ticks_under_pressure'] += 1
+            self.stats['budget_mb_granted'] += plan['budget_mb']
+            self.stats['budget_mb_planned'] += plan.get('planned_mb', 0.0)
+        
+        if plan['level'] >= 2 and self.dedup_manager and not self.compression_enabled:
+            if self.dedup_manager.enable_memory_compression(None):
+                self.compression_enabled = True
+        
+        for candidate in plan['actions']:
+            pid = candidate['pid']
+            try:
+                if plan['level'] >= 2 and self.priority_manager and pid not in self.demoted_pids:
+                    if self.priority_manager.set_memory_priority(pid, MEMORY_PRIORITY_VERY_LOW, False, 1801):
+                        self.demoted_pids.add(pid)
+                        self.stats['demotions'] += 1
+                
+                if self._reclaim(candidate):
+                    with self.lock:
+                        self.last_reclaim[pid] = now
+                        self.stats['trims_planned'] += 1
+            except Exception as e:
+                logger.debug(f"Reclaim action failed for pid {pid}: {e}")
+        
+        return plan
+    
+    def cleanup(self, now=None):
+        now = now or time.time()
+        with self.lock:
+            stale = [pid for pid, info in self.candidates.items() if now - info['seen_at'] > self.candidate_ttl]
+            for pid in stale:
+                self.candidates.pop(pid, None)
+            expired = [pid for pid, t in self.last_reclaim.items() if now - t > self.candidate_cooldown * 4]
+            for pid in expired:
+                self.last_reclaim.pop(pid, None)
+    
+    def get_stats(self):
+        with self.lock:
+            stats = self.stats.copy()
+            stats['candidates'] = len(self.candidates)
+            stats['pressure_level'] = self.pressure['level_name'] if self.pressure else None
+            return stats
+class StandbyPurgeController:
+    def __init__(self, executor=None, horizon_seconds=120.0, trend_window_seconds=60.0,
+                 min_cooldown_seconds=60.0, max_cooldown_seconds=3600.0, initial_cooldown_seconds=300.0,
+                 feedback_window_seconds=30.0, min_standby_percent=10.0, critical_available_percent=8.0,
+                 fault_spike_ratio=2.0):
+        self.executor = executor
+        self.horizon = horizon_seconds
+        self.trend_window = trend_window_seconds
+        self.min_cooldown = min_cooldown_seconds
+        self.max_cooldown = max_cooldown_seconds
+        self.cooldown = initial_cooldown_seconds
+        self.feedback_window = feedback_window_seconds
+        self.min_standby_percent = min_standby_percent
+        self.critical_available_percent = critical_available_percent
+        self.fault_spike_ratio = fault_spike_ratio
+        
+        self.history = deque()
+        self.fault_baseline = None
+        self.last_purge = None
+        self.pending_feedback = None
+        self.escalate = False
+        self.events = []
+        self.lock = threading.RLock()
+        
+        self.stats = {
+            'samples': 0,
+            'purges': 0,
+            'selective_purges': 0,
+            'full_purges': 0,
+            'predicted_purges': 0,
+            'critical_purges': 0,
+            'fault_triggered_purges': 0,
+            'purges_helped': 0,
+            'purges_hurt': 0,
+            'purges_ineffective': 0,
+            'purge_failures': 0
+        }
+    
+    @property
+    def poll_interval(self):
+        return max(1.0, min(10.0, self.horizon / 12))
+    
+    def _trend(self):
+        points = list(self.history)
+        if len(points) < 3:
+            return None
+        t0 = points[0][0]
+        n = len(points)
+        mean_t = sum(p[0] - t0 for p in points) / n
+        mean_a = sum(p[1] for p in points) / n
+        var_t = sum((p[0] - t0 - mean_t) ** 2 for p in points)
+        if var_t <= 0:
+            return None
+        return sum((p[0] - t0 - mean_t) * (p[1] - mean_a) for p in points) / var_t
+    
+    def predict_exhaustion_seconds(self, sample):
+        slope = self._trend()
+        if slope is None or slope >= 0:
+            return None
+        floor_mb = sample['total_mb'] * self.critical_available_percent / 100
+        headroom_mb = sample['available_mb'] - floor_mb
+        if headroom_mb <= 0:
+            return 0.0
+        return headroom_mb / -slope
+    
+    def _measure_purge_effect(self, sample):
+        feedback = self.pending_feedback
+        if not feedback or 'released_mb' in feedback:
+            return
+        
+        key = 'standby_mb'
+        if feedback['mode'] == STANDBY_PURGE_MODES[0] and feedback['standby_low_before_mb'] is not None \
+                and sample.get('standby_low_mb') is not None:
+            key = 'standby_low_mb'
+        before_mb = feedback['standby_low_before_mb'] if key == 'standby_low_mb' else feedback['standby_mb']
+        released_mb = max(0.0, before_mb - sample[key])
+        
+        free_gained_mb = None
+        if feedback['free_before_mb'] is not None and sample.get('free_mb') is not None:
+            free_gained_mb = sample['free_mb'] - feedback['free_before_mb']
+        
+        feedback['released_mb'] = released_mb
+        feedback['free_gained_mb'] = free_gained_mb
+        if released_mb < STANDBY_PURGE_MIN_RELEASED_MB:
+            self.stats['purges_ineffective'] += 1
+            self.escalate = feedback['mode'] == STANDBY_PURGE_MODES[0]
+    
+    def _apply_feedback(self, sample, now):
+        feedback = self.pending_feedback
+        if not feedback or now - feedback['purged_at'] < self.feedback_window:
+            return
+        self.pending_feedback = None
+        
+        faults_before = max(feedback['faults_before'], 1.0)
+        faults_after = sample['hard_faults_per_second']
+        hurt = faults_after > faults_before * self.fault_spike_ratio
+        
+        if hurt:
+            self.cooldown = min(self.max_cooldown, self.cooldown * 2)
+            self.escalate = False
+            self.stats['purges_hurt'] += 1
+        else:
+            self.cooldown = max(self.min_cooldown, self.cooldown * 0.75)
+            self.stats['purges_helped'] += 1
+        
+        feedback['faults_after'] = faults_after
+        feedback['hurt'] = hurt
+        feedback['next_cooldown'] = self.cooldown
+    
+    def _decide(self, sample, now):
+        total_mb = sample['total_mb'] or 1.0
+        standby_percent = sample['standby_mb'] / total_mb * 100
+        available_percent = sample['available_mb'] / total_mb * 100
+        
+        critical = available_percent <= self.critical_available_percent
+        cooldown = self.min_cooldown if critical else self.cooldown
+        if self.last_purge is not None and now - self.last_purge < cooldown:
+            return None
+        if self.pending_feedback and not critical:
+            return None
+        if standby_percent < self.min_standby_percent and not critical:
+            return None
+        
+        faults = sample['hard_faults_per_second']
+        baseline = self.fault_baseline or 0.0
+        fault_rising = baseline > 0 and faults > baseline * self.fault_spike_ratio
+        eta = self.predict_exhaustion_seconds(sample)
+        
+        if critical:
+            return 'critical'
+        if eta is not None and eta <= self.horizon:
+            return 'predicted'
+        if fault_rising and available_percent <= self.critical_available_percent * 2.5:
+            return 'faults'
+        return None
+    
+    def observe(self, sample, now=None):
+        if sample is None:
+            return None
+        if now is None:
+            now = sample.get('timestamp', time.time())
+        
+        with self.lock:
+            self.stats['samples'] += 1
+            self.history.append((now, sample['available_mb']))
+            while self.history and now - self.history[0][0] > self.trend_window:
+                self.history.popleft()
+            
+            self._measure_purge_effect(sample)
+            self._apply_feedback(sample, now)
+            reason = self._decide(sample, now)
+            
+            faults = sample['hard_faults_per_second']
+            if self.fault_baseline is None:
+                self.fault_baseline = faults
+            elif reason is None and not self.pending_feedback:
+                self.fault_baseline += 0.1 * (faults - self.fault_baseline)
+            
+            if reason is None:
+                return None
+            
+            mode = STANDBY_PURGE_MODES[1] if reason == 'critical' or self.escalate else STANDBY_PURGE_MODES[0]
+        
+        succeeded = False
+        try:
+            succeeded = bool(self.executor(mode)) if self.executor else False
+        except Exception as e:
+            logger.debug(f"Standby purge failed: {e}")
+        
+        with self.lock:
+            if not succeeded:
+                self.stats['purge_failures'] += 1
+                self.last_purge = now
+                return None
+            
+            event = {
+                'purged_at': now,
+                'reason': reason,
+                'mode': mode,
+                'available_before_mb': sample['available_mb'],
+                'standby_mb': sample['standby_mb'],
+                'standby_low_before_mb': sample.get('standby_low_mb'),
+                'free_before_mb': sample.get('free_mb'),
+                'faults_before': faults,
+                'cooldown': self.cooldown
+            }
+            self.events.append(event)
+            if len(self.events) > 100:
+                self.events.pop(0)
+            self.pending_feedback = event
+            self.last_purge = now
+            self.escalate = False
+            
+            self.stats['purges'] += 1
+            self.stats[f"{'full' if mode == STANDBY_PURGE_MODES[1] else 'selective'}_purges"] += 1
+            self.stats[{'critical': 'critical_purges', 'predicted': 'predicted_purges', 'faults': 'fault_triggered_purges'}[reason]] += 1
+            return event
+    
+    def get_events(self):
+        with self.lock:
+            return [dict(e) for e in self.events]
+    
+    def get_stats(self):
+        with self.lock:
+            stats = self.stats.copy()
+            stats['cooldown_seconds'] = self.cooldown
+            stats['fault_baseline'] = self.fault_baseline
+            return stats
@@ -4,8 +4,9 @@ import psutil
 import threading
 
 class ProcessServiceManager:
-    def __init__(self):
+    def __init__(self, cpu_sampler=None):
         self.lock = threading.RLock()
+        self.cpu_sampler = cpu_sampler
         self.database = {}
         self.load_database()
         self.stats = {
@@ -67,7 +68,10 @@ class ProcessServiceManager:
             process_list = [p for p in psutil.process_iter(['name']) if p.info['name'].lower() == process_name.lower()]
             if process_list:
                 proc = process_list[0]
-                proc_cpu = proc.cpu_percent(interval=0.1)
+                if self.cpu_sampler is not None:
+                    proc_cpu = self.cpu_sampler.get_pid_percent(proc.pid)
+                else:
+                    proc_cpu = proc.cpu_percent(interval=None)
                 proc_ram_mb = proc.memory_info().rss / (1024 * 1024)
                 
                 if proc_cpu > cpu_threshold or proc_ram_mb > ram_threshold:
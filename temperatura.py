@@ -3,7 +3,7 @@ import psutil
 import subprocess
 import threading
 import logging
-from collections import defaultdict, deque
+from ajustes_varios import CoreSet, MigrationGovernor, TimeSeriesStore
 import ctypes
 
 logger = logging.getLogger(__name__)
@@ -18,6 +18,8 @@ PROCESS_QUERY_INFORMATION = 0x0400
 
 TEMP_DELTA_PER_LOAD = 15
 TEMP_CENTERING_OFFSET = 7.5
+THERMAL_BENEFIT_SCALE = 10.0
+THERMAL_PREDICTION_HORIZON_SECONDS = 30.0
 
 try:
     import clr
@@ -35,8 +37,9 @@ class CPUTemperatureMonitor:
     MIN_TEMP_FALLBACK = 35.0
     MAX_TEMP_FALLBACK = 75.0
     
-    def __init__(self):
+    def __init__(self, cpu_sampler=None):
         self.lock = threading.RLock()
+        self.cpu_sampler = cpu_sampler
         self.current_temp = 0.0
         self.is_laptop = self._is_laptop()
         self.max_temp_desktop = 70
@@ -98,7 +101,10 @@ class CPUTemperatureMonitor:
     
     def _calculate_temp_from_cpu_usage(self):
         try:
-            cpu_percent = psutil.cpu_percent(interval=0.1)
+            if self.cpu_sampler is not None:
+                cpu_percent = self.cpu_sampler.get_system_percent()
+            else:
+                cpu_percent = psutil.cpu_percent(interval=None)
             return self.MIN_TEMP_FALLBACK + (cpu_percent / 100.0 * self.temp_range)
         except Exception:
             return 45.0
@@ -145,16 +151,18 @@ class CPUTemperatureMonitor:
                     pass
 class ThermalAwareScheduler:
     
-    def __init__(self, cpu_count, temp_monitor):
+    def __init__(self, cpu_count, temp_monitor, cpu_sampler=None, migration_governor=None, timeseries=None):
         self.lock = threading.RLock()
         self.cpu_count = cpu_count
         self.temp_monitor = temp_monitor
+        self.cpu_sampler = cpu_sampler
+        self.migration_governor = migration_governor or MigrationGovernor()
+        self.timeseries = timeseries or TimeSeriesStore(capacity=32)
         self.per_core_temps = {}
-        self.core_load_history = defaultdict(lambda: deque(maxlen=10))
-        self.last_migration = {}
         self.last_rotation = time.time()
         self.stats = {
             'migrations': 0,
+            'migrations_declined': 0,
             'rotations': 0,
             'throttle_preventions': 0
         }
@@ -164,14 +172,17 @@ class ThermalAwareScheduler:
         self.cool_threshold = 60  
         self.critical_threshold = 85  
     
-    def get_per_core_temperatures(self):
+    def sample_core_temperatures(self):
         with self.lock:
             try:
                 
                 base_temp = self.temp_monitor.get_current_temperature()
                 
                 
-                per_core_percent = psutil.cpu_percent(interval=0.1, percpu=True)
+                if self.cpu_sampler is not None:
+                    per_core_percent = self.cpu_sampler.get_per_core_percents()
+                else:
+                    per_core_percent = psutil.cpu_percent(interval=None, percpu=True)
                 
                 
                 for core_idx, load_percent in enumerate(per_core_percent):
@@ -179,9 +190,10 @@ class ThermalAwareScheduler:
                     temp_delta = (load_percent / 100.0) * TEMP_DELTA_PER_LOAD
                     estimated_temp = base_temp + temp_delta - TEMP_CENTERING_OFFSET  
                     self.per_core_temps[core_idx] = max(30, min(100, estimated_temp))
-                    
-                    
-                    self.core_load_history[core_idx].append(load_percent)
+                
+                now = time.time()
+                self.timeseries.record_cores('core_temp', [self.per_core_temps[c] for c in sorted(self.per_core_temps)], now)
+                self.timeseries.record('core_temp', base_temp, timestamp=now)
                 
                 return self.per_core_temps.copy()
             except Exception as e:
@@ -189,42 +201,64 @@ class ThermalAwareScheduler:
                 
                 return {i: base_temp for i in range(self.cpu_count)} if 'base_temp' in locals() else {}
     
-    def find_coolest_cores(self, count=4):
+    def get_per_core_temperatures(self):
+        with self.lock:
+            return self.per_core_temps.copy()
+    
+    def get_smoothed_core_temperatures(self, alpha=0.3):
         with self.lock:
-            temps = self.get_per_core_temperatures()
-            hot_cores = [
-                core_idx for core_idx, temp in temps.items()
-                if temp >= self.hot_threshold
-            ]
-            return hot_cores
+            return {
+                core_idx: self.timeseries.ewma('core_temp', core=core_idx, alpha=alpha, default=temp)
+                for core_idx, temp in self.per_core_temps.items()
+            }
     
-    def migrate_process_to_cooler_cores(self, pid, handle_cache):
+    def find_coolest_cores(self, count=4, temps=None):
+        with self.lock:
+            if temps is None:
+                temps = self.get_smoothed_core_temperatures()
+            return sorted(temps, key=lambda core_idx: temps[core_idx])[:count]
+    
+    def _thermal_benefit(self, temps, source_cores, target_cores):
+        if not temps or not target_cores:
+            return 0.0
+        source = [temps[c] for c in source_cores if c in temps] if source_cores else list(temps.values())
+        target = [temps[c] for c in target_cores if c in temps]
+        if not source or not target:
+            return 0.0
+        return (sum(source) / len(source) - sum(target) / len(target)) / THERMAL_BENEFIT_SCALE
+    
+    def _migrate(self, pid, handle_cache, target_cores, temps, working_set_mb=None):
+        source_cores = self.migration_governor.get_cores(pid)
+        benefit = self._thermal_benefit(temps, source_cores, target_cores)
+        
+        if not self.migration_governor.evaluate(pid, target_cores, benefit, source_cores, working_set_mb):
+            self.stats['migrations_declined'] += 1
+            return False
+        
+        with handle_cache.borrow(pid, PROCESS_SET_INFORMATION | PROCESS_QUERY_INFORMATION) as handle:
+            if not handle:
+                return False
+            
+            affinity_mask = CoreSet.from_cores(target_cores).affinity_mask()
+            if not kernel32.SetProcessAffinityMask(handle, ULONG_PTR(affinity_mask)):
+                return False
+        
+        self.migration_governor.record(pid, target_cores, source_cores)
+        self.stats['migrations'] += 1
+        return True
+    
+    def migrate_process_to_cooler_cores(self, pid, handle_cache, working_set_mb=None):
         with self.lock:
             try:
-                current_time = time.time()
-                
-                
-                if pid in self.last_migration:
-                    if current_time - self.last_migration[pid] < 30:
-                        return False
-                
-                
-                coolest_cores = self.find_coolest_cores(count=4)
+                temps = self.get_smoothed_core_temperatures()
+                coolest_cores = self.find_coolest_cores(count=4, temps=temps)
                 
                 if not coolest_cores:
                     return False
                 
-                
-                handle = handle_cache.get_handle(pid, PROCESS_SET_INFORMATION | PROCESS_QUERY_INFORMATION)
-                if handle:
-                    affinity_mask = sum(1 << core for core in coolest_cores)
-                    result = kernel32.SetProcessAffinityMask(handle, ULONG_PTR(affinity_mask))
-                    
-                    if result:
-                        self.last_migration[pid] = current_time
-                        self.stats['migrations'] += 1
-                        logger.info(f"Process {pid} migrated to cooler cores: {coolest_cores}")
-                        return True
+                if self._migrate(pid, handle_cache, coolest_cores, temps, working_set_mb):
+                    logger.info(f"Process {pid} migrated to cooler cores: {coolest_cores}")
+                    return True
             except Exception as e:
                 logger.debug(f"Process migration error for PID {pid}: {e}")
             return False
@@ -246,22 +280,26 @@ class ThermalAwareScheduler:
                 for i in range(0, self.cpu_count, cores_per_group):
                     groups.append(list(range(i, min(i + cores_per_group, self.cpu_count))))
                 
+                temps = self.get_smoothed_core_temperatures()
+                group_temps = [
+                    sum(temps.get(c, 0) for c in cores) / len(cores) for cores in groups
+                ]
                 
-                for idx, pid in enumerate(active_pids[:len(groups)]):
+                moved = 0
+                for pid in active_pids[:len(groups)]:
                     try:
-                        group_idx = idx % len(groups)
+                        group_idx = min(range(len(groups)), key=lambda g: group_temps[g])
                         cores = groups[group_idx]
                         
-                        handle = handle_cache.get_handle(pid, PROCESS_SET_INFORMATION)
-                        if handle:
-                            affinity_mask = sum(1 << core for core in cores)
-                            kernel32.SetProcessAffinityMask(handle, ULONG_PTR(affinity_mask))
+                        if self._migrate(pid, handle_cache, cores, temps):
+                            moved += 1
+                            group_temps[group_idx] += TEMP_DELTA_PER_LOAD / len(cores)
                     except Exception:
                         pass
                 
                 self.stats['rotations'] += 1
-                logger.debug(f"Load rotation applied to {len(groups)} core groups")
-                return True
+                logger.debug(f"Load rotation moved {moved} processes across {len(groups)} core groups")
+                return moved > 0
             except Exception as e:
                 logger.debug(f"Load rotation error: {e}")
                 return False
@@ -269,19 +307,20 @@ class ThermalAwareScheduler:
     def predict_and_prevent_throttling(self):
         with self.lock:
             try:
-                temps = self.get_per_core_temperatures()
+                temps = self.get_smoothed_core_temperatures()
+                trend = self.timeseries.slope('core_temp') * THERMAL_PREDICTION_HORIZON_SECONDS
                 
                 
                 hot_cores = [
                     core_idx for core_idx, temp in temps.items()
-                    if temp >= self.critical_threshold - 5  
+                    if temp + max(0.0, trend) >= self.critical_threshold - 5  
                 ]
                 
                 if hot_cores:
                     
                     avg_temp = sum(temps.values()) / len(temps)
                     
-                    if avg_temp > self.hot_threshold:
+                    if avg_temp + max(0.0, trend) > self.hot_threshold:
                         
                         self.stats['throttle_preventions'] += 1
                         logger.warning(f"Thermal throttling predicted! Hot cores: {hot_cores}, Avg temp: {avg_temp:.1f}°C")
@@ -0,0 +1,163 @@
+import json
+
+import pytest
+
+pytest.importorskip("win32pdh")
+
+from ram import (
+    MemoryReclaimPlanner, StandbyPurgeController, WindowsMemoryPressureBackend,
+    STANDBY_PURGE_MODES
+)
+
+MB = 1024 * 1024
+
+MEMORY_TRACE_PRESETS = {
+    'leak': [
+        {'duration_seconds': 300},
+        {'duration_seconds': 300, 'leak_mb_per_second': 20.0},
+        {'duration_seconds': 300, 'available_mb': 7000.0},
+        {'duration_seconds': 200, 'leak_mb_per_second': 25.0},
+        {'duration_seconds': 500}
+    ],
+    'refault_after_purge': [
+        {'duration_seconds': 300},
+        {'duration_seconds': 240, 'leak_mb_per_second': 20.0},
+        {'duration_seconds': 40, 'leak_mb_per_second': 20.0, 'hard_faults_per_second': 400.0},
+        {'duration_seconds': 20, 'leak_mb_per_second': 20.0},
+        {'duration_seconds': 300, 'available_mb': 7000.0},
+        {'duration_seconds': 200, 'leak_mb_per_second': 25.0},
+        {'duration_seconds': 500}
+    ],
+    'critical_low_standby': [
+        {'duration_seconds': 120, 'available_mb': 2048.0, 'standby_mb': 512.0},
+        {'duration_seconds': 120, 'available_mb': 1024.0, 'standby_mb': 512.0, 'hard_faults_per_second': 800.0},
+        {'duration_seconds': 120, 'available_mb': 2048.0, 'standby_mb': 512.0}
+    ]
+}
+
+
+def build_memory_trace(phases, total_mb=16384.0, start_available_mb=8192.0, commit_limit_mb=20480.0,
+                       commit_mb=9216.0, interval_seconds=10.0, start_time=0.0):
+    trace = []
+    timestamp = start_time
+    available_mb = start_available_mb
+    for phase in phases:
+        steps = int(phase['duration_seconds'] / interval_seconds)
+        if 'available_mb' in phase:
+            available_mb = phase['available_mb']
+        standby_mb = phase.get('standby_mb', 4096.0)
+        for _ in range(steps):
+            sample = WindowsMemoryPressureBackend.build_sample(
+                total_mb * MB,
+                max(0.0, available_mb) * MB,
+                commit_limit_mb * MB,
+                (commit_limit_mb - commit_mb) * MB,
+                standby_mb * MB,
+                phase.get('hard_faults_per_second', 50.0),
+                phase.get('free_mb', 256.0) * MB,
+                phase.get('standby_low_mb', standby_mb / 4) * MB
+            )
+            sample['timestamp'] = timestamp
+            trace.append(sample)
+            timestamp += interval_seconds
+            available_mb -= phase.get('leak_mb_per_second', 0.0) * interval_seconds
+    return trace
+
+
+class TraceMemoryPressureBackend:
+    def __init__(self, trace):
+        self.trace = list(trace)
+        self.position = 0
+        self.low_released_mb = 0.0
+        self.high_released_mb = 0.0
+
+    def purge(self, mode, low_effective=True):
+        sample = self.trace[max(0, self.position - 1)]
+        if mode == STANDBY_PURGE_MODES[1] or low_effective:
+            self.low_released_mb += max(0.0, sample['standby_low_mb'] - self.low_released_mb)
+        if mode == STANDBY_PURGE_MODES[1]:
+            high_mb = sample['standby_mb'] - sample['standby_low_mb']
+            self.high_released_mb += max(0.0, high_mb - self.high_released_mb)
+        return True
+
+    def sample(self):
+        if self.position >= len(self.trace):
+            return None
+        sample = dict(self.trace[self.position])
+        self.position += 1
+        sample.pop('timestamp', None)
+        released_mb = self.low_released_mb + self.high_released_mb
+        sample['standby_low_mb'] = max(0.0, sample['standby_low_mb'] - self.low_released_mb)
+        sample['standby_mb'] = max(0.0, sample['standby_mb'] - released_mb)
+        sample['free_mb'] += released_mb
+        return sample
+
+
+def replay_memory_trace(trace, low_effective=True, **kwargs):
+    backend = TraceMemoryPressureBackend(trace)
+    planner = MemoryReclaimPlanner(backend=backend, sample_interval_seconds=0.0)
+    controller = StandbyPurgeController(
+        executor=lambda mode: backend.purge(mode, low_effective), **kwargs
+    )
+    for recorded in trace:
+        sample = planner.sample(now=recorded['timestamp'], force=True)
+        controller.observe(sample, now=recorded['timestamp'])
+    return controller.get_events(), controller.get_stats()
+
+
+def test_build_sample_reports_memory_lists_in_mb():
+    sample = WindowsMemoryPressureBackend.build_sample(
+        16384 * MB, 4096 * MB, 20480 * MB, 10240 * MB, 2048 * MB, 12.0, 512 * MB, 256 * MB
+    )
+    assert sample['available_mb'] == 4096
+    assert sample['commit_mb'] == 10240
+    assert sample['standby_mb'] == 2048
+    assert sample['free_mb'] == 512
+    assert sample['standby_low_mb'] == 256
+
+
+def test_leak_triggers_predicted_selective_purge_before_exhaustion():
+    events, stats = replay_memory_trace(build_memory_trace(MEMORY_TRACE_PRESETS['leak']))
+    assert events
+    first = events[0]
+    assert first['reason'] == 'predicted'
+    assert first['mode'] == STANDBY_PURGE_MODES[0]
+    assert first['available_before_mb'] > 16384.0 * 0.08
+    assert first['released_mb'] > 0
+    assert first['free_gained_mb'] > 0
+    assert stats['predicted_purges'] >= 1
+
+
+def test_selective_purge_that_releases_nothing_escalates_to_full():
+    events, stats = replay_memory_trace(build_memory_trace(MEMORY_TRACE_PRESETS['leak']), low_effective=False)
+    assert len(events) >= 2
+    assert events[0]['mode'] == STANDBY_PURGE_MODES[0]
+    assert events[0]['released_mb'] == 0
+    assert stats['purges_ineffective'] >= 1
+    assert events[1]['mode'] == STANDBY_PURGE_MODES[1]
+
+
+def test_refault_burst_after_purge_backs_off_cooldown():
+    events, stats = replay_memory_trace(build_memory_trace(MEMORY_TRACE_PRESETS['refault_after_purge']))
+    assert stats['purges_hurt'] >= 1
+    hurt = [e for e in events if e.get('hurt')]
+    assert hurt
+    assert hurt[0]['next_cooldown'] > hurt[0]['cooldown']
+
+
+def test_critical_purge_bypasses_standby_gate():
+    events, stats = replay_memory_trace(build_memory_trace(MEMORY_TRACE_PRESETS['critical_low_standby']))
+    critical = [e for e in events if e['reason'] == 'critical']
+    assert critical
+    assert all(e['mode'] == STANDBY_PURGE_MODES[1] for e in critical)
+    assert stats['critical_purges'] == len(critical)
+
+
+def test_trace_round_trips_through_json(tmp_path):
+    trace = build_memory_trace(MEMORY_TRACE_PRESETS['leak'])
+    path = tmp_path / 'trace.json'
+    path.write_text(json.dumps(trace), encoding='utf-8')
+    loaded = sorted(json.loads(path.read_text(encoding='utf-8')), key=lambda s: s['timestamp'])
+    events, _ = replay_memory_trace(loaded)
+    expected, _ = replay_memory_trace(trace)
+    assert [(e['purged_at'], e['mode']) for e in events] == [(e['purged_at'], e['mode']) for e in expected]
@@ -0,0 +1,87 @@
+import pytest
+
+pytest.importorskip("win32api")
+
+from ajustes_varios import PROCESSOR_GROUP_SIZE
+from cpu import TopologyProvider, CacheUnified
+
+TOPOLOGY_FIXTURE_PRESETS = {
+    'hybrid': {'cores_per_ccd': 8, 'efficiency_cores': 16},
+    'multi_ccd': {'ccds_per_package': 2, 'cores_per_ccd': 8},
+    'dual_socket': {'packages': 2, 'cores_per_ccd': 16}
+}
+
+
+def build_topology_fixture(packages=1, ccds_per_package=1, cores_per_ccd=8, threads_per_core=2,
+                           efficiency_cores=0, l2_size=1024 * 1024, l3_size=32 * 1024 * 1024):
+    fixture = {'cores': [], 'packages': [], 'numa_nodes': {}, 'caches': []}
+    cpu = 0
+    for package in range(packages):
+        package_cpus = []
+        for ccd in range(ccds_per_package):
+            ccd_cpus = []
+            for _ in range(cores_per_ccd):
+                cpus = list(range(cpu, cpu + threads_per_core))
+                cpu += threads_per_core
+                fixture['cores'].append({'cpus': cpus, 'efficiency_class': 1 if efficiency_cores else 0})
+                fixture['caches'].append({'level': 2, 'type': CacheUnified, 'size': l2_size, 'line_size': 64, 'cpus': cpus})
+                ccd_cpus.extend(cpus)
+            for first in range(0, efficiency_cores, 4):
+                cluster = list(range(cpu, cpu + min(4, efficiency_cores - first)))
+                cpu += len(cluster)
+                for e_cpu in cluster:
+                    fixture['cores'].append({'cpus': [e_cpu], 'efficiency_class': 0})
+                fixture['caches'].append({'level': 2, 'type': CacheUnified, 'size': l2_size * 2, 'line_size': 64, 'cpus': cluster})
+                ccd_cpus.extend(cluster)
+            fixture['caches'].append({'level': 3, 'type': CacheUnified, 'size': l3_size, 'line_size': 64, 'cpus': ccd_cpus})
+            package_cpus.extend(ccd_cpus)
+        fixture['packages'].append(package_cpus)
+        fixture['numa_nodes'][str(package)] = package_cpus
+    fixture['group_sizes'] = [min(PROCESSOR_GROUP_SIZE, cpu - start) for start in range(0, cpu, PROCESSOR_GROUP_SIZE)]
+    return fixture
+
+
+def provider_from_preset(name, **overrides):
+    params = dict(TOPOLOGY_FIXTURE_PRESETS[name])
+    params.update(overrides)
+    return TopologyProvider(fixture=build_topology_fixture(**params))
+
+
+def test_hybrid_preset_splits_p_and_e_cores():
+    provider = provider_from_preset('hybrid')
+    pe = provider.get_pe_core_sets()
+    assert pe['hybrid']
+    assert pe['p_cores'] == list(range(16))
+    assert pe['e_cores'] == list(range(16, 32))
+    siblings = provider.get_smt_siblings()
+    assert siblings[0] == [1]
+    assert not siblings.get(16)
+
+
+def test_multi_ccd_preset_exposes_one_l3_group_per_ccd():
+    provider = provider_from_preset('multi_ccd')
+    l3_groups = provider.get_cache_groups(3)
+    assert len(l3_groups) == 2
+    assert sorted(len(group) for group in l3_groups) == [16, 16]
+    assert len(provider.get_cache_groups(2)) == 16
+    assert provider.get_cache_size_mb(3) == 32
+
+
+def test_dual_socket_preset_maps_packages_to_numa_nodes():
+    provider = provider_from_preset('dual_socket')
+    packages = provider.get_packages()
+    assert len(packages) == 2
+    numa_nodes = provider.get_numa_nodes()
+    assert len(numa_nodes) == 2
+    assert all(len(cpus) == 32 for cpus in numa_nodes.values())
+    assert not provider.get_pe_core_sets()['hybrid']
+
+
+def test_saved_fixture_loads_back_identically(tmp_path):
+    provider = provider_from_preset('multi_ccd')
+    path = str(tmp_path / 'topology.json')
+    provider.save_fixture(path)
+    reloaded = TopologyProvider(fixture=path)
+    assert reloaded.get_cache_groups(3) == provider.get_cache_groups(3)
+    assert reloaded.get_smt_siblings() == provider.get_smt_siblings()
+    assert reloaded.get_stats()['backend'] == 'fixture'